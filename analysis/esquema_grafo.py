@@ -0,0 +1,145 @@
+# analysis/esquema_grafo.py
+
+from typing import Optional
+from neo4j.exceptions import CypherSyntaxError, ClientError
+import logging
+logger = logging.getLogger(__name__)
+
+# Restricciones de unicidad: (etiqueta, propiedad, nombre). Además de evitar duplicados, crean el índice
+# que usan los MERGE (d:Diputado {nombre: ...}) de las importaciones en lugar de recorrer toda la etiqueta
+RESTRICCIONES = [
+    ("Diputado", "nombre", "diputado_nombre_unico"),
+    ("Grupo", "nombre", "grupo_nombre_unico"),
+    ("Provincia", "nombre", "provincia_nombre_unico"),
+    ("Legislatura", "numero", "legislatura_numero_unico"),
+]
+
+# Índices sobre propiedades de relaciones usadas en consultas temporales y por legislatura:
+# (tipo, propiedades, nombre)
+INDICES_RELACIONES = [
+    ("PERTENECE_A", ["fecha_alta", "fecha_baja"], "pertenece_a_fechas"),
+    ("SUSTITUYE_A", ["fecha_alta", "fecha_baja"], "sustituye_a_fechas"),
+    ("VOTA_IGUAL_QUE", ["legislatura"], "vota_igual_que_legislatura"),
+]
+
+# Operadores del plan que recorren una etiqueta o un tipo de relación completos
+OPERADORES_ESCANEO = {
+    "AllNodesScan",
+    "NodeByLabelScan",
+    "DirectedAllRelationshipsScan",
+    "UndirectedAllRelationshipsScan",
+    "DirectedRelationshipTypeScan",
+    "UndirectedRelationshipTypeScan",
+}
+
+
+class GestorEsquema:
+    """
+    Prepara el esquema del grafo antes de importar: crea las restricciones de unicidad y los índices
+    de relaciones, comprueba con SHOW INDEXES que están creados y en línea, y analiza con EXPLAIN
+    qué índices usa el plan de cada consulta de importación.
+    """
+
+    def __init__(self, driver, database: str):
+        """
+        :param driver: Driver de Neo4j ya conectado.
+        :param database: Nombre de la base de datos.
+        """
+        self.driver = driver
+        self.database = database
+
+    def crear(self):
+        """Crea (si no existen) las restricciones de unicidad y los índices de relaciones."""
+        with self.driver.session(database=self.database) as session:
+            for label, field, constraint in RESTRICCIONES:
+                try:
+                    session.run(f"""
+                        CREATE CONSTRAINT {constraint}
+                        IF NOT EXISTS
+                        FOR (n:{label}) REQUIRE n.{field} IS UNIQUE
+                    """)
+                    logger.info(f"Constraint '{constraint}' verificado para {label}.{field}")
+                except CypherSyntaxError as e:
+                    logger.error(f"Error creando constraint para {label}: {e}")
+
+            for tipo, propiedades, indice in INDICES_RELACIONES:
+                columnas = ", ".join(f"r.{propiedad}" for propiedad in propiedades)
+                try:
+                    session.run(f"""
+                        CREATE INDEX {indice}
+                        IF NOT EXISTS
+                        FOR ()-[r:{tipo}]-() ON ({columnas})
+                    """)
+                    logger.info(f"Índice '{indice}' verificado para {tipo}({', '.join(propiedades)})")
+                except CypherSyntaxError as e:
+                    logger.error(f"Error creando índice para {tipo}: {e}")
+
+    def comprobar(self, espera: int = 60) -> list[str]:
+        """
+        Espera a que los índices terminen de construirse y comprueba con SHOW INDEXES que están todos.
+
+        :param espera: Segundos máximos de espera a que los índices estén en línea.
+        :return: Nombres de los índices que faltan o no están en línea (vacía si todo está bien).
+        """
+        esperados = [nombre for *_, nombre in RESTRICCIONES] + [nombre for *_, nombre in INDICES_RELACIONES]
+        with self.driver.session(database=self.database) as session:
+            try:
+                session.run("CALL db.awaitIndexes($espera)", espera=espera).consume()
+            except ClientError as e:
+                logger.warning(f"Los índices no han terminado de construirse: {e}")
+            estados = {
+                registro["name"]: registro["state"]
+                for registro in session.run("SHOW INDEXES YIELD name, state")
+            }
+
+        pendientes = [nombre for nombre in esperados if estados.get(nombre) != "ONLINE"]
+        for nombre in pendientes:
+            logger.warning(f"Índice '{nombre}' no disponible (estado: {estados.get(nombre, 'no existe')})")
+        if not pendientes:
+            logger.info(f"{len(esperados)} índices del esquema en línea")
+        return pendientes
+
+    def asegurar(self, espera: int = 60) -> list[str]:
+        """
+        Crea el esquema y comprueba que está en línea; se llama antes de cualquier importación.
+
+        :param espera: Segundos máximos de espera a que los índices estén en línea.
+        :return: Nombres de los índices que faltan o no están en línea.
+        """
+        self.crear()
+        return self.comprobar(espera)
+
+    def informe_planes(self, consultas: dict[str, str], parametros: Optional[dict] = None) -> list[dict]:
+        """
+        Obtiene con EXPLAIN (sin ejecutar nada) el plan de cada consulta e indica qué índices usa
+        y qué operadores recorren una etiqueta o un tipo de relación completos.
+
+        :param consultas: Consultas a analizar, por nombre (p. ej. {'grupos': CONSULTA_GRUPOS}).
+        :param parametros: Parámetros de ejemplo para las consultas (p. ej. $filas y $legislatura).
+        :return: Lista de diccionarios con consulta, indices y escaneos (descripciones de los operadores).
+        """
+        informe = []
+        with self.driver.session(database=self.database) as session:
+            for nombre, consulta in consultas.items():
+                plan = session.run(f"EXPLAIN {consulta}", **(parametros or {})).consume().plan
+                indices, escaneos = [], []
+                self._recorrer_plan(plan or {}, indices, escaneos)
+                informe.append({"consulta": nombre, "indices": indices, "escaneos": escaneos})
+
+                logger.info(f"Plan de '{nombre}': índices usados {indices or 'ninguno'}")
+                if escaneos:
+                    logger.warning(f"Plan de '{nombre}': recorre etiquetas o relaciones completas {escaneos}")
+        return informe
+
+    @classmethod
+    def _recorrer_plan(cls, plan: dict, indices: list[str], escaneos: list[str]):
+        # Los operadores llegan como 'NodeUniqueIndexSeek@neo4j'; los detalles dicen qué índice usan
+        operador = plan.get("operatorType", "").split("@")[0]
+        detalles = plan.get("args", plan.get("arguments", {})).get("Details", "")
+        descripcion = f"{operador}({detalles})" if detalles else operador
+        if "Index" in operador:
+            indices.append(descripcion)
+        elif operador in OPERADORES_ESCANEO:
+            escaneos.append(descripcion)
+        for hijo in plan.get("children", []):
+            cls._recorrer_plan(hijo, indices, escaneos)
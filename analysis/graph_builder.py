@@ -1,14 +1,63 @@
 # analysis/graph_builder.py
 
+import os
 import pandas as pd
-from datetime import datetime
 from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable, CypherSyntaxError
+from neo4j.exceptions import ServiceUnavailable
+from analysis.esquema_grafo import GestorEsquema
+from analysis.preprocesado import (
+    preprocesar_grupos,
+    preprocesar_diputados,
+    registrar_invalidos,
+    convertir_fechas,
+    fechas_iso,
+    normalizar_provincias,
+)
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Consultas de importación: cada una recorre un lote de filas ($filas) con UNWIND
+CONSULTA_GRUPOS = """
+    UNWIND $filas AS fila
+    MERGE (l:Legislatura {numero: $legislatura})
+    MERGE (g:Grupo {nombre: fila.grupo})
+    MERGE (g)-[:EXISTE_EN]->(l)
+    MERGE (d:Diputado {nombre: fila.nombre})
+    MERGE (d)-[r:PERTENECE_A]->(g)
+    SET r.fecha_alta = CASE WHEN fila.fecha_alta <> "" THEN date(fila.fecha_alta) ELSE NULL END,
+        r.fecha_baja = CASE WHEN fila.fecha_baja <> "" THEN date(fila.fecha_baja) ELSE NULL END
+    MERGE (d)-[:PARTICIPA_EN]->(l)
+"""
+
+CONSULTA_REPRESENTACIONES = """
+    UNWIND $filas AS fila
+    MERGE (d:Diputado {nombre: fila.nombre})
+    MERGE (p:Provincia {nombre: fila.provincia})
+    MERGE (l:Legislatura {numero: $legislatura})
+    MERGE (d)-[:REPRESENTA_A]->(p)
+    MERGE (d)-[:PARTICIPA_EN]->(l)
+"""
+
+CONSULTA_SUPLENCIAS = """
+    UNWIND $filas AS fila
+    MERGE (d1:Diputado {nombre: fila.sustituto})
+    MERGE (d2:Diputado {nombre: fila.sustituido})
+    MERGE (d1)-[r:SUSTITUYE_A]->(d2)
+    SET r.fecha_alta = CASE WHEN fila.fecha_alta <> "" THEN date(fila.fecha_alta) ELSE NULL END,
+        r.fecha_baja = CASE WHEN fila.fecha_baja <> "" THEN date(fila.fecha_baja) ELSE NULL END
+"""
+
+CONSULTA_ACUERDOS = """
+    UNWIND $filas AS fila
+    MERGE (a:Diputado {nombre: fila.origen})
+    MERGE (b:Diputado {nombre: fila.destino})
+    MERGE (a)-[r:VOTA_IGUAL_QUE {legislatura: $legislatura}]->(b)
+    SET r.peso = fila.peso,
+        r.votaciones_comunes = fila.comunes
+"""
+
 
 class GraphBuilder:
     """
@@ -41,34 +90,41 @@ class GraphBuilder:
     def crear_indices(self):
         """
         Crea índices únicos en los nodos de tipo Diputado, Grupo, Provincia y Legislatura
-        para evitar duplicados en las cargas.
+        para evitar duplicados en las cargas, y los índices de las propiedades de relaciones
+        usadas en consultas temporales (ver analysis.esquema_grafo).
         """
-        constraints = [
-            ("Diputado", "nombre", "diputado_nombre_unico"),
-            ("Grupo", "nombre", "grupo_nombre_unico"),
-            ("Provincia", "nombre", "provincia_nombre_unico"),
-            ("Legislatura", "numero", "legislatura_numero_unico"),
-        ]
+        GestorEsquema(self.driver, self.database).crear()
 
-        with self.driver.session(database=self.database) as session:
-            for label, field, constraint in constraints:
-                try:
-                    session.run(f"""
-                        CREATE CONSTRAINT {constraint}
-                        IF NOT EXISTS
-                        FOR (n:{label}) REQUIRE n.{field} IS UNIQUE
-                    """)
-                    logger.info(f"Constraint '{constraint}' verificado para {label}.{field}")
-                except CypherSyntaxError as e:
-                    logger.error(f"Error creando constraint para {label}: {e}")
-
-    def importar_grupos(self, path_csv: str, legislatura: str):
+    def preparar_esquema(self, espera: int = 60) -> list[dict]:
+        """
+        Asegura el esquema antes de importar: crea restricciones e índices, comprueba con SHOW INDEXES
+        que están en línea e informa de qué índices usa el plan de cada consulta de importación.
+
+        :param espera: Segundos máximos de espera a que los índices estén en línea.
+        :return: Informe de planes (consulta, indices, escaneos) de GestorEsquema.informe_planes.
+        """
+        esquema = GestorEsquema(self.driver, self.database)
+        esquema.asegurar(espera)
+        # EXPLAIN no ejecuta la consulta: basta con una fila de ejemplo para obtener el plan
+        fila = {"nombre": "", "grupo": "", "provincia": "", "sustituto": "", "sustituido": "",
+                "origen": "", "destino": "", "fecha_alta": "", "fecha_baja": "", "peso": 0.0, "comunes": 0}
+        return esquema.informe_planes({
+            "grupos": CONSULTA_GRUPOS,
+            "representaciones": CONSULTA_REPRESENTACIONES,
+            "suplencias": CONSULTA_SUPLENCIAS,
+            "acuerdos": CONSULTA_ACUERDOS,
+        }, {"filas": [fila], "legislatura": ""})
+
+    def importar_grupos(self, path_csv: str, legislatura: str, tamano_lote: int = 1000):
         """
         Importa diputados y su relación con grupos parlamentarios desde un CSV.
+        Las filas se envían en lotes con UNWIND, cada lote en su propia transacción, en lugar de una
+        consulta por fila.
 
         :param path_csv: Ruta al archivo CSV que contiene columnas:
                          nombre, grupo_parlamentario, fecha_alta, fecha_baja
         :param legislatura: Número de legislatura a asociar (ej. '15')
+        :param tamano_lote: Número de filas por transacción.
         """
         logger.info(f"Path csv: {path_csv}")
         df = pd.read_csv(path_csv)
@@ -76,35 +132,30 @@ class GraphBuilder:
         if not required_columns.issubset(df.columns):
             raise ValueError(f"Faltan columnas requeridas en el CSV: {required_columns}")
 
-        df = df.fillna("")
+        df, invalidos = preprocesar_grupos(df)
+        registrar_invalidos(invalidos, path_csv)
+        filas = pd.DataFrame({
+            "nombre": df["nombre"],
+            "grupo": df["grupo_parlamentario"].astype(str),
+            "fecha_alta": fechas_iso(df["fecha_alta"]),
+            "fecha_baja": fechas_iso(df["fecha_baja"]),
+        }).to_dict("records")
 
         with self.driver.session(database=self.database) as session:
-            for _, row in df.iterrows():
-                try:
-                    session.run("""
-                        MERGE (l:Legislatura {numero: $legislatura})
-                        MERGE (g:Grupo {nombre: $grupo})
-                        MERGE (g)-[:EXISTE_EN]->(l)
-                        MERGE (d:Diputado {nombre: $nombre})
-                        MERGE (d)-[r:PERTENECE_A]->(g)
-                        SET r.fecha_alta = date($fecha_alta),
-                            r.fecha_baja = CASE WHEN $fecha_baja <> "" THEN date($fecha_baja) ELSE NULL END
-                        MERGE (d)-[:PARTICIPA_EN]->(l)
-                    """, nombre=row["nombre"],
-                                grupo=row["grupo_parlamentario"],
-                                fecha_alta=self.formatear_fecha(row["fecha_alta"]),
-                                fecha_baja=self.formatear_fecha(row["fecha_baja"]),
-                                legislatura=legislatura)
-                except Exception as e:
-                    logger.warning(f"Error procesando fila {row.to_dict()}: {e}")
-
-    def importar_diputados(self, path_csv: str, legislatura: str):
+            importadas = self._escribir_por_lotes(session, CONSULTA_GRUPOS, filas, tamano_lote, "grupos",
+                                                  legislatura=legislatura)
+        logger.info(f"{importadas} de {len(filas)} filas de grupos importadas para la legislatura {legislatura}")
+
+    def importar_diputados(self, path_csv: str, legislatura: str, tamano_lote: int = 1000):
         """
         Importa relaciones de representación y suplencias entre diputados desde un CSV.
+        Primero se separan las filas con provincia y las filas con suplencia, y cada grupo se envía
+        en lotes con UNWIND, cada lote en su propia transacción.
 
         :param path_csv: Ruta al archivo CSV que contiene columnas como:
                          nombre, provincia, sustituye_a, fecha_alta_suplencia, fecha_baja_suplencia
         :param legislatura: Número de legislatura a asociar (ej. '15')
+        :param tamano_lote: Número de filas por transacción.
         """
         df = pd.read_csv(path_csv)
         required_columns = {
@@ -118,67 +169,206 @@ class GraphBuilder:
         if not required_columns.issubset(df.columns):
             raise ValueError(f"Faltan columnas requeridas en el CSV: {required_columns}")
 
-        df = df.fillna("")
+        df, invalidos = preprocesar_diputados(df)
+        registrar_invalidos(invalidos, path_csv)
 
+        # Relaciones REPRESENTA_A y con Legislatura: filas con provincia
+        representaciones = []
+        if legislatura:
+            df_representaciones = df[df["provincia"] != ""]
+            representaciones = pd.DataFrame({
+                "nombre": df_representaciones["nombre"],
+                "provincia": df_representaciones["provincia"].astype(str),
+            }).to_dict("records")
+
+        # Relaciones de suplencia: filas con sustituye_a
+        df_suplencias = df[df["sustituye_a"] != ""]
+        suplencias = pd.DataFrame({
+            "sustituto": df_suplencias["nombre"],
+            "sustituido": df_suplencias["sustituye_a"],
+            "fecha_alta": fechas_iso(df_suplencias["fecha_alta_suplencia"]),
+            "fecha_baja": fechas_iso(df_suplencias["fecha_baja_suplencia"]),
+        }).to_dict("records")
+
+        with self.driver.session(database=self.database) as session:
+            importadas = self._escribir_por_lotes(session, CONSULTA_REPRESENTACIONES, representaciones, tamano_lote,
+                                                  "representaciones", legislatura=legislatura)
+            logger.info(f"{importadas} de {len(representaciones)} relaciones REPRESENTA_A importadas")
+
+            importadas = self._escribir_por_lotes(session, CONSULTA_SUPLENCIAS, suplencias, tamano_lote, "suplencias")
+            logger.info(f"{importadas} de {len(suplencias)} relaciones SUSTITUYE_A importadas")
+
+    def importar_acuerdos(self, df_aristas: pd.DataFrame, legislatura: str, tamano_lote: int = 1000):
+        """
+        Crea relaciones VOTA_IGUAL_QUE entre diputados a partir de las aristas de acuerdo de la matriz de votos.
+        Las aristas se envían en lotes con UNWIND, ya que una legislatura genera decenas de miles de pares.
+
+        :param df_aristas: DataFrame con columnas origen, destino, peso y votaciones_comunes.
+        :param legislatura: Número de legislatura a asociar (ej. '15')
+        :param tamano_lote: Número de aristas por transacción.
+        """
+        required_columns = {"origen", "destino", "peso", "votaciones_comunes"}
+        if not required_columns.issubset(df_aristas.columns):
+            raise ValueError(f"Faltan columnas requeridas en las aristas: {required_columns}")
+
+        filas = [
+            {"origen": r.origen, "destino": r.destino, "peso": float(r.peso), "comunes": int(r.votaciones_comunes)}
+            for r in df_aristas.itertuples(index=False)
+        ]
         with self.driver.session(database=self.database) as session:
-            for _, row in df.iterrows():
-                nombre = row.get("nombre")
-                provincia = self.normalizar_provincia(row.get("provincia", ""))
-
-                # Crear relación REPRESENTA_A y con Legislatura
-                if nombre and provincia and legislatura:
-                    try:
-                        session.run("""
-                            MERGE (d:Diputado {nombre: $nombre})
-                            MERGE (p:Provincia {nombre: $provincia})
-                            MERGE (l:Legislatura {numero: $legislatura})
-                            MERGE (d)-[:REPRESENTA_A]->(p)
-                            MERGE (d)-[:PARTICIPA_EN]->(l)
-                        """, nombre=nombre, provincia=provincia, legislatura=legislatura)
-                    except Exception as e:
-                        logger.warning(f"Error creando relación REPRESENTA_A: {e}")
-
-                # Crear relación de suplencia (si hay datos)
-                sustituido = row.get("sustituye_a", "")
-                if nombre and sustituido:
-                    try:
-                        session.run("""
-                            MERGE (d1:Diputado {nombre: $sustituto})
-                            MERGE (d2:Diputado {nombre: $sustituido})
-                            MERGE (d1)-[r:SUSTITUYE_A]->(d2)
-                            SET r.fecha_alta = date($fecha_alta),
-                                r.fecha_baja = CASE WHEN $fecha_baja <> "" THEN date($fecha_baja) ELSE NULL END
-                        """, sustituto=nombre,
-                                    sustituido=sustituido,
-                                    fecha_alta=self.formatear_fecha(row.get("fecha_alta_suplencia", "")),
-                                    fecha_baja=self.formatear_fecha(row.get("fecha_baja_suplencia", "")))
-                    except Exception as e:
-                        logger.warning(f"Error creando suplencia: {e}")
+            importadas = self._escribir_por_lotes(session, CONSULTA_ACUERDOS, filas, tamano_lote, "acuerdos",
+                                                  legislatura=legislatura)
+        logger.info(f"{importadas} de {len(filas)} relaciones VOTA_IGUAL_QUE importadas "
+                    f"para la legislatura {legislatura}")
+
+    @classmethod
+    def exportar_admin_import(cls, directorio_salida: str, csv_grupos: dict[str, str],
+                              csv_diputados: dict[str, str]) -> dict[str, int]:
+        """
+        Exporta los CSV de grupos y diputados de varias legislaturas a los CSV de nodos y relaciones
+        de 'neo4j-admin database import', para reconstruir el grafo completo sin transacciones.
+        No necesita conexión con Neo4j. Los nodos y relaciones se deduplican con el mismo criterio
+        que los MERGE de importar_grupos e importar_diputados: si una relación aparece varias veces,
+        se conservan las fechas de la última legislatura.
+
+        :param directorio_salida: Directorio donde se escriben los CSV (p. ej. 'neo4j_import').
+        :param csv_grupos: Ruta del grupos.csv de cada legislatura, por número de legislatura.
+        :param csv_diputados: Ruta del diputados.csv de cada legislatura, por número de legislatura.
+        :return: Número de filas escritas en cada archivo, por nombre de archivo.
+        """
+        grupos = cls._leer_legislaturas(csv_grupos, preprocesar_grupos)
+        diputados = cls._leer_legislaturas(csv_diputados, preprocesar_diputados)
+        representaciones = diputados[diputados["provincia"] != ""]
+        suplencias = diputados[diputados["sustituye_a"] != ""]
+
+        nodos = {
+            "Diputado": pd.concat([grupos["nombre"], diputados["nombre"], suplencias["sustituye_a"]]),
+            "Grupo": grupos["grupo_parlamentario"].astype(str),
+            "Provincia": representaciones["provincia"].astype(str),
+            "Legislatura": pd.concat([grupos["legislatura"], representaciones["legislatura"]]),
+        }
+        relaciones = {
+            "PERTENECE_A": ("Diputado", "Grupo", pd.DataFrame({
+                "inicio": grupos["nombre"], "fin": grupos["grupo_parlamentario"].astype(str),
+                "fecha_alta:date": fechas_iso(grupos["fecha_alta"]),
+                "fecha_baja:date": fechas_iso(grupos["fecha_baja"]),
+            })),
+            "EXISTE_EN": ("Grupo", "Legislatura", pd.DataFrame({
+                "inicio": grupos["grupo_parlamentario"].astype(str), "fin": grupos["legislatura"],
+            })),
+            "PARTICIPA_EN": ("Diputado", "Legislatura", pd.DataFrame({
+                "inicio": pd.concat([grupos["nombre"], representaciones["nombre"]]),
+                "fin": pd.concat([grupos["legislatura"], representaciones["legislatura"]]),
+            })),
+            "REPRESENTA_A": ("Diputado", "Provincia", pd.DataFrame({
+                "inicio": representaciones["nombre"], "fin": representaciones["provincia"].astype(str),
+            })),
+            "SUSTITUYE_A": ("Diputado", "Diputado", pd.DataFrame({
+                "inicio": suplencias["nombre"], "fin": suplencias["sustituye_a"],
+                "fecha_alta:date": fechas_iso(suplencias["fecha_alta_suplencia"]),
+                "fecha_baja:date": fechas_iso(suplencias["fecha_baja_suplencia"]),
+            })),
+        }
+
+        os.makedirs(directorio_salida, exist_ok=True)
+        filas, argumentos = {}, []
+        for etiqueta, valores in nodos.items():
+            propiedad = "numero" if etiqueta == "Legislatura" else "nombre"
+            df = pd.DataFrame({f"{propiedad}:ID({etiqueta})": valores.drop_duplicates(), ":LABEL": etiqueta})
+            archivo = f"nodos_{etiqueta.lower()}.csv"
+            filas[archivo] = cls._escribir_admin_import(df, directorio_salida, archivo)
+            argumentos.append(f"--nodes={os.path.join(directorio_salida, archivo)}")
+        for tipo, (origen, destino, df) in relaciones.items():
+            # Como MERGE (a)-[r:TIPO]->(b) seguido de SET: una relación por par, con las últimas propiedades
+            df = df.drop_duplicates(subset=["inicio", "fin"], keep="last").rename(columns={
+                "inicio": f":START_ID({origen})", "fin": f":END_ID({destino})",
+            })
+            df[":TYPE"] = tipo
+            archivo = f"relaciones_{tipo.lower()}.csv"
+            filas[archivo] = cls._escribir_admin_import(df, directorio_salida, archivo)
+            argumentos.append(f"--relationships={os.path.join(directorio_salida, archivo)}")
+
+        logger.info(f"Exportación para neo4j-admin completada en {directorio_salida}: {filas}")
+        logger.info(f"Para cargarla: neo4j-admin database import full {' '.join(argumentos)} <base de datos>")
+        return filas
+
+    @staticmethod
+    def _leer_legislaturas(rutas: dict[str, str], preprocesar) -> pd.DataFrame:
+        # Lee y limpia el CSV de cada legislatura y los une, en el orden de las legislaturas
+        partes = []
+        for legislatura, ruta in rutas.items():
+            if not os.path.exists(ruta):
+                logger.warning(f"No existe {ruta}: se omite la legislatura {legislatura}")
+                continue
+            df, invalidos = preprocesar(pd.read_csv(ruta, dtype=str, keep_default_na=False))
+            registrar_invalidos(invalidos, ruta)
+            partes.append(df.assign(legislatura=str(legislatura)))
+        if not partes:
+            vacio = pd.DataFrame(columns=["nombre", "grupo_parlamentario", "fecha_alta", "fecha_baja", "provincia",
+                                          "sustituye_a", "fecha_alta_suplencia", "fecha_baja_suplencia"])
+            return preprocesar(vacio)[0].assign(legislatura="")
+        return pd.concat(partes, ignore_index=True)
+
+    @staticmethod
+    def _escribir_admin_import(df: pd.DataFrame, directorio: str, archivo: str) -> int:
+        df.to_csv(os.path.join(directorio, archivo), index=False)
+        return len(df)
+
+    @classmethod
+    def _escribir_por_lotes(cls, session, consulta: str, filas: list[dict], tamano_lote: int,
+                            descripcion: str, **parametros) -> int:
+        """
+        Ejecuta una consulta UNWIND $filas en lotes, cada uno en una transacción gestionada por el driver
+        (execute_write, que la reintenta ante errores transitorios). Un lote fallido se deshace entero
+        y no detiene el resto.
+
+        :param session: Sesión de Neo4j abierta.
+        :param consulta: Consulta Cypher que recorre $filas.
+        :param filas: Parámetros de cada fila.
+        :param tamano_lote: Número de filas por transacción.
+        :param descripcion: Qué se importa, para los mensajes de log.
+        :param parametros: Parámetros comunes a todas las filas (p. ej. la legislatura).
+        :return: Número de filas importadas.
+        """
+        importadas = 0
+        for inicio in range(0, len(filas), tamano_lote):
+            lote = filas[inicio:inicio + tamano_lote]
+            try:
+                session.execute_write(cls._ejecutar_lote, consulta, lote, parametros)
+                importadas += len(lote)
+            except Exception as e:
+                logger.warning(f"Error importando lote de {descripcion} ({inicio}-{inicio + len(lote)}): {e}")
+        return importadas
+
+    @staticmethod
+    def _ejecutar_lote(tx, consulta: str, filas: list[dict], parametros: dict):
+        tx.run(consulta, filas=filas, **parametros).consume()
 
     @staticmethod
     def formatear_fecha(fecha: str) -> str:
         """
         Convierte una fecha en formato DD/MM/YYYY a YYYY-MM-DD para Neo4j.
+        Para columnas completas, usar convertir_fechas y fechas_iso de analysis.preprocesado.
 
         :param fecha: Fecha como string
         :return: Fecha en formato compatible con Cypher
         """
         if not fecha or pd.isna(fecha):
             return ""
-        try:
-            return datetime.strptime(fecha, "%d/%m/%Y").strftime("%Y-%m-%d")
-        except ValueError:
+        convertida = fechas_iso(convertir_fechas(pd.Series([fecha])))[0]
+        if not convertida:
             logger.warning(f"Fecha inválida: {fecha}")
-            return ""
+        return convertida
 
     @staticmethod
     def normalizar_provincia(texto: str) -> str:
         """
         Elimina el prefijo 'Diputado por' o 'Diputada por' para extraer el nombre de la provincia.
+        Para columnas completas, usar normalizar_provincias de analysis.preprocesado.
 
         :param texto: Texto que contiene la provincia
         :return: Nombre limpio de la provincia
         """
         if isinstance(texto, str):
-            return texto.replace("Diputado por ", "").replace("Diputada por ", "").strip()
+            return normalizar_provincias(pd.Series([texto]))[0]
         return texto
@@ -0,0 +1,311 @@
+# analysis/indice_textual.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import unicodedata
+from array import array
+from typing import Optional
+from analysis.parser_intervenciones import parsear_archivo, legislatura_de_cve
+from scraping.utils.almacenamiento import abrir_almacen
+import logging
+logger = logging.getLogger(__name__)
+
+REGEX_TOKEN = re.compile(r"\w+")
+
+# Frases entre comillas o términos sueltos: '"estado de alarma" vivienda'
+REGEX_CONSULTA = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def normalizar(texto: str) -> str:
+    """Pasa un texto a minúsculas y sin tildes, para que 'Sesión' y 'sesion' coincidan."""
+    descompuesto = unicodedata.normalize("NFD", (texto or "").lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> list[str]:
+    """
+    Divide un texto en términos normalizados.
+
+    :param texto: Texto a tokenizar.
+    :return: Lista de términos en el orden en que aparecen.
+    """
+    return REGEX_TOKEN.findall(normalizar(texto))
+
+
+def hash_archivo(ruta: str) -> str:
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques."""
+    sha256 = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(bloque)
+    return sha256.hexdigest()
+
+
+class IndiceTextual:
+    """
+    Índice invertido en SQLite sobre las intervenciones de los plenos.
+    Cada posting guarda, para un término y una intervención, las posiciones en las que aparece,
+    lo que permite consultas por frase. La intervención conserva orador, cargo, CVE y fecha.
+    El índice se actualiza de forma incremental: solo se reindexan los diarios nuevos o modificados.
+    """
+
+    def __init__(self, ruta: str):
+        """
+        Abre (o crea) el índice.
+
+        :param ruta: Ruta del archivo SQLite (p. ej. 'indice/intervenciones.sqlite').
+        """
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta)
+        # LIKE de SQLite solo ignora mayúsculas en ASCII; el filtro por orador usa la misma normalización
+        self._conexion.create_function("normalizar", 1, normalizar, deterministic=True)
+        self._conexion.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS documentos (
+                cve TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                legislatura TEXT,
+                tamano INTEGER,
+                mtime_ns INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS intervenciones (
+                id INTEGER PRIMARY KEY,
+                cve TEXT NOT NULL,
+                fecha TEXT,
+                orden INTEGER,
+                orador TEXT,
+                cargo TEXT,
+                texto TEXT
+            );
+            CREATE INDEX IF NOT EXISTS intervenciones_cve ON intervenciones (cve);
+            CREATE TABLE IF NOT EXISTS terminos (
+                id INTEGER PRIMARY KEY,
+                termino TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                termino_id INTEGER NOT NULL,
+                intervencion_id INTEGER NOT NULL,
+                posiciones BLOB NOT NULL,
+                PRIMARY KEY (termino_id, intervencion_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_intervencion ON postings (intervencion_id);
+        """)
+        # Índices creados antes de guardar el tamaño y la fecha de modificación de cada diario
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(documentos)")}
+        for columna in ("tamano", "mtime_ns"):
+            if columna not in columnas:
+                self._conexion.execute(f"ALTER TABLE documentos ADD COLUMN {columna} INTEGER")
+        self._conexion.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra la conexión con el índice."""
+        self._conexion.close()
+
+    def actualizar(self, directorio: str) -> int:
+        """
+        Indexa los diarios de un directorio que no estén en el índice o cuyo contenido haya cambiado,
+        y elimina del índice los diarios de esa legislatura que ya no están en el directorio.
+        Solo se calcula el hash de los archivos cuyo tamaño o fecha de modificación han cambiado.
+
+        :param directorio: Directorio de los diarios de una legislatura (p. ej. 'diarios_html/15').
+        :return: Número de diarios indexados.
+        """
+        almacen = abrir_almacen(directorio)
+        try:
+            rutas = {cve: almacen.localizar(cve) for cve in almacen.cves()}
+        finally:
+            almacen.close()
+        rutas = {cve: ruta for cve, ruta in rutas.items() if ruta}
+
+        self._eliminar_borrados(directorio, rutas.keys())
+        indexados = {
+            cve: (sha256, tamano, mtime_ns)
+            for cve, sha256, tamano, mtime_ns in self._conexion.execute(
+                "SELECT cve, sha256, tamano, mtime_ns FROM documentos")
+        }
+        nuevos = 0
+        for cve, ruta in sorted(rutas.items()):
+            estado = os.stat(ruta)
+            sha256_indexado, *metadatos = indexados.get(cve, (None, None, None))
+            if metadatos == [estado.st_size, estado.st_mtime_ns]:
+                continue
+            sha256 = hash_archivo(ruta)
+            if sha256 == sha256_indexado:
+                # Mismo contenido con otra fecha (p. ej. copiado o restaurado): basta con actualizar los metadatos
+                with self._conexion:
+                    self._conexion.execute(
+                        "UPDATE documentos SET tamano = ?, mtime_ns = ? WHERE cve = ?",
+                        (estado.st_size, estado.st_mtime_ns, cve)
+                    )
+                continue
+            self.indexar_diario(cve, parsear_archivo((cve, ruta)), sha256, estado.st_size, estado.st_mtime_ns)
+            nuevos += 1
+        logger.info(f"Índice actualizado: {nuevos} diarios indexados de {directorio}")
+        return nuevos
+
+    def _eliminar_borrados(self, directorio: str, presentes):
+        """
+        Elimina del índice los diarios cuyo archivo ya no existe. El índice comparte varias legislaturas,
+        así que solo se consideran las del directorio (la del nombre del directorio si está vacío).
+        """
+        presentes = set(presentes)
+        legislaturas = ({legislatura_de_cve(cve) for cve in presentes}
+                        or {os.path.basename(os.path.normpath(directorio))})
+        marcadores = ",".join("?" * len(legislaturas))
+        borrados = [cve for (cve,) in self._conexion.execute(
+            f"SELECT cve FROM documentos WHERE legislatura IN ({marcadores})", list(legislaturas))
+            if cve not in presentes]
+        if not borrados:
+            return
+        with self._conexion:
+            for cve in borrados:
+                self._eliminar_diario(cve)
+                self._conexion.execute("DELETE FROM documentos WHERE cve = ?", (cve,))
+        logger.info(f"Eliminados del índice {len(borrados)} diarios que ya no están en {directorio}")
+
+    def indexar_diario(self, cve: str, intervenciones: list[dict], sha256: str,
+                       tamano: Optional[int] = None, mtime_ns: Optional[int] = None):
+        """
+        Indexa (o reindexa) las intervenciones de un diario en una única transacción.
+
+        :param cve: Código del diario.
+        :param intervenciones: Intervenciones devueltas por el parser.
+        :param sha256: Hash del archivo del diario, para detectar cambios en próximas actualizaciones.
+        :param tamano: Tamaño del archivo en bytes (sin él, la próxima actualización vuelve a calcular el hash).
+        :param mtime_ns: Fecha de modificación del archivo en nanosegundos.
+        """
+        with self._conexion:
+            self._eliminar_diario(cve)
+            for intervencion in intervenciones:
+                cursor = self._conexion.execute(
+                    "INSERT INTO intervenciones (cve, fecha, orden, orador, cargo, texto) VALUES (?, ?, ?, ?, ?, ?)",
+                    (cve, intervencion["fecha"], intervencion["orden"], intervencion["orador"],
+                     intervencion["cargo"], intervencion["texto"])
+                )
+                posiciones = {}
+                for posicion, termino in enumerate(tokenizar(intervencion["texto"])):
+                    posiciones.setdefault(termino, array("I")).append(posicion)
+                ids = self._ids_terminos(posiciones.keys())
+                self._conexion.executemany(
+                    "INSERT INTO postings (termino_id, intervencion_id, posiciones) VALUES (?, ?, ?)",
+                    [(ids[t], cursor.lastrowid, p.tobytes()) for t, p in posiciones.items()]
+                )
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO documentos (cve, sha256, legislatura, tamano, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                (cve, sha256, legislatura_de_cve(cve), tamano, mtime_ns)
+            )
+
+    def _eliminar_diario(self, cve: str):
+        self._conexion.execute(
+            "DELETE FROM postings WHERE intervencion_id IN (SELECT id FROM intervenciones WHERE cve = ?)", (cve,)
+        )
+        self._conexion.execute("DELETE FROM intervenciones WHERE cve = ?", (cve,))
+
+    def _ids_terminos(self, terminos) -> dict[str, int]:
+        terminos = list(terminos)
+        self._conexion.executemany("INSERT OR IGNORE INTO terminos (termino) VALUES (?)", [(t,) for t in terminos])
+        return {t: self._id_termino(t) for t in terminos}
+
+    def _id_termino(self, termino: str) -> Optional[int]:
+        fila = self._conexion.execute("SELECT id FROM terminos WHERE termino = ?", (termino,)).fetchone()
+        return fila[0] if fila else None
+
+    def _postings_candidatos(self, termino_id: int) -> dict[int, array]:
+        """Devuelve {intervencion_id: posiciones} de un término, solo para las intervenciones candidatas."""
+        resultado = {}
+        for intervencion_id, blob in self._conexion.execute(
+                "SELECT p.intervencion_id, p.posiciones FROM temp.candidatos c "
+                "JOIN postings p ON p.termino_id = ? AND p.intervencion_id = c.id", (termino_id,)):
+            posiciones = array("I")
+            posiciones.frombytes(blob)
+            resultado[intervencion_id] = posiciones
+        return resultado
+
+    def _seleccionar_candidatos(self, termino_ids: list[int], orador: Optional[str]):
+        """
+        Guarda en la tabla temporal 'candidatos' las intervenciones que contienen todos los términos
+        (y del orador indicado). La intersección se hace en SQLite: se recorren los postings del término
+        menos frecuente y el resto se comprueban por clave primaria, sin cargar sus posiciones.
+        """
+        marcadores = ",".join("?" * len(termino_ids))
+        frecuencias = dict(self._conexion.execute(
+            f"SELECT termino_id, COUNT(*) FROM postings WHERE termino_id IN ({marcadores}) GROUP BY termino_id",
+            termino_ids))
+        primero, *resto = sorted(termino_ids, key=lambda t: frecuencias.get(t, 0))
+
+        # CROSS JOIN fija el orden de recorrido: SQLite empieza siempre por el término menos frecuente
+        sql = "INSERT INTO temp.candidatos (id) SELECT p0.intervencion_id FROM postings p0"
+        for n in range(1, len(resto) + 1):
+            sql += f" CROSS JOIN postings p{n} ON p{n}.termino_id = ? AND p{n}.intervencion_id = p0.intervencion_id"
+        parametros = list(resto)
+        if orador:
+            sql += " CROSS JOIN intervenciones i ON i.id = p0.intervencion_id"
+        sql += " WHERE p0.termino_id = ?"
+        parametros.append(primero)
+        if orador:
+            sql += " AND normalizar(i.orador) LIKE ?"
+            parametros.append(f"%{normalizar(orador)}%")
+        self._conexion.execute("CREATE TEMP TABLE IF NOT EXISTS candidatos (id INTEGER PRIMARY KEY)")
+        self._conexion.execute("DELETE FROM temp.candidatos")
+        self._conexion.execute(sql, parametros)
+
+    def buscar(self, consulta: str, orador: Optional[str] = None, limite: int = 50) -> list[dict]:
+        """
+        Busca intervenciones que contengan todos los términos y frases de la consulta.
+
+        :param consulta: Términos sueltos y/o frases entre comillas (p. ej. '"estado de alarma" prórroga').
+        :param orador: Filtra por orador (coincidencia parcial, sin distinguir mayúsculas).
+        :param limite: Máximo de resultados.
+        :return: Lista de diccionarios con cve, fecha, orden, orador, cargo y texto,
+                 ordenados de la sesión más reciente a la más antigua.
+        """
+        frases = []
+        for frase, termino in REGEX_CONSULTA.findall(consulta):
+            tokens = tokenizar(frase or termino)
+            if tokens:
+                frases.append(tokens)
+        if not frases:
+            return []
+
+        ids = {t: self._id_termino(t) for t in {t for frase in frases for t in frase}}
+        if None in ids.values():
+            return []
+
+        with self._conexion:
+            self._seleccionar_candidatos(list(ids.values()), orador)
+            # Las posiciones solo se leen para comprobar frases, y solo las de las intervenciones candidatas
+            frases_largas = [frase for frase in frases if len(frase) > 1]
+            if frases_largas:
+                postings = {t: self._postings_candidatos(ids[t]) for t in {t for frase in frases_largas for t in frase}}
+                descartados = [(i,) for i in postings[frases_largas[0][0]]
+                               if not all(self._contiene_frase(frase, postings, i) for frase in frases_largas)]
+                self._conexion.executemany("DELETE FROM temp.candidatos WHERE id = ?", descartados)
+
+            cursor = self._conexion.execute(
+                "SELECT i.cve, i.fecha, i.orden, i.orador, i.cargo, i.texto FROM intervenciones i "
+                "JOIN temp.candidatos c ON c.id = i.id ORDER BY i.fecha DESC, i.cve DESC, i.orden LIMIT ?",
+                (limite,)
+            )
+            columnas = [c[0] for c in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    @staticmethod
+    def _contiene_frase(frase: list[str], postings: dict, intervencion_id: int) -> bool:
+        """Comprueba si los términos de la frase aparecen en posiciones consecutivas."""
+        siguientes = [set(postings[t][intervencion_id]) for t in frase[1:]]
+        return any(
+            all(inicio + desplazamiento + 1 in posiciones for desplazamiento, posiciones in enumerate(siguientes))
+            for inicio in postings[frase[0]][intervencion_id]
+        )
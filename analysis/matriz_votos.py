@@ -0,0 +1,211 @@
+# analysis/matriz_votos.py
+
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+import logging
+logger = logging.getLogger(__name__)
+
+# Códigos de la matriz: 0 = no vota (o no era diputado en esa votación)
+NO_VOTA, SI, NO, ABSTENCION = 0, 1, 2, 3
+OPCIONES = (SI, NO, ABSTENCION)
+CODIGOS_VOTO = {"sí": SI, "si": SI, "no": NO, "abstención": ABSTENCION, "abstencion": ABSTENCION}
+
+
+class MatrizVotos:
+    """
+    Matriz diputado × votación de una legislatura respaldada por NumPy.
+    Todos los cálculos (acuerdo entre pares, índice de Rice por grupo y rebeldías)
+    se hacen de una pasada con operaciones vectorizadas sobre la legislatura completa.
+    """
+
+    def __init__(self, diputados: list[str], votaciones: pd.DataFrame, votos: np.ndarray, grupos: list[str],
+                 grupo_por_voto: np.ndarray):
+        """
+        :param diputados: Nombres de los diputados (filas de la matriz).
+        :param votaciones: DataFrame con una fila por votación (columnas), con id, sesion, numero, fecha y titulo.
+        :param votos: Matriz int8 (diputados × votaciones) con los códigos NO_VOTA, SI, NO, ABSTENCION.
+        :param grupos: Nombres de los grupos parlamentarios.
+        :param grupo_por_voto: Matriz int16 (diputados × votaciones) con el índice del grupo del diputado
+                               en cada votación (-1 si no votó), para respetar los cambios de grupo.
+        """
+        self.diputados = diputados
+        self.votaciones = votaciones
+        self.votos = votos
+        self.grupos = grupos
+        self.grupo_por_voto = grupo_por_voto
+
+    @classmethod
+    def desde_directorio(cls, directorio: str) -> "MatrizVotos":
+        """
+        Construye la matriz a partir de los JSON de votaciones descargados.
+
+        :param directorio: Directorio con los JSON (p. ej. 'votaciones/15').
+        :return: Instancia de MatrizVotos.
+        """
+        registros = []
+        for ruta in sorted(glob.glob(os.path.join(directorio, "*.json"))):
+            try:
+                with open(ruta, encoding="utf-8") as f:
+                    registros.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Error leyendo la votación {ruta}: {e}")
+        return cls.desde_registros(registros)
+
+    @classmethod
+    def desde_registros(cls, registros: list[dict]) -> "MatrizVotos":
+        """
+        Construye la matriz a partir de votaciones ya cargadas con el formato de datos abiertos del Congreso:
+        {"informacion": {"sesion", "numeroVotacion", "fecha", "titulo"}, "votaciones": [{"diputado", "grupo", "voto"}]}
+
+        :param registros: Lista de votaciones.
+        :return: Instancia de MatrizVotos.
+        """
+        info = []
+        filas, columnas, codigos, grupos_voto = [], [], [], []
+        indice_diputado, indice_grupo = {}, {}
+        for columna, registro in enumerate(registros):
+            datos = registro.get("informacion", {})
+            info.append({
+                "id": f"{datos.get('sesion', '')}-{datos.get('numeroVotacion', columna + 1)}",
+                "sesion": datos.get("sesion"),
+                "numero": datos.get("numeroVotacion"),
+                "fecha": datos.get("fecha", ""),
+                "titulo": datos.get("titulo") or datos.get("textoExpediente", ""),
+            })
+            for voto in registro.get("votaciones", []):
+                codigo = CODIGOS_VOTO.get(str(voto.get("voto", "")).strip().lower(), NO_VOTA)
+                if codigo == NO_VOTA:
+                    continue
+                filas.append(indice_diputado.setdefault(voto["diputado"], len(indice_diputado)))
+                grupos_voto.append(indice_grupo.setdefault(voto.get("grupo", ""), len(indice_grupo)))
+                columnas.append(columna)
+                codigos.append(codigo)
+
+        votos = np.zeros((len(indice_diputado), len(registros)), dtype=np.int8)
+        grupo_por_voto = np.full(votos.shape, -1, dtype=np.int16)
+        votos[filas, columnas] = codigos
+        grupo_por_voto[filas, columnas] = grupos_voto
+        logger.info(f"Matriz de votos: {votos.shape[0]} diputados × {votos.shape[1]} votaciones")
+        return cls(list(indice_diputado), pd.DataFrame(info), votos, list(indice_grupo), grupo_por_voto)
+
+    def acuerdo(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula el acuerdo entre todos los pares de diputados: proporción de votaciones en las que
+        ambos votaron y lo hicieron igual.
+
+        :return: Tupla (acuerdo, comunes): matriz float (NaN si no coincidieron en ninguna votación)
+                 y matriz con el número de votaciones en las que votaron ambos.
+        """
+        coincidencias = np.zeros((len(self.diputados),) * 2, dtype=np.float64)
+        for opcion in OPCIONES:
+            marca = (self.votos == opcion).astype(np.float32)
+            coincidencias += marca @ marca.T
+        presentes = (self.votos != NO_VOTA).astype(np.float32)
+        comunes = presentes @ presentes.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            acuerdo = np.where(comunes > 0, coincidencias / comunes, np.nan)
+        return acuerdo, comunes.astype(np.int64)
+
+    def _recuentos_por_grupo(self) -> np.ndarray:
+        """Devuelve un array (grupos × opciones × votaciones) con el número de votos de cada opción."""
+        recuentos = np.zeros((len(self.grupos), len(OPCIONES), self.votos.shape[1]), dtype=np.int64)
+        filas, columnas = np.nonzero(self.votos != NO_VOTA)
+        # Los códigos SI, NO y ABSTENCION son 1, 2 y 3: restando 1 se obtiene el índice de la opción
+        np.add.at(recuentos, (self.grupo_por_voto[filas, columnas], self.votos[filas, columnas] - 1, columnas), 1)
+        return recuentos
+
+    def indice_rice(self) -> pd.DataFrame:
+        """
+        Calcula la cohesión de cada grupo con el índice de Rice: |sí - no| / (sí + no) en cada votación,
+        promediado sobre las votaciones en las que el grupo votó sí o no.
+
+        :return: DataFrame con grupo, indice_rice y votaciones, ordenado de más a menos cohesionado.
+        """
+        recuentos = self._recuentos_por_grupo()
+        si, no = recuentos[:, 0], recuentos[:, 1]
+        total = si + no
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rice = np.where(total > 0, np.abs(si - no) / total, np.nan)
+        votadas = (total > 0).sum(axis=1)
+        medias = np.array([np.nanmean(r) if v else np.nan for r, v in zip(rice, votadas)])
+        df = pd.DataFrame({"grupo": self.grupos, "indice_rice": medias, "votaciones": votadas})
+        return df.sort_values("indice_rice", ascending=False, ignore_index=True)
+
+    def rebeldes(self) -> pd.DataFrame:
+        """
+        Detecta los votos en los que cada diputado se separó de la posición mayoritaria de su grupo.
+
+        :return: DataFrame con nombre, grupo (el último en el que votó), votos_emitidos, votos_rebeldes
+                 y tasa_rebeldia, ordenado de mayor a menor tasa.
+        """
+        if self.votos.size == 0:
+            return pd.DataFrame(columns=["nombre", "grupo", "votos_emitidos", "votos_rebeldes", "tasa_rebeldia"])
+        recuentos = self._recuentos_por_grupo()
+        # En caso de empate se toma como mayoritaria la primera opción (sí, no, abstención)
+        mayoria = np.array(OPCIONES, dtype=np.int8)[np.argmax(recuentos, axis=1)]  # grupos × votaciones
+        emitidos = self.votos != NO_VOTA
+        grupo = np.where(emitidos, self.grupo_por_voto, 0)
+        columnas = np.broadcast_to(np.arange(self.votos.shape[1]), self.votos.shape)
+        rebelde = emitidos & (self.votos != mayoria[grupo, columnas])
+
+        votos_emitidos = emitidos.sum(axis=1)
+        votos_rebeldes = rebelde.sum(axis=1)
+        # Último grupo con el que votó cada diputado
+        ultima = self.votos.shape[1] - 1 - np.argmax(emitidos[:, ::-1], axis=1)
+        ultimo_grupo = self.grupo_por_voto[np.arange(len(self.diputados)), ultima]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            tasa = np.where(votos_emitidos > 0, votos_rebeldes / votos_emitidos, 0.0)
+        df = pd.DataFrame({
+            "nombre": self.diputados,
+            "grupo": [self.grupos[g] if g >= 0 else "" for g in ultimo_grupo],
+            "votos_emitidos": votos_emitidos,
+            "votos_rebeldes": votos_rebeldes,
+            "tasa_rebeldia": tasa,
+        })
+        return df.sort_values(["tasa_rebeldia", "nombre"], ascending=[False, True], ignore_index=True)
+
+    def aristas_acuerdo(self, umbral: float = 0.9, min_comunes: int = 1) -> pd.DataFrame:
+        """
+        Devuelve los pares de diputados con un acuerdo igual o superior al umbral, para cargarlos
+        como relaciones VOTA_IGUAL_QUE.
+
+        :param umbral: Acuerdo mínimo (entre 0 y 1).
+        :param min_comunes: Mínimo de votaciones en común para considerar el par.
+        :return: DataFrame con origen, destino, peso y votaciones_comunes (cada par una sola vez).
+        """
+        acuerdo, comunes = self.acuerdo()
+        i, j = np.triu_indices(len(self.diputados), k=1)
+        seleccion = (comunes[i, j] >= min_comunes) & (np.nan_to_num(acuerdo[i, j], nan=-1.0) >= umbral)
+        i, j = i[seleccion], j[seleccion]
+        nombres = np.array(self.diputados, dtype=object)
+        return pd.DataFrame({
+            "origen": nombres[i],
+            "destino": nombres[j],
+            "peso": acuerdo[i, j].round(4),
+            "votaciones_comunes": comunes[i, j],
+        })
+
+    def exportar_npz(self, ruta: str):
+        """
+        Exporta la matriz de votos, la matriz de acuerdo y las etiquetas a un archivo .npz comprimido.
+
+        :param ruta: Ruta del archivo destino (p. ej. 'votaciones/15/matriz.npz').
+        """
+        acuerdo, comunes = self.acuerdo()
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        np.savez_compressed(
+            ruta,
+            votos=self.votos,
+            grupo_por_voto=self.grupo_por_voto,
+            acuerdo=acuerdo,
+            votaciones_comunes=comunes,
+            diputados=np.array(self.diputados, dtype=str),
+            grupos=np.array(self.grupos, dtype=str),
+            votaciones=self.votaciones["id"].to_numpy(dtype=str),
+        )
+        logger.info(f"Matriz de votos exportada a {ruta}")
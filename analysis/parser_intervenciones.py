@@ -0,0 +1,240 @@
+# analysis/parser_intervenciones.py
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import pandas as pd
+from lxml import etree
+from scraping.utils.almacenamiento import abrir_almacen, abrir_archivo
+import logging
+logger = logging.getLogger(__name__)
+
+COLUMNAS = ["legislatura", "cve", "fecha", "orden", "orador", "cargo", "texto", "anotaciones"]
+
+# Etiquetas cuyo texto se analiza; se recorren en streaming sin construir el árbol completo
+ETIQUETAS_TEXTO = ("p", "h1", "h2", "h3", "h4", "h5")
+
+# Letras mayúsculas de Latin-1 (incluye À È Ò Ï Ç... de los apellidos catalanes y gallegos)
+MAYUSCULAS = "A-ZÀ-ÖØ-Þ"
+
+# 'El señor SÁNCHEZ PÉREZ-CASTEJÓN (Presidente del Gobierno): Texto...' o 'La señora PRESIDENTA: Texto...'
+REGEX_ORADOR = re.compile(
+    r"^(?:El|La)\s+señor(?:a)?\s+"
+    rf"(?P<orador>[{MAYUSCULAS}][{MAYUSCULAS}·\s.'-]*?)\s*"
+    r"(?:\((?P<cargo>[^)]*)\))?\s*:\s*(?P<texto>.*)$",
+    re.DOTALL
+)
+
+# Cuando el encabezado es un cargo ('La señora MINISTRA DE HACIENDA (Montero Cuadrado)'),
+# el paréntesis contiene el nombre y no el cargo
+REGEX_CARGO = re.compile(r"^(?:VICE)?(?:PRESIDENT|MINISTR|SECRETARI|DEFENSOR)")
+
+# Acotaciones de la transcripción: '(Aplausos.)', '(Rumores.)', '(Pausa.)'. Se reconocen porque terminan
+# en punto, o por empezar como las acotaciones habituales si el punto falta; así los paréntesis del discurso
+# ('(Ley Orgánica 1/2024)', '(PNV)') se quedan en el texto
+ACOTACIONES = (
+    "Aplausos", "Rumores", "Risas", "Pausa", "Protestas", "Continúan", "Varios señores diputados",
+    "Varias señoras diputadas", "Un señor diputado", "Una señora diputada", "El señor", "La señora",
+)
+REGEX_ANOTACION = re.compile(
+    rf"\((?:(?P<con_punto>[{MAYUSCULAS}][^()]*?)\.|(?P<acotacion>(?:{'|'.join(ACOTACIONES)})[^().]*))\)"
+)
+
+REGEX_FECHA = re.compile(r"celebrada el (?:\w+,?\s+)?(\d{1,2}) de (\w+) de (\d{4})", re.IGNORECASE)
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12,
+}
+
+
+def legislatura_de_cve(cve: str) -> str:
+    """
+    Extrae el número de legislatura de un CVE.
+
+    :param cve: Código del diario (p. ej. 'DSCD-15-PL-1').
+    :return: Número de legislatura como texto (p. ej. '15'), o cadena vacía si no se reconoce.
+    """
+    partes = cve.split("-")
+    return partes[1] if len(partes) > 1 else ""
+
+
+def extraer_fecha(texto: str) -> Optional[str]:
+    """
+    Busca la fecha de la sesión en el texto de la cabecera del diario.
+
+    :param texto: Texto en el que buscar (p. ej. 'Sesión plenaria celebrada el miércoles 29 de noviembre de 2023').
+    :return: Fecha en formato ISO 'AAAA-MM-DD', o None si no se encuentra.
+    """
+    match = REGEX_FECHA.search(texto)
+    if not match:
+        return None
+    dia, mes, anio = match.groups()
+    numero_mes = MESES.get(mes.lower())
+    if numero_mes is None:
+        return None
+    return f"{int(anio):04d}-{numero_mes:02d}-{int(dia):02d}"
+
+
+def separar_orador_cargo(encabezado: str, parentesis: Optional[str]) -> tuple[str, str]:
+    """
+    Determina el nombre del orador y su cargo a partir del encabezado de la intervención.
+
+    :param encabezado: Texto en mayúsculas tras 'El señor'/'La señora' (p. ej. 'MINISTRA DE HACIENDA').
+    :param parentesis: Texto entre paréntesis, si lo hay (p. ej. 'Montero Cuadrado').
+    :return: Tupla (orador, cargo). Si no se conoce el nombre, el orador es el propio cargo.
+    """
+    encabezado = encabezado.strip()
+    parentesis = (parentesis or "").strip()
+    if REGEX_CARGO.match(encabezado):
+        return (parentesis or encabezado), encabezado
+    return encabezado, parentesis
+
+
+def separar_anotaciones(texto: str) -> tuple[str, list[str]]:
+    """
+    Separa las acotaciones entre paréntesis del texto de una intervención.
+
+    :param texto: Texto del párrafo.
+    :return: Tupla (texto sin acotaciones, lista de acotaciones).
+    """
+    anotaciones = [(m.group("con_punto") or m.group("acotacion")).strip() for m in REGEX_ANOTACION.finditer(texto)]
+    limpio = re.sub(r"\s{2,}", " ", REGEX_ANOTACION.sub("", texto)).strip()
+    return limpio, anotaciones
+
+
+def parsear_diario(flujo, cve: str) -> list[dict]:
+    """
+    Lee un diario en streaming con lxml y lo divide en intervenciones.
+    Los párrafos anteriores al primer orador (cabecera y orden del día) solo se usan para la fecha;
+    los párrafos sin orador se añaden a la intervención en curso.
+
+    :param flujo: Objeto tipo archivo en modo binario con el HTML del diario.
+    :param cve: Código del diario.
+    :return: Lista de diccionarios con las columnas de COLUMNAS.
+    """
+    legislatura = legislatura_de_cve(cve)
+    fecha = None
+    intervenciones = []
+    actual = None
+
+    for _, elemento in etree.iterparse(flujo, events=("end",), tag=ETIQUETAS_TEXTO, html=True,
+                                       recover=True, encoding="utf-8"):
+        texto = " ".join("".join(elemento.itertext()).split())
+        # Se libera el elemento ya leído para que la memoria no crezca con el tamaño del diario
+        elemento.clear()
+        if not texto:
+            continue
+        if fecha is None:
+            fecha = extraer_fecha(texto)
+
+        match = REGEX_ORADOR.match(texto)
+        if match:
+            orador, cargo = separar_orador_cargo(match.group("orador"), match.group("cargo"))
+            actual = {
+                "legislatura": legislatura,
+                "cve": cve,
+                "fecha": fecha,
+                "orden": len(intervenciones) + 1,
+                "orador": orador,
+                "cargo": cargo,
+                "texto": "",
+                "anotaciones": [],
+            }
+            intervenciones.append(actual)
+            texto = match.group("texto")
+        elif actual is None:
+            continue
+
+        limpio, anotaciones = separar_anotaciones(texto)
+        if limpio:
+            actual["texto"] = f"{actual['texto']}\n{limpio}" if actual["texto"] else limpio
+        actual["anotaciones"].extend(anotaciones)
+
+    return intervenciones
+
+
+def parsear_archivo(tarea: tuple[str, str]) -> list[dict]:
+    """
+    Parsea un diario guardado en disco. Es la unidad de trabajo de cada proceso.
+
+    :param tarea: Tupla (cve, ruta del archivo .html o .html.gz).
+    :return: Intervenciones del diario, o lista vacía si no se pudo leer.
+    """
+    cve, ruta = tarea
+    try:
+        with abrir_archivo(ruta) as flujo:
+            return parsear_diario(flujo, cve)
+    except Exception as e:
+        logger.error(f"Error parseando el diario {cve}: {e}")
+        return []
+
+
+def parsear_legislatura(directorio: str, num_procesos: Optional[int] = None) -> pd.DataFrame:
+    """
+    Parsea en paralelo todos los diarios de un directorio de legislatura.
+
+    :param directorio: Directorio de los diarios (p. ej. 'diarios_html/15'), en cualquier formato de almacenamiento.
+    :param num_procesos: Número de procesos (por defecto, todos los núcleos; 1 = sin pool).
+    :return: DataFrame con una fila por intervención y las columnas de COLUMNAS.
+    """
+    almacen = abrir_almacen(directorio)
+    try:
+        tareas = [(cve, almacen.localizar(cve)) for cve in almacen.cves()]
+    finally:
+        almacen.close()
+    tareas = [t for t in tareas if t[1]]
+    logger.info(f"Parseando {len(tareas)} diarios de {directorio}")
+
+    if num_procesos == 1:
+        resultados = map(parsear_archivo, tareas)
+        filas = [fila for resultado in resultados for fila in resultado]
+    else:
+        num_procesos = num_procesos or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=num_procesos) as pool:
+            # chunksize reduce el coste de comunicación entre procesos con muchos diarios pequeños
+            chunksize = max(1, len(tareas) // (num_procesos * 4))
+            filas = [fila for resultado in pool.map(parsear_archivo, tareas, chunksize=chunksize)
+                     for fila in resultado]
+
+    df = pd.DataFrame(filas, columns=COLUMNAS)
+    df["orden"] = df["orden"].astype("int64")
+    return df
+
+
+def exportar_parquet(df: pd.DataFrame, directorio_salida: str):
+    """
+    Escribe las intervenciones en Parquet particionado por legislatura
+    (directorio_salida/legislatura=15/...). Las particiones existentes se reemplazan.
+
+    :param df: DataFrame de intervenciones.
+    :param directorio_salida: Directorio raíz del dataset Parquet.
+    """
+    os.makedirs(directorio_salida, exist_ok=True)
+    df.to_parquet(
+        directorio_salida,
+        engine="pyarrow",
+        partition_cols=["legislatura"],
+        index=False,
+        existing_data_behavior="delete_matching"
+    )
+    logger.info(f"{len(df)} intervenciones exportadas a {directorio_salida}")
+
+
+def procesar_legislatura(directorio: str, directorio_salida: str, num_procesos: Optional[int] = None) -> int:
+    """
+    Parsea los diarios de una legislatura y exporta las intervenciones a Parquet.
+
+    :param directorio: Directorio de los diarios de la legislatura.
+    :param directorio_salida: Directorio raíz del dataset Parquet.
+    :param num_procesos: Número de procesos del pool.
+    :return: Número de intervenciones exportadas.
+    """
+    df = parsear_legislatura(directorio, num_procesos)
+    if df.empty:
+        logger.warning(f"No se encontraron intervenciones en {directorio}")
+        return 0
+    exportar_parquet(df, directorio_salida)
+    return len(df)
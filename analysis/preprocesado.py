@@ -0,0 +1,141 @@
+# analysis/preprocesado.py
+
+import pandas as pd
+import logging
+logger = logging.getLogger(__name__)
+
+FORMATO_FECHA = "%d/%m/%Y"
+
+# 'Diputado por Lugo' / 'Diputada por Cádiz' -> 'Lugo' / 'Cádiz'
+REGEX_PREFIJO_PROVINCIA = r"^\s*Diputad[oa] por "
+
+COLUMNAS_INFORME = ["fila", "columna", "valor", "motivo"]
+
+
+def limpiar_texto(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna a texto sin espacios sobrantes; los valores vacíos quedan como cadena vacía.
+
+    :param serie: Columna a limpiar.
+    :return: Columna de texto limpia.
+    """
+    return serie.fillna("").astype(str).str.strip()
+
+
+def convertir_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna de fechas DD/MM/YYYY a datetime de una vez.
+
+    :param serie: Columna de fechas como texto.
+    :return: Columna datetime64; los valores vacíos o inválidos quedan como NaT.
+    """
+    return pd.to_datetime(limpiar_texto(serie), format=FORMATO_FECHA, errors="coerce")
+
+
+def fechas_iso(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna datetime a texto AAAA-MM-DD, el formato que espera date() en Cypher.
+
+    :param serie: Columna datetime64.
+    :return: Columna de texto; NaT queda como cadena vacía.
+    """
+    return serie.dt.strftime("%Y-%m-%d").fillna("")
+
+
+def normalizar_provincias(serie: pd.Series) -> pd.Series:
+    """
+    Elimina el prefijo 'Diputado por' o 'Diputada por' de toda la columna de provincias.
+
+    :param serie: Columna con textos como 'Diputada por Cádiz'.
+    :return: Columna de texto con el nombre limpio de la provincia.
+    """
+    return limpiar_texto(serie).str.replace(REGEX_PREFIJO_PROVINCIA, "", regex=True).str.strip()
+
+
+def _invalidos(df: pd.DataFrame, mascara: pd.Series, columna: str, motivo: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "fila": df.index[mascara],
+        "columna": columna,
+        "valor": limpiar_texto(df.loc[mascara, columna]).to_numpy(),
+        "motivo": motivo,
+    }, columns=COLUMNAS_INFORME)
+
+
+def _informe(partes: list[pd.DataFrame]) -> pd.DataFrame:
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_INFORME)
+    return pd.concat(partes, ignore_index=True).sort_values(["fila", "columna"], ignore_index=True)
+
+
+def _revisar_fechas(df: pd.DataFrame, columnas: list[str], limpio: pd.DataFrame) -> list[pd.DataFrame]:
+    # Convierte las columnas de fecha de 'limpio' y devuelve los valores no vacíos que no se han podido leer
+    partes = []
+    for columna in columnas:
+        limpio[columna] = convertir_fechas(df[columna])
+        invalida = limpio[columna].isna() & (limpiar_texto(df[columna]) != "")
+        partes.append(_invalidos(df, invalida, columna, "fecha inválida"))
+    return partes
+
+
+def preprocesar_grupos(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Limpia el CSV de grupos columna a columna antes de importarlo.
+    Las filas sin nombre o sin grupo se descartan; las fechas inválidas se dejan vacías (NaT).
+
+    :param df: DataFrame con columnas nombre, grupo_parlamentario, fecha_alta y fecha_baja.
+    :return: Tupla (limpio, invalidos). 'limpio' tiene nombre como texto, grupo_parlamentario categórico
+             y las fechas como datetime64. 'invalidos' tiene una fila por valor descartado o corregido,
+             con las columnas fila (índice en el CSV), columna, valor y motivo.
+    """
+    limpio = pd.DataFrame(index=df.index)
+    limpio["nombre"] = limpiar_texto(df["nombre"])
+    limpio["grupo_parlamentario"] = limpiar_texto(df["grupo_parlamentario"])
+    partes = _revisar_fechas(df, ["fecha_alta", "fecha_baja"], limpio)
+
+    sin_nombre = limpio["nombre"] == ""
+    sin_grupo = ~sin_nombre & (limpio["grupo_parlamentario"] == "")
+    partes.append(_invalidos(df, sin_nombre, "nombre", "fila sin nombre"))
+    partes.append(_invalidos(df, sin_grupo, "grupo_parlamentario", "fila sin grupo"))
+
+    limpio = limpio[~(sin_nombre | sin_grupo)].astype({"grupo_parlamentario": "category"})
+    return limpio, _informe(partes)
+
+
+def preprocesar_diputados(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Limpia el CSV de diputados columna a columna antes de importarlo.
+    Las filas sin nombre se descartan; las fechas de suplencia inválidas se dejan vacías (NaT).
+
+    :param df: DataFrame con columnas nombre, provincia, sustituye_a, fecha_alta_suplencia
+               y fecha_baja_suplencia.
+    :return: Tupla (limpio, invalidos). 'limpio' tiene nombre y sustituye_a como texto, provincia
+             normalizada y categórica y las fechas como datetime64. 'invalidos' tiene el mismo formato
+             que en preprocesar_grupos.
+    """
+    limpio = pd.DataFrame(index=df.index)
+    limpio["nombre"] = limpiar_texto(df["nombre"])
+    limpio["provincia"] = normalizar_provincias(df["provincia"])
+    limpio["sustituye_a"] = limpiar_texto(df["sustituye_a"])
+    partes = _revisar_fechas(df, ["fecha_alta_suplencia", "fecha_baja_suplencia"], limpio)
+
+    sin_nombre = limpio["nombre"] == ""
+    partes.append(_invalidos(df, sin_nombre, "nombre", "fila sin nombre"))
+
+    limpio = limpio[~sin_nombre].astype({"provincia": "category"})
+    return limpio, _informe(partes)
+
+
+def registrar_invalidos(invalidos: pd.DataFrame, origen: str):
+    """
+    Deja en el log el resumen de los valores inválidos encontrados al preprocesar un CSV.
+
+    :param invalidos: Informe devuelto por preprocesar_grupos o preprocesar_diputados.
+    :param origen: Nombre del CSV, para el mensaje.
+    """
+    if invalidos.empty:
+        return
+    logger.warning(f"{len(invalidos)} valores inválidos en {origen}: "
+                   f"{invalidos['motivo'].value_counts().to_dict()}")
+    for fila in invalidos.itertuples(index=False):
+        logger.debug(f"{origen} fila {fila.fila}, {fila.columna}={fila.valor!r}: {fila.motivo}")
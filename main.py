@@ -1,16 +1,34 @@
 # main.py
 
 import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from scraping.congreso_scraper import CongresoScraper
 from scraping.scraper_diputados import DiputadosScraper
 from scraping.scraper_grupos import GruposScraper
+from scraping.scraper_votaciones import VotacionesScraper
+from scraping.utils.selenium_utils import PoolDrivers
+from scraping.utils.cache_http import CacheHTTP
 from analysis.graph_builder import GraphBuilder
+from analysis.parser_intervenciones import procesar_legislatura
+from analysis.indice_textual import IndiceTextual
+from analysis.matriz_votos import MatrizVotos
 from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE
 import logging
 import os
+import sys
 
 logging.basicConfig(level=logging.INFO)
 
+# Modos que escriben en un recurso compartido entre legislaturas (índice SQLite, grafo Neo4j):
+# en lotes se ejecutan de uno en uno, no en procesos paralelos
+MODOS_SECUENCIALES = {"indexar", "grafogrupos", "grafodiputados", "grafovotos"}
+
+# Modos que descargan de la web del Congreso: en lotes usan un solo proceso salvo que se pida otra cosa,
+# y el límite de peticiones por segundo se reparte entre los procesos para no multiplicar la carga al servidor
+MODOS_RED = {"plenos", "diputados", "grupos", "votaciones"}
+
 
 def configurar_logging(nombre_proceso):
     os.makedirs("logs", exist_ok=True)
@@ -26,6 +44,201 @@ def configurar_logging(nombre_proceso):
     )
 
 
+def parsear_legislaturas(texto: str) -> list[str]:
+    """
+    Interpreta el argumento --legislatura: un número, un rango o una lista de ambos.
+
+    :param texto: P. ej. '15', '1-15' o '10,12,14-15'.
+    :return: Legislaturas sin duplicados, en el orden indicado.
+    :raises ValueError: Si alguna parte no es un número o un rango válido.
+    """
+    legislaturas = []
+    for parte in texto.split(","):
+        inicio, _, fin = parte.strip().partition("-")
+        if not inicio.isdigit() or (fin and not fin.isdigit()):
+            raise ValueError(f"Legislatura no válida: '{parte.strip()}'")
+        fin = fin or inicio
+        if int(fin) < int(inicio):
+            raise ValueError(f"Rango de legislaturas no válido: '{parte.strip()}'")
+        for numero in range(int(inicio), int(fin) + 1):
+            if str(numero) not in legislaturas:
+                legislaturas.append(str(numero))
+    return legislaturas
+
+
+def ejecutar_legislatura(args, legislatura: str):
+    """
+    Ejecuta el modo indicado en args para una legislatura.
+
+    :param args: Argumentos de la línea de comandos.
+    :param legislatura: Número de la legislatura a procesar.
+    """
+    # Ruta al ejecutable de ChromeDriver (ajústala según tu sistema)
+    CHROMEDRIVER_PATH = "C:/Tools/chromedriver/chromedriver.exe"
+    INDICE_PATH = "indice/intervenciones.sqlite"
+    VOTACIONES_DIR = f"votaciones/{legislatura}"
+    csv_dir = f"csv/{legislatura}"
+    os.makedirs(csv_dir, exist_ok=True)
+
+    # Un único pool de navegadores para todo el proceso: los scrapers encadenados reutilizan Chrome.
+    # Se dimensiona con el paralelismo pedido para que los navegadores de cada hilo se conserven entre tareas
+    # (dos como mínimo: diputados lista a la vez que el enriquecedor lee las sustituciones)
+    # La caché HTTP es opcional: sin --cache-http, nullcontext entrega None a los scrapers
+    caja_cache = (CacheHTTP(args.cache_http, ttl=args.cache_ttl, max_bytes=args.cache_max_mb * 1024 * 1024)
+                  if args.cache_http else nullcontext())
+    with PoolDrivers(CHROMEDRIVER_PATH, max_drivers=max(2, args.grupos_paralelo)) as pool, caja_cache as cache:
+        if args.modo == "plenos":
+            OUTPUT_DIR = f"diarios_html/{legislatura}"
+            scraper = CongresoScraper(
+                driver_path=CHROMEDRIVER_PATH,
+                output_dir=OUTPUT_DIR,
+                legislatura=legislatura,
+                modo_descarga=args.descarga,
+                num_workers=args.workers,
+                peticiones_por_segundo=args.peticiones_por_segundo,
+                retardo_cortesia=args.retardo,
+                incremental=args.incremental,
+                almacenamiento=args.almacenamiento,
+                pool=pool,
+                cache=cache
+            )
+            scraper.descargar_plenos()
+
+        elif args.modo == "diputados":
+            OUTPUT_CSV = os.path.join(csv_dir, "diputados.csv")
+            scraper = DiputadosScraper(driver_path=CHROMEDRIVER_PATH, output_csv=OUTPUT_CSV,
+                                       legislatura=legislatura, pool=pool,
+                                       modo_descarga=args.descarga, num_workers=args.workers, cache=cache,
+                                       reanudar=args.reanudar)
+            scraper.ejecutar()
+
+        elif args.modo == "grupos":
+            OUTPUT_CSV = os.path.join(csv_dir, "grupos.csv")
+            scraper = GruposScraper(driver_path=CHROMEDRIVER_PATH, legislatura=legislatura, pool=pool,
+                                    modo_descarga=args.descarga, num_workers=args.workers,
+                                    grupos_en_paralelo=args.grupos_paralelo, cache=cache,
+                                    reanudar=args.reanudar)
+            scraper.ejecutar(output_csv=OUTPUT_CSV)
+
+        elif args.modo == "grafogrupos":
+            CSV_PATH = os.path.join(csv_dir, "grupos.csv")
+            builder = GraphBuilder(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
+            builder.preparar_esquema()
+            builder.importar_grupos(CSV_PATH, legislatura, tamano_lote=args.tamano_lote)
+            builder.close()
+
+        elif args.modo == "grafodiputados":
+            CSV_PATH = os.path.join(csv_dir, "diputados.csv")
+            builder = GraphBuilder(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
+            builder.preparar_esquema()
+            builder.importar_diputados(CSV_PATH, legislatura, tamano_lote=args.tamano_lote)
+            builder.close()
+
+        elif args.modo == "intervenciones":
+            DIARIOS_DIR = f"diarios_html/{legislatura}"
+            procesar_legislatura(DIARIOS_DIR, "parquet/intervenciones", num_procesos=args.procesos)
+
+        elif args.modo == "votaciones":
+            scraper = VotacionesScraper(
+                output_dir=VOTACIONES_DIR,
+                legislatura=legislatura,
+                num_workers=args.workers,
+                peticiones_por_segundo=args.peticiones_por_segundo,
+                cache=cache
+            )
+            scraper.ejecutar()
+
+        elif args.modo == "grafovotos":
+            matriz = MatrizVotos.desde_directorio(VOTACIONES_DIR)
+            matriz.exportar_npz(os.path.join(VOTACIONES_DIR, "matriz.npz"))
+            matriz.indice_rice().to_csv(os.path.join(csv_dir, "cohesion_grupos.csv"), index=False)
+            matriz.rebeldes().to_csv(os.path.join(csv_dir, "rebeldes.csv"), index=False)
+            builder = GraphBuilder(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
+            builder.preparar_esquema()
+            builder.importar_acuerdos(matriz.aristas_acuerdo(umbral=args.umbral_acuerdo), legislatura)
+            builder.close()
+
+        elif args.modo == "indexar":
+            DIARIOS_DIR = f"diarios_html/{legislatura}"
+            with IndiceTextual(INDICE_PATH) as indice:
+                indice.actualizar(DIARIOS_DIR)
+
+        elif args.modo == "buscar":
+            with IndiceTextual(INDICE_PATH) as indice:
+                resultados = indice.buscar(args.consulta, orador=args.orador, limite=args.limite)
+            for r in resultados:
+                print(f"{r['fecha']} {r['cve']} #{r['orden']} {r['orador']} ({r['cargo']}): {r['texto'][:200]}")
+            print(f"{len(resultados)} intervenciones encontradas.")
+
+
+def ejecutar_trabajo(args, legislatura: str) -> dict:
+    """
+    Ejecuta una legislatura como trabajo independiente de un lote, con su propio log
+    (logs/<modo>_<legislatura>.log). Los errores se capturan para no detener el resto del lote.
+
+    :param args: Argumentos de la línea de comandos.
+    :param legislatura: Número de la legislatura a procesar.
+    :return: Diccionario con legislatura, ok, segundos y error.
+    """
+    configurar_logging(f"{args.modo}_{legislatura}")
+    inicio = time.perf_counter()
+    try:
+        ejecutar_legislatura(args, legislatura)
+        error = None
+    except Exception as e:
+        logging.getLogger(__name__).exception(f"Error procesando la legislatura {legislatura}")
+        error = f"{type(e).__name__}: {e}"
+    return {"legislatura": legislatura, "ok": error is None,
+            "segundos": round(time.perf_counter() - inicio, 1), "error": error}
+
+
+def ejecutar_lote(args, legislaturas: list[str]) -> list[dict]:
+    """
+    Procesa varias legislaturas. Cada una es un trabajo independiente en un pool de procesos
+    (con sus propios navegadores, directorios de salida y log), salvo en los modos que escriben
+    en un recurso compartido, que se ejecutan de uno en uno. Los modos que descargan de la web usan
+    por defecto un solo proceso y reparten el límite de peticiones por segundo entre los procesos.
+
+    :param args: Argumentos de la línea de comandos.
+    :param legislaturas: Legislaturas a procesar.
+    :return: Resultado de cada trabajo, en el orden de legislaturas.
+    """
+    logger = logging.getLogger(__name__)
+    if args.modo in MODOS_SECUENCIALES:
+        logger.info(f"Procesando {len(legislaturas)} legislaturas de una en una...")
+        return [ejecutar_trabajo(args, legislatura) for legislatura in legislaturas]
+
+    por_defecto = 1 if args.modo in MODOS_RED else os.cpu_count() or 1
+    num_procesos = min(len(legislaturas), args.legislaturas_paralelo or por_defecto)
+    if args.modo in MODOS_RED and num_procesos > 1:
+        # Cada proceso tiene su propio limitador: el total hacia el servidor sigue siendo --peticiones-por-segundo
+        args = argparse.Namespace(**{**vars(args),
+                                     "peticiones_por_segundo": args.peticiones_por_segundo / num_procesos})
+        logger.info(f"Límite de {args.peticiones_por_segundo:g} peticiones/s por proceso")
+    if args.modo == "intervenciones" and args.procesos is None:
+        # Cada trabajo parsea con su propio pool: se reparten los núcleos para no saturar la máquina
+        args = argparse.Namespace(**{**vars(args), "procesos": max(1, (os.cpu_count() or 1) // num_procesos)})
+    logger.info(f"Procesando {len(legislaturas)} legislaturas en {num_procesos} procesos...")
+    with ProcessPoolExecutor(max_workers=num_procesos) as ejecutor:
+        return list(ejecutor.map(ejecutar_trabajo, [args] * len(legislaturas), legislaturas))
+
+
+def resumir_lote(resultados: list[dict]) -> int:
+    """
+    Muestra el resumen de un lote de legislaturas.
+
+    :param resultados: Resultados devueltos por ejecutar_trabajo.
+    :return: Número de legislaturas con error.
+    """
+    print("\nResumen del lote:")
+    for r in resultados:
+        estado = "OK" if r["ok"] else f"ERROR ({r['error']})"
+        print(f"  Legislatura {r['legislatura']}: {estado} en {r['segundos']} s")
+    fallidas = sum(not r["ok"] for r in resultados)
+    print(f"{len(resultados) - fallidas} legislaturas completadas, {fallidas} con errores.")
+    return fallidas
+
+
 def main():
     """
     Punto de entrada principal del sistema. Ejecuta distintos modos según el argumento --modo.
@@ -33,52 +246,166 @@ def main():
     parser = argparse.ArgumentParser(description="Ejecutar scrapers o construcción del grafo del Congreso.")
     parser.add_argument(
         "--modo",
-        choices=["plenos", "diputados", "grupos", "grafogrupos", "grafodiputados"],
+        choices=["plenos", "diputados", "grupos", "grafogrupos", "grafodiputados", "intervenciones",
+                 "indexar", "buscar", "votaciones", "grafovotos", "exportargrafo"],
         required=True,
-        help="Selecciona el modo: 'plenos', 'diputados', 'grupos', 'grafogrupos', 'grafodiputados'"
+        help="Selecciona el modo: 'plenos', 'diputados', 'grupos', 'grafogrupos', 'grafodiputados', "
+             "'intervenciones', 'indexar', 'buscar', 'votaciones', 'grafovotos', 'exportargrafo'"
     )
     parser.add_argument(
         "--legislatura",
         default="15",
-        help="Número de legislatura a procesar (por defecto 15)"
+        help="Legislatura a procesar (por defecto 15). Admite rangos y listas ('1-15', '10,12,14-15'): "
+             "cada legislatura se procesa como un trabajo independiente, con su log logs/<modo>_<legislatura>.log"
+    )
+    parser.add_argument(
+        "--legislaturas-paralelo",
+        type=int,
+        default=None,
+        help="Varias legislaturas: número de procesos que las procesan a la vez (por defecto, todos los núcleos; "
+             "1 en plenos, diputados, grupos y votaciones, que reparten --peticiones-por-segundo entre los "
+             "procesos). Los modos indexar y grafo* las procesan de una en una"
+    )
+    parser.add_argument(
+        "--descarga",
+        choices=["navegador", "http"],
+        default="navegador",
+        help="Modo de descarga de plenos: 'navegador' (Chrome) o 'http' (con las cookies del navegador). "
+             "Diputados y grupos solo admiten 'navegador'"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de descargas en paralelo de plenos (requiere --descarga http) o votaciones (por defecto 1)"
+    )
+    parser.add_argument(
+        "--grupos-paralelo",
+        type=int,
+        default=1,
+        help="Grupos: número de grupos procesados a la vez, cada uno con su navegador o hilo HTTP (por defecto 1)"
+    )
+    parser.add_argument(
+        "--peticiones-por-segundo",
+        type=float,
+        default=2.0,
+        help="Límite de peticiones por segundo al servidor en descargas paralelas (por defecto 2); "
+             "con varias legislaturas en paralelo es el total de todos los procesos"
+    )
+    parser.add_argument(
+        "--retardo",
+        type=float,
+        default=0.0,
+        help="Segundos extra de cortesía entre descargas paralelas (por defecto 0)"
+    )
+    parser.add_argument(
+        "--cache-http",
+        metavar="DIRECTORIO",
+        help="Caché en disco de las descargas HTTP (p. ej. 'cache_http'): las respuestas vigentes se sirven "
+             "sin pedirlas al servidor y las caducadas se revalidan con ETag/Last-Modified (por defecto, sin caché)"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=86400,
+        help="Segundos durante los que una respuesta de la caché HTTP se usa sin revalidarla (por defecto 86400)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=500,
+        help="Tamaño máximo de la caché HTTP en MB; al superarlo se eliminan las respuestas menos usadas "
+             "(por defecto 500)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Plenos: deja de paginar en cuanto una página completa ya está en el manifiesto de descargas"
+    )
+    parser.add_argument(
+        "--no-reanudar",
+        dest="reanudar",
+        action="store_false",
+        help="Diputados/grupos: descarta el checkpoint de una ejecución interrumpida y empieza de cero"
+    )
+    parser.add_argument(
+        "--almacenamiento",
+        choices=["html", "gzip", "contenido"],
+        default="html",
+        help="Formato de los diarios en disco: 'html', 'gzip' o 'contenido' (gzip deduplicado por hash)"
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=None,
+        help="Intervenciones: número de procesos para parsear los diarios (por defecto, todos los núcleos)"
+    )
+    parser.add_argument(
+        "--consulta",
+        help="Buscar: términos o frases entre comillas a buscar en las intervenciones"
+    )
+    parser.add_argument(
+        "--orador",
+        help="Buscar: filtra los resultados por orador (coincidencia parcial)"
+    )
+    parser.add_argument(
+        "--limite",
+        type=int,
+        default=50,
+        help="Buscar: número máximo de resultados (por defecto 50)"
+    )
+    parser.add_argument(
+        "--umbral-acuerdo",
+        type=float,
+        default=0.9,
+        help="Grafovotos: acuerdo mínimo (0-1) para crear relaciones VOTA_IGUAL_QUE (por defecto 0.9)"
+    )
+    parser.add_argument(
+        "--salida-grafo",
+        default="neo4j_import",
+        help="Exportargrafo: directorio de los CSV para 'neo4j-admin database import' (por defecto neo4j_import)"
+    )
+    parser.add_argument(
+        "--tamano-lote",
+        type=int,
+        default=1000,
+        help="Grafogrupos/grafodiputados: número de filas que se envían a Neo4j en cada transacción "
+             "(por defecto 1000)"
     )
     args = parser.parse_args()
+    if args.modo == "buscar" and not args.consulta:
+        parser.error("El modo 'buscar' requiere --consulta")
+    if args.modo in ("diputados", "grupos") and args.descarga == "http":
+        # Los recursos AJAX (RECURSO_HTTP/CAMPOS_HTTP de cada scraper) no se han contrastado con respuestas
+        # reales de la web: hasta entonces este camino no se expone en la línea de comandos
+        parser.error(f"El modo '{args.modo}' no admite --descarga http: los recursos AJAX de la web "
+                     "están sin verificar; usa --descarga navegador")
+    try:
+        legislaturas = parsear_legislaturas(args.legislatura)
+    except ValueError as e:
+        parser.error(str(e))
 
-    # Determina el nombre del log según el modo
-    log_name = args.modo
-    configurar_logging(log_name)
+    if args.modo == "exportargrafo":
+        # Una sola exportación con todas las legislaturas: nodos y relaciones se deduplican entre ellas
+        configurar_logging(args.modo)
+        GraphBuilder.exportar_admin_import(
+            args.salida_grafo,
+            {legislatura: os.path.join("csv", legislatura, "grupos.csv") for legislatura in legislaturas},
+            {legislatura: os.path.join("csv", legislatura, "diputados.csv") for legislatura in legislaturas},
+        )
+        return
 
-    # Ruta al ejecutable de ChromeDriver (ajústala según tu sistema)
-    CHROMEDRIVER_PATH = "C:/Tools/chromedriver/chromedriver.exe"
-    csv_dir = f"csv/{args.legislatura}"
-    os.makedirs(csv_dir, exist_ok=True)
+    if len(legislaturas) == 1:
+        configurar_logging(args.modo)
+        ejecutar_legislatura(args, legislaturas[0])
+        return
+    if args.modo == "buscar":
+        parser.error("El modo 'buscar' no admite varias legislaturas")
 
-    if args.modo == "plenos":
-        OUTPUT_DIR = f"diarios_html/{args.legislatura}"
-        scraper = CongresoScraper(driver_path=CHROMEDRIVER_PATH, output_dir=OUTPUT_DIR, legislatura=args.legislatura)
-        scraper.descargar_plenos()
-
-    elif args.modo == "diputados":
-        OUTPUT_CSV = os.path.join(csv_dir, "diputados.csv")
-        scraper = DiputadosScraper(driver_path=CHROMEDRIVER_PATH, output_csv=OUTPUT_CSV, legislatura=args.legislatura)
-        scraper.ejecutar()
-
-    elif args.modo == "grupos":
-        OUTPUT_CSV = os.path.join(csv_dir, "grupos.csv")
-        scraper = GruposScraper(driver_path=CHROMEDRIVER_PATH, legislatura=args.legislatura)
-        scraper.ejecutar(output_csv=OUTPUT_CSV)
-
-    elif args.modo == "grafogrupos":
-        CSV_PATH = os.path.join(csv_dir, "grupos.csv")
-        builder = GraphBuilder(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
-        builder.importar_grupos(CSV_PATH, args.legislatura)
-        builder.close()
-
-    elif args.modo == "grafodiputados":
-        CSV_PATH = os.path.join(csv_dir, "diputados.csv")
-        builder = GraphBuilder(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE)
-        builder.importar_diputados(CSV_PATH, args.legislatura)
-        builder.close()
+    configurar_logging(args.modo)
+    resultados = ejecutar_lote(args, legislaturas)
+    if resumir_lote(resultados):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -3,40 +3,94 @@
 import os
 import re
 import time
+from typing import NamedTuple, Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support import expected_conditions as EC
 from scraping.utils.selenium_utils import (
-    iniciar_driver,
+    obtener_driver,
+    liberar_driver,
     aceptar_cookies,
     seleccionar_opcion_por_valor,
     hacer_click_esperando,
     click_siguiente_pagina,
     get_rango_resultados,
-    guardar_html_contenido
+    obtener_html_contenido,
+    extraer_filas_html,
+    PoolDrivers
 )
+from scraping.utils.http_utils import crear_sesion_http, obtener_html_http
+from scraping.utils.cache_http import CacheHTTP
+from scraping.utils.descarga_concurrente import DescargadorConcurrente, LimitadorPeticiones
+from scraping.utils.manifiesto import ManifiestoDescargas
+from scraping.utils.almacenamiento import crear_almacen
 import logging
 logger = logging.getLogger(__name__)
 
+
+class FilaPleno(NamedTuple):
+    """Datos planos de una fila de resultados: CVE del pleno y URL de su texto íntegro."""
+    cve: str
+    href: str
+
+
 class CongresoScraper:
     """Scraper para descargar los plenos del Congreso desde la web oficial."""
 
+    MODOS_DESCARGA = ("navegador", "http")
 
-    def __init__(self, driver_path: str, output_dir: str, legislatura: str = "15"):
+    def __init__(self, driver_path: str, output_dir: str, legislatura: str = "15", modo_descarga: str = "navegador",
+                 num_workers: int = 1, peticiones_por_segundo: float = 2.0, retardo_cortesia: float = 0.0,
+                 incremental: bool = False, almacenamiento: str = "html", pool: Optional[PoolDrivers] = None,
+                 cache: Optional[CacheHTTP] = None):
         """
         Inicializa el scraper con los parámetros necesarios.
 
         :param driver_path: Ruta al ejecutable de ChromeDriver.
         :param output_dir: Directorio donde se guardarán los archivos HTML descargados.
         :param legislatura: Número de la legislatura a consultar (por defecto "15").
+        :param modo_descarga: 'navegador' abre cada pleno en una pestaña de Chrome;
+                              'http' lo descarga con una sesión HTTP que reutiliza las cookies del navegador.
+        :param num_workers: Hilos descargando plenos en paralelo mientras se pagina (solo en modo 'http').
+        :param peticiones_por_segundo: Límite de peticiones por segundo al servidor en descargas paralelas.
+        :param retardo_cortesia: Segundos extra de espera entre descargas paralelas al mismo servidor.
+        :param incremental: Si es True, deja de paginar en cuanto una página completa ya está en el manifiesto.
+                            Los resultados se listan del más reciente al más antiguo.
+        :param almacenamiento: Formato en disco de los diarios: 'html' (sin comprimir), 'gzip'
+                               o 'contenido' (comprimido, direccionado por contenido y deduplicado).
+        :param pool: Pool de navegadores compartido (opcional). Si no se indica, se inicia y cierra un Chrome propio.
+        :param cache: Caché HTTP en disco (opcional) para los plenos descargados en modo 'http'.
         """
+        if modo_descarga not in self.MODOS_DESCARGA:
+            raise ValueError(f"Modo de descarga no válido: {modo_descarga}")
+        if num_workers > 1 and modo_descarga != "http":
+            raise ValueError("La descarga en paralelo requiere el modo de descarga 'http'")
         self.url = "https://www.congreso.es/busqueda-de-publicaciones"
         self.driver_path = driver_path
         self.output_dir = output_dir
         self.legislatura = legislatura
+        self.modo_descarga = modo_descarga
+        self.num_workers = num_workers
+        self.peticiones_por_segundo = peticiones_por_segundo
+        self.retardo_cortesia = retardo_cortesia
+        self.incremental = incremental
+        self.pool = pool
+        self.cache = cache
         self.driver = None
         self.wait = None
+        self.session = None
+        self.descargador = None
         os.makedirs(output_dir, exist_ok=True)
+        self.almacen = crear_almacen(output_dir, almacenamiento)
+        self.manifiesto = ManifiestoDescargas(output_dir)
+
+    def _init_driver(self):
+        """Obtiene un navegador del pool, o inicia uno propio si no hay pool."""
+        self.driver, self.wait = obtener_driver(self.driver_path, self.pool)
+
+    def _liberar_driver(self):
+        """Devuelve el navegador al pool, o lo cierra si es propio."""
+        liberar_driver(self.driver, self.wait, self.pool)
 
     def _apply_filters(self):
         """
@@ -56,64 +110,130 @@ class CongresoScraper:
             self.wait.until(EC.presence_of_element_located((By.XPATH, "//tr[td//a[contains(text(),'Texto íntegro')]]")))
             logger.info("Resultados cargados.")
         except Exception as e:
-            logger.error("Error al aplicar filtros:  {e}")
-            self.driver.quit()
+            # El navegador lo libera descargar_plenos, que puede haberlo tomado de un pool
+            logger.error(f"Error al aplicar filtros: {e}")
             raise
 
-    def _procesar_fila(self, fila):
+    @staticmethod
+    def _leer_fila(fila) -> Optional[FilaPleno]:
         """
-        Procesa una fila individual de resultados y guarda el contenido si corresponde a un pleno.
+        Extrae el CVE y el enlace al texto íntegro de una fila de resultados.
 
-        :param fila: WebElement correspondiente a una fila de resultados.
-        :return: True si se guardó un archivo nuevo, False en caso contrario.
+        :param fila: Fila de resultados serializada por extraer_filas_html.
+        :return: FilaPleno si la fila corresponde a un pleno con enlace, None en caso contrario.
         """
-        cve_td = fila.find_elements(By.TAG_NAME, "td")
         cve_text = ""
-        for td in cve_td:
-            if "DSCD" in td.text:
-                cve_text = td.text.strip()
+        for td in fila["celdas"]:
+            if "DSCD" in td["texto"]:
+                cve_text = td["texto"].strip()
                 break
         if "-PL-" not in cve_text:
-            return False
+            return None
 
         match = re.search(r"(DSCD-\d+-PL-\d+)", cve_text)
-        base = match.group(1) if match else re.sub(r"[^A-Za-z0-9\-]", "_", cve_text)
-        nombre_archivo = f"{base}.html"
-        ruta = os.path.join(self.output_dir, nombre_archivo)
+        cve = match.group(1) if match else re.sub(r"[^A-Za-z0-9\-]", "_", cve_text)
 
-        if os.path.exists(ruta):
-            logger.info(f"Ya existe: {nombre_archivo}")
+        href = next((a["href"] for a in fila["enlaces"] if "Texto íntegro" in a["texto"]), None)
+        if not href:
+            logger.error(f"No se encontró el enlace 'Texto íntegro' para: {cve}")
+            return None
+        return FilaPleno(cve, href)
+
+    def _snapshot_pagina(self, selector_tabla: str) -> list[FilaPleno]:
+        """
+        Lee una única vez las filas de la página actual y las convierte en datos planos,
+        antes de abrir ninguna pestaña, para que el procesado no dependa de elementos del DOM.
+
+        :param selector_tabla: XPath de las filas de resultados.
+        :return: Lista de plenos (CVE, href) de la página, en orden.
+        """
+        filas = extraer_filas_html(self.driver, By.XPATH, selector_tabla)
+        plenos = []
+        for fila in filas:
+            pleno = self._leer_fila(fila)
+            if pleno:
+                plenos.append(pleno)
+        return plenos
+
+    def _ya_descargado(self, fila: FilaPleno) -> bool:
+        """
+        Indica si un pleno ya se descargó. Los archivos descargados antes de existir el manifiesto
+        se registran en él sin volver a descargarlos.
+
+        :param fila: Pleno (CVE, href).
+        :return: True si el pleno ya está descargado.
+        """
+        if self.manifiesto.contiene(fila.cve):
+            return True
+        ruta = self.almacen.localizar(fila.cve)
+        if ruta:
+            self.manifiesto.registrar(fila.cve, fila.href, ruta)
+            return True
+        return False
+
+    def _procesar_fila(self, fila: FilaPleno) -> bool:
+        """
+        Procesa un pleno de la página y guarda su contenido si no se había descargado antes.
+
+        :param fila: Pleno (CVE, href) tomado del snapshot de la página.
+        :return: True si se guardó (o se encoló para descarga) un archivo nuevo, False en caso contrario.
+        """
+        if self._ya_descargado(fila):
+            logger.info(f"Ya existe: {fila.cve}")
             return False
 
-        texto_link = fila.find_element(By.XPATH, ".//a[contains(text(),'Texto íntegro')]")
-        href = texto_link.get_attribute("href")
-        logger.info(f"Procesando: {href}")
+        logger.info(f"Procesando: {fila.href}")
+
+        if self.descargador:
+            self.descargador.encolar(fila.cve, fila.href)
+        else:
+            self._guardar_pleno(fila.cve, fila.href)
+        return True
+
+    def _guardar_pleno(self, cve: str, href: str) -> bool:
+        """
+        Descarga un pleno, lo guarda en el almacén, lo registra en el manifiesto
+        y deja constancia del resultado en el log.
+
+        :param cve: CVE del pleno.
+        :param href: URL del texto íntegro del pleno.
+        :return: True si se guardó el contenido, False en caso contrario.
+        """
+        contenido = self._descargar_pleno(href)
+        if contenido is None:
+            logger.error(f"No se encontró contenido en: {cve}")
+            return False
+        ruta = self.almacen.guardar(cve, contenido)
+        self.manifiesto.registrar(cve, href, ruta)
+        logger.info(f"Guardado: {ruta}")
+        return True
+
+    def _descargar_pleno(self, href: str) -> Optional[str]:
+        """
+        Descarga la página 'Texto íntegro' de un pleno según el modo de descarga configurado.
+
+        :param href: URL del texto íntegro del pleno.
+        :return: HTML de la sección del pleno, o None si no se encontró.
+        """
+        if self.modo_descarga == "http":
+            return obtener_html_http(self.session, href, selector="section#portlet_publicaciones")
 
         self.driver.execute_script("window.open(arguments[0]);", href)
         self.driver.switch_to.window(self.driver.window_handles[-1])
         self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
 
-        if guardar_html_contenido(
-                self.driver,
-                self.wait,
-                selector="section#portlet_publicaciones",
-                ruta_archivo=ruta
-        ):
-            logger.info(f"Guardado: {nombre_archivo}")
-        else:
-            logger.error(f"No se encontró contenido en: {nombre_archivo}")
+        contenido = obtener_html_contenido(self.driver, self.wait, selector="section#portlet_publicaciones")
 
         self.driver.close()
         self.driver.switch_to.window(self.driver.window_handles[0])
-        return True
+        return contenido
 
-    def descargar_plenos(self):
-        """Descarga todos los plenos disponibles aplicando los filtros y guardando el contenido en archivos HTML."""
-        self.driver, self.wait = iniciar_driver(self.driver_path, headless=True)
-        self.driver.get(self.url)
-        aceptar_cookies(self.driver, self.wait)
-        self._apply_filters()
+    def _recorrer_paginas(self) -> int:
+        """
+        Recorre las páginas de resultados procesando cada pleno.
 
+        :return: Número de plenos descargados (o encolados, si hay descargador concurrente).
+        """
         descargados = 0
         pagina = 1
         xpath_siguiente = "//ul[@id='_publicaciones_paginationLinksPublicaciones']//a[text()='>']"
@@ -121,31 +241,63 @@ class CongresoScraper:
 
         while True:
             logger.info(f"Página {pagina}")
-            filas = self.driver.find_elements(By.XPATH, selector_tabla)
-
-            for i in range(len(filas)):
-                for intento in range(3):
-                    try:
-                        filas_actualizadas = self.driver.find_elements(By.XPATH, selector_tabla)
-                        if i >= len(filas_actualizadas):
-                            break
-                        if self._procesar_fila(filas_actualizadas[i]):
-                            descargados += 1
-                        break
-                    except Exception as e:
-                        print(f"Error procesando fila {i + 1}: {e}")
+            # Snapshot de la página en una sola lectura; el coste por página es lineal en el número de filas
+            filas = self._snapshot_pagina(selector_tabla)
+
+            if self.incremental and filas and all(self._ya_descargado(fila) for fila in filas):
+                logger.info("Página completa ya descargada; fin del modo incremental.")
+                break
+
+            for i, fila in enumerate(filas):
+                try:
+                    if self._procesar_fila(fila):
+                        descargados += 1
+                except Exception as e:
+                    logger.error(f"Error procesando fila {i + 1}: {e}")
 
             hasta, total = get_rango_resultados(self.driver, "_publicaciones_resultsShowedPublicaciones")
             if hasta is None or hasta >= total:
-                print("Última página detectada.")
+                logger.info("Última página detectada.")
                 break
 
             if not click_siguiente_pagina(self.driver, self.wait, xpath_siguiente, By.XPATH, selector_tabla):
-                print("No hay más páginas.")
+                logger.info("No hay más páginas.")
                 break
 
             pagina += 1
+        return descargados
+
+    def descargar_plenos(self):
+        """Descarga todos los plenos disponibles aplicando los filtros y guardando el contenido en archivos HTML."""
+        self._init_driver()
+        descargados = 0
+        try:
+            self.driver.get(self.url)
+            aceptar_cookies(self.driver, self.wait)
+            self._apply_filters()
+            if self.modo_descarga == "http":
+                # Chrome solo se usa para el formulario y la paginación; los plenos se descargan por HTTP
+                self.session = crear_sesion_http(self.driver, tamano_pool=max(10, self.num_workers),
+                                                 cache=self.cache)
+            if self.num_workers > 1:
+                self.descargador = DescargadorConcurrente(
+                    self._guardar_pleno,
+                    num_workers=self.num_workers,
+                    limitador=LimitadorPeticiones(self.peticiones_por_segundo, self.retardo_cortesia)
+                )
+                self.descargador.iniciar()
 
-        self.driver.quit()
-        print("\nProceso completado")
-        print(f"Total nuevos plenos descargados: {descargados}")
\ No newline at end of file
+            descargados = self._recorrer_paginas()
+        finally:
+            # Se ejecuta también si falla la paginación: hilos de descarga, navegador y SQLite no quedan abiertos
+            self._liberar_driver()
+            if self.descargador:
+                logger.info("Esperando a que terminen las descargas pendientes...")
+                descargados = self.descargador.finalizar()
+                logger.info(f"Descargas fallidas: {self.descargador.fallidos}")
+                self.descargador = None
+            if self.session:
+                self.session.close()
+            self.manifiesto.close()
+            self.almacen.close()
+        logger.info(f"Proceso completado. Total nuevos plenos descargados: {descargados}")
\ No newline at end of file
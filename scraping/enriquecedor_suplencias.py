@@ -1,33 +1,65 @@
 # scraping/enriquecedor suplencias.py
 
 import pandas as pd
+from typing import Optional
 import re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from scraping.utils.selenium_utils import (
-    iniciar_driver,
+    obtener_driver,
+    liberar_driver,
     esperar_spinner,
     esperar_tabla_cargada,
     seleccionar_opcion_por_valor,
     aceptar_cookies,
     es_ultima_pagina,
     hacer_click_esperando,
-    click_siguiente_pagina
+    click_siguiente_pagina,
+    extraer_filas_html,
+    PoolDrivers
 )
+from scraping.utils.cliente_portlets import ClientePortlet
+from scraping.utils.cache_http import CacheHTTP
+from scraping.utils.tablas_html import enlaces_con_contexto
 import logging
 logger = logging.getLogger(__name__)
 
+# Texto que precede al enlace del diputado sustituido o sustituto en la celda del nombre
+REGEX_SUSTITUYE = re.compile(r"Sustituy\w*\s+a:", re.IGNORECASE)
+REGEX_SUSTITUIDO = re.compile(r"Sustituid\w*\s+por:", re.IGNORECASE)
+
 
 class EnriquecedorSuplencias:
-    def __init__(self, driver_path: str, legislatura: str = "15"):
+    # Recurso AJAX del portlet de sustituciones y correspondencia columna -> campo del JSON devuelto
+    PORTLET_ID = "diputadomodule"
+    RECURSO_HTTP = "searchSustituciones"
+    CAMPOS_HTTP = {
+        "nombre": "apellidosNombre",
+        "fecha_alta": "fechaAlta",
+        "fecha_baja": "fechaBaja",
+        "sustituye_a": "sustituyeA",
+        "sustituido_por": "sustituidoPor",
+    }
+
+    def __init__(self, driver_path: str, legislatura: str = "15", pool: Optional[PoolDrivers] = None,
+                 modo_descarga: str = "navegador", tamano_pagina: int = 50, num_workers: int = 4,
+                 cache: Optional[CacheHTTP] = None):
         self.url = "https://www.congreso.es/es/diputados-sustituidos-y-sustitutos"
         self.driver_path = driver_path
         self.legislatura = legislatura
+        self.pool = pool
+        self.modo_descarga = modo_descarga
+        self.tamano_pagina = tamano_pagina
+        self.num_workers = num_workers
+        self.cache = cache
         self.driver = None
         self.wait = None
 
     def _init_driver(self):
-        self.driver, self.wait = iniciar_driver(self.driver_path, headless=True) # pragma: no cover
+        self.driver, self.wait = obtener_driver(self.driver_path, self.pool)
+
+    def _liberar_driver(self):
+        liberar_driver(self.driver, self.wait, self.pool)
 
     def _seleccionar_filtros(self):
         self.driver.get(self.url)
@@ -52,38 +84,23 @@ class EnriquecedorSuplencias:
             self.wait, "#_diputadomodule_contentPaginationSustituciones table tbody tr"
         )
 
-    def _parsear_fila(self, fila):
-        columnas = fila.find_elements(By.TAG_NAME, "td")
+    @staticmethod
+    def _parsear_fila(fila):
+        # La fila llega serializada por extraer_filas_html (textos e innerHTML de cada <td>)
+        columnas = fila["celdas"]
         if len(columnas) < 3:
             return None
 
-        # La columna 0 contiene el nombre del diputado y la información de sustitución
-        raw_html = columnas[0].get_attribute("innerHTML")
-
-        # Extraer nombre del diputado principal
-        nombre_match = re.search(r'>([^<]+)</a>', raw_html)
-        nombre = nombre_match.group(1).strip() if nombre_match else ""
-
-        sustituye_a = ""
-        sustituido_por = ""
-
-        # Usar re.search para encontrar "Sustituye a:"
-        sustituye_match = re.search(r'Sustituy.*?a:\s*.*?<a[^>]*?>([^<]+)</a>', raw_html)
-        if sustituye_match:
-            sustituye_a = sustituye_match.group(1).strip()
-
-        # Usar re.search para encontrar "Sustituido por:"
-        sustituido_por_match = re.search(r'Sustituido.*?por:\s*.*?<a[^>]*?>([^<]+)</a>', raw_html)
-        if sustituido_por_match:
-            sustituido_por = sustituido_por_match.group(1).strip()
-
-        fecha_alta = columnas[1].text.strip()
-        fecha_baja = columnas[2].text.strip()
+        # La columna 0 contiene el enlace del diputado seguido de los de sustitución ('Sustituye a:', 'Sustituido por:')
+        enlaces = enlaces_con_contexto(columnas[0]["html"])
+        nombre = enlaces[0][1] if enlaces else ""
+        sustituye_a = next((texto for previo, texto in enlaces[1:] if REGEX_SUSTITUYE.search(previo)), "")
+        sustituido_por = next((texto for previo, texto in enlaces[1:] if REGEX_SUSTITUIDO.search(previo)), "")
 
         return {
             "nombre": nombre,
-            "fecha_alta": fecha_alta,
-            "fecha_baja": fecha_baja,
+            "fecha_alta": columnas[1]["texto"].strip(),
+            "fecha_baja": columnas[2]["texto"].strip(),
             "sustituye_a": sustituye_a,
             "sustituido_por": sustituido_por,
         }
@@ -91,14 +108,32 @@ class EnriquecedorSuplencias:
     # Se ha eliminado _es_ultima_pagina y _siguiente_pagina de aquí
     # porque ahora se usarán las funciones de selenium_utils.py
 
+    def _obtener_suplencias_http(self) -> pd.DataFrame:
+        """Pide todas las páginas de sustituciones al recurso AJAX del portlet, sin navegador."""
+        logger.info("Consultando el recurso de sustituciones por HTTP...")
+        filtros = {"idLegislatura": self.legislatura, "tipoSustitucion": "0"}
+        with ClientePortlet(self.url, self.PORTLET_ID, self.RECURSO_HTTP, tamano_pagina=self.tamano_pagina,
+                            num_workers=self.num_workers, cache=self.cache) as cliente:
+            registros = cliente.obtener_todo(filtros)
+            cliente.comprobar_campos(registros, self.CAMPOS_HTTP.values())
+        datos = [
+            {columna: str(registro.get(campo) or "").strip() for columna, campo in self.CAMPOS_HTTP.items()}
+            for registro in registros
+        ]
+        return pd.DataFrame(datos, columns=list(self.CAMPOS_HTTP))
+
     def obtener_df_suplencias(self) -> pd.DataFrame:
+        if self.modo_descarga == "http":
+            return self._obtener_suplencias_http()
+
         self._init_driver()
         logger.info("Abriendo página de sustituciones...")
         self._seleccionar_filtros()
 
         datos = []
         while True:
-            filas = self.driver.find_elements(
+            filas = extraer_filas_html(
+                self.driver,
                 By.CSS_SELECTOR,
                 "#_diputadomodule_contentPaginationSustituciones table tbody tr"
             )
@@ -124,12 +159,22 @@ class EnriquecedorSuplencias:
                 logger.error("No hay más páginas de suplencias o ocurrió un error al avanzar.")
                 break
 
-        self.driver.quit()
+        self._liberar_driver()
         return pd.DataFrame(datos)
 
-    def enriquecer_df_diputados(self, df_diputados: pd.DataFrame) -> pd.DataFrame:
-        logger.info("Obteniendo datos de suplencias...")
-        df_suplencias = self.obtener_df_suplencias()
+    def enriquecer_df_diputados(self, df_diputados: pd.DataFrame,
+                                df_suplencias: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Añade a los diputados las fechas y relaciones de sus suplencias.
+
+        :param df_diputados: DataFrame de diputados (con la columna 'nombre').
+        :param df_suplencias: Suplencias ya obtenidas (p. ej. en paralelo al listado de diputados).
+                              Si no se indica, se obtienen ahora.
+        :return: DataFrame de diputados enriquecido.
+        """
+        if df_suplencias is None:
+            logger.info("Obteniendo datos de suplencias...")
+            df_suplencias = self.obtener_df_suplencias()
         logger.info(f"Total de registros de suplencias obtenidos: {len(df_suplencias)}")
 
         df_final = df_diputados.copy()
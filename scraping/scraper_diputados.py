@@ -1,18 +1,26 @@
 # scraping/scraper_diputados.py
 
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from scraping.utils.selenium_utils import (
-    iniciar_driver,
+    obtener_driver,
+    liberar_driver,
     aceptar_cookies,
     esperar_spinner,
     esperar_tabla_cargada,
     seleccionar_opcion_por_valor,
     hacer_click_esperando,
     es_ultima_pagina,
-    click_siguiente_pagina
+    click_siguiente_pagina,
+    extraer_filas_html,
+    PoolDrivers
 )
+from scraping.utils.cliente_portlets import ClientePortlet
+from scraping.utils.cache_http import CacheHTTP
+from scraping.utils.escritura_incremental import EscritorCSVIncremental
 from scraping.enriquecedor_suplencias import EnriquecedorSuplencias
 import logging
 logger = logging.getLogger(__name__)
@@ -21,19 +29,50 @@ logger = logging.getLogger(__name__)
 class DiputadosScraper:
     """
     Scraper para obtener el listado de diputados y sus datos básicos desde la web del Congreso.
+    Con modo_descarga='http' pide directamente el recurso AJAX del portlet de búsqueda, sin navegador.
     """
 
-    def __init__(self, driver_path: str, output_csv: str, legislatura: str = "15"):
+    # Recurso AJAX del portlet de búsqueda y correspondencia columna -> campo del JSON devuelto
+    PORTLET_ID = "diputadomodule"
+    RECURSO_HTTP = "searchDiputados"
+    CAMPOS_HTTP = {"nombre": "apellidosNombre", "grupo_actual": "grupo", "provincia": "nombreCircunscripcion"}
+    COLUMNAS = ["nombre", "grupo_actual", "provincia", "legislatura"]
+
+    def __init__(self, driver_path: str, output_csv: str, legislatura: str = "15",
+                 pool: Optional[PoolDrivers] = None, modo_descarga: str = "navegador",
+                 tamano_pagina: int = 50, num_workers: int = 4, cache: Optional[CacheHTTP] = None,
+                 reanudar: bool = True):
+        """
+        :param driver_path: Ruta al ejecutable de ChromeDriver.
+        :param output_csv: Ruta del CSV de salida.
+        :param legislatura: Número de la legislatura.
+        :param pool: Pool de navegadores compartido (opcional).
+        :param modo_descarga: 'navegador' (paginación en Chrome) o 'http' (recurso AJAX del portlet).
+        :param tamano_pagina: Registros por página pedidos en modo 'http'.
+        :param num_workers: Páginas pedidas en paralelo en modo 'http'.
+        :param cache: Caché HTTP en disco (opcional) para las consultas en modo 'http'.
+        :param reanudar: Si una ejecución anterior se interrumpió, continúa por la primera página sin guardar.
+        """
         self.url = "https://www.congreso.es/busqueda-de-diputados"
         self.driver_path = driver_path
         self.output_csv = output_csv
         self.legislatura = legislatura
+        self.pool = pool
+        self.modo_descarga = modo_descarga
+        self.tamano_pagina = tamano_pagina
+        self.num_workers = num_workers
+        self.cache = cache
+        self.reanudar = reanudar
         self.driver = None
         self.wait = None
 
     def _init_driver(self):
-        """Inicializa el driver de Selenium."""
-        self.driver, self.wait = iniciar_driver(self.driver_path, headless=True)
+        """Inicializa el driver de Selenium, tomándolo del pool si se ha indicado uno."""
+        self.driver, self.wait = obtener_driver(self.driver_path, self.pool)
+
+    def _liberar_driver(self):
+        """Devuelve el driver al pool para el siguiente scraper, o lo cierra si es propio."""
+        liberar_driver(self.driver, self.wait, self.pool)
 
     def _buscar_diputados(self):
         """Aplica los filtros en la web para iniciar la búsqueda de diputados."""
@@ -65,11 +104,11 @@ class DiputadosScraper:
         logger.info("Resultados cargados")
 
     def _extraer_info_diputado(self, fila):
-        """Extrae los datos de un diputado a partir de una fila de la tabla."""
-        celdas = fila.find_elements(By.TAG_NAME, "td")
-        nombre = fila.find_element(By.TAG_NAME, "a").text.strip()
-        grupo = celdas[0].text.strip() if len(celdas) > 0 else ""
-        provincia = celdas[1].text.strip() if len(celdas) > 1 else ""
+        """Extrae los datos de un diputado a partir de una fila serializada por extraer_filas_html."""
+        celdas = fila["celdas"]
+        nombre = fila["enlaces"][0]["texto"].strip() if fila["enlaces"] else ""
+        grupo = celdas[0]["texto"].strip() if len(celdas) > 0 else ""
+        provincia = celdas[1]["texto"].strip() if len(celdas) > 1 else ""
         return {
             "nombre": nombre,
             "grupo_actual": grupo,
@@ -81,7 +120,9 @@ class DiputadosScraper:
         """Procesa la tabla de resultados de la página actual y devuelve una lista de diputados."""
         logger.info("Procesando página de resultados...")
         esperar_tabla_cargada(self.wait, "#_diputadomodule_contentPaginationDiputados table tbody tr")
-        filas = self.driver.find_elements(By.CSS_SELECTOR, "#_diputadomodule_contentPaginationDiputados table tbody tr")
+        filas = extraer_filas_html(
+            self.driver, By.CSS_SELECTOR, "#_diputadomodule_contentPaginationDiputados table tbody tr"
+        )
         logger.info(f"Número de diputados en esta página: {len(filas)}")
         resultados = []
         for fila in filas:
@@ -95,14 +136,23 @@ class DiputadosScraper:
         logger.info(f"Guardando resultados en CSV: {self.output_csv}")
         df.to_csv(self.output_csv, index=False, encoding="utf-8")
 
-    def ejecutar(self):
-        """Ejecuta el proceso completo de scraping y enriquecimiento."""
+    def _obtener_diputados_navegador(self, escritor: EscritorCSVIncremental):
+        """
+        Recorre todas las páginas de resultados en el navegador y escribe los diputados página a página.
+        Las páginas que ya están en el checkpoint de una ejecución anterior solo se atraviesan.
+
+        :param escritor: CSV incremental del listado.
+        """
         self._init_driver()
         self._buscar_diputados()
-        resultados_totales = []
+        pagina_guardada = escritor.estado.get("pagina", 0)
+        pagina = 1
 
         while True:
-            resultados_totales.extend(self._procesar_pagina())
+            if pagina > pagina_guardada:
+                escritor.escribir(self._procesar_pagina(), pagina=pagina)
+            else:
+                logger.info(f"Página {pagina} ya guardada en una ejecución anterior.")
 
             # Comprobamos si es la última página usando función de utils
             posibles_ids = [
@@ -121,12 +171,65 @@ class DiputadosScraper:
                     selector_tabla="#_diputadomodule_contentPaginationDiputados table tbody tr"
             ):
                 break
+            pagina += 1
+
+        self._liberar_driver()
+
+    def _obtener_diputados_http(self, escritor: EscritorCSVIncremental):
+        """
+        Pide todas las páginas de resultados al recurso AJAX del portlet y escribe los diputados.
+
+        :param escritor: CSV incremental del listado.
+        """
+        logger.info("Consultando el recurso de búsqueda de diputados por HTTP...")
+        filtros = {"idLegislatura": self.legislatura, "tipo": "2"}
+        with ClientePortlet(self.url, self.PORTLET_ID, self.RECURSO_HTTP, tamano_pagina=self.tamano_pagina,
+                            num_workers=self.num_workers, cache=self.cache) as cliente:
+            registros = cliente.obtener_todo(filtros)
+            cliente.comprobar_campos(registros, self.CAMPOS_HTTP.values())
+        if not registros:
+            raise ValueError(f"El recurso {self.RECURSO_HTTP} no devolvió diputados para la legislatura "
+                             f"{self.legislatura}")
+        resultados = []
+        for registro in registros:
+            datos = {columna: str(registro.get(campo) or "").strip() for columna, campo in self.CAMPOS_HTTP.items()}
+            datos["legislatura"] = self.legislatura
+            resultados.append(datos)
+        logger.info(f"Número de diputados obtenidos: {len(resultados)}")
+        escritor.escribir(resultados)
 
-        self.driver.quit()
-        df_diputados = pd.DataFrame(resultados_totales)
-
-        enriquecedor = EnriquecedorSuplencias(driver_path=self.driver_path, legislatura=self.legislatura)
-        df_diputados = enriquecedor.enriquecer_df_diputados(df_diputados)
-
-        self.guardar_csv(df_diputados)
+    def ejecutar(self):
+        """
+        Ejecuta el proceso completo de scraping y enriquecimiento.
+        Las suplencias se obtienen en otro hilo (con su propio navegador o sesión HTTP) mientras se
+        recorre el listado de diputados; ambos resultados se unen al final.
+        El listado se escribe página a página en <output_csv>.parcial, con un checkpoint para reanudarlo
+        si la ejecución se interrumpe; solo se carga en memoria para enriquecerlo al final.
+        """
+        # Con pool, el enriquecedor toma del pool un navegador distinto al del listado
+        enriquecedor = EnriquecedorSuplencias(driver_path=self.driver_path, legislatura=self.legislatura,
+                                              pool=self.pool, modo_descarga=self.modo_descarga,
+                                              tamano_pagina=self.tamano_pagina, num_workers=self.num_workers,
+                                              cache=self.cache)
+        escritor = EscritorCSVIncremental(self.output_csv, self.COLUMNAS, reanudar=self.reanudar,
+                                          clave=self.modo_descarga)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as ejecutor:
+                futuro_suplencias = ejecutor.submit(enriquecedor.obtener_df_suplencias)
+                if escritor.estado.get("completo"):
+                    logger.info("El listado de diputados ya se completó en una ejecución anterior.")
+                elif self.modo_descarga == "http":
+                    self._obtener_diputados_http(escritor)
+                else:
+                    self._obtener_diputados_navegador(escritor)
+                escritor.escribir([], completo=True)
+                df_suplencias = futuro_suplencias.result()
+            escritor.close()
+
+            df_diputados = pd.read_csv(escritor.ruta_parcial, dtype=str, keep_default_na=False)
+            df_diputados = enriquecedor.enriquecer_df_diputados(df_diputados, df_suplencias=df_suplencias)
+            self.guardar_csv(df_diputados)
+            escritor.descartar()
+        finally:
+            escritor.close()
         logger.info(f"Total diputados guardados: {len(df_diputados)}")
@@ -1,32 +1,69 @@
 # scraping/scraper_grupos.py
 
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from scraping.utils.selenium_utils import (
-    iniciar_driver,
+    obtener_driver,
+    liberar_driver,
     aceptar_cookies,
     esperar_spinner,
     esperar_tabla_cargada,
     hacer_click_esperando,
     seleccionar_opcion_por_valor,
     es_ultima_pagina,
-    click_siguiente_pagina
+    click_siguiente_pagina,
+    extraer_filas_html,
+    PoolDrivers
 )
+from scraping.utils.cliente_portlets import ClientePortlet
+from scraping.utils.cache_http import CacheHTTP
+from scraping.utils.escritura_incremental import EscritorCSVIncremental
 import logging
 logger = logging.getLogger(__name__)
 
 
 class GruposScraper:
-    def __init__(self, driver_path: str, legislatura: str = "15"):
+    # Recursos AJAX del portlet de grupos (modo 'http') y correspondencia columna -> campo del JSON devuelto
+    PORTLET_ID = "grupos"
+    RECURSO_GRUPOS_HTTP = "gruposLegislatura"
+    RECURSO_COMPOSICION_HTTP = "composicionGrupo"
+    CAMPOS_HTTP = {"nombre": "apellidosNombre", "fecha_alta": "fechaAlta", "fecha_baja": "fechaBaja"}
+    COLUMNAS = ["nombre", "grupo_parlamentario", "fecha_alta", "fecha_baja", "legislatura"]
+
+    def __init__(self, driver_path: str, legislatura: str = "15", pool: Optional[PoolDrivers] = None,
+                 modo_descarga: str = "navegador", tamano_pagina: int = 50, num_workers: int = 4,
+                 grupos_en_paralelo: int = 1, cache: Optional[CacheHTTP] = None, reanudar: bool = True):
+        """
+        :param driver_path: Ruta al ejecutable de ChromeDriver.
+        :param legislatura: Número de la legislatura.
+        :param pool: Pool de navegadores compartido (opcional).
+        :param modo_descarga: 'navegador' (paginación en Chrome) o 'http' (recursos AJAX del portlet).
+        :param tamano_pagina: Registros por página pedidos en modo 'http'.
+        :param num_workers: Páginas de un mismo grupo pedidas en paralelo en modo 'http'.
+        :param grupos_en_paralelo: Grupos procesados a la vez (navegadores o hilos HTTP); 1 = secuencial.
+        :param cache: Caché HTTP en disco (opcional) para las consultas en modo 'http'.
+        :param reanudar: Si una ejecución anterior se interrumpió, continúa por el primer grupo sin guardar.
+        """
         self.url_base = "https://www.congreso.es/es/grupos/composicion-en-la-legislatura"
         self.driver_path = driver_path
         self.legislatura = legislatura
+        self.pool = pool
+        self.modo_descarga = modo_descarga
+        self.tamano_pagina = tamano_pagina
+        self.num_workers = num_workers
+        self.grupos_en_paralelo = grupos_en_paralelo
+        self.cache = cache
+        self.reanudar = reanudar
         self.driver = None
         self.wait = None
 
     def _init_driver(self):
-        self.driver, self.wait = iniciar_driver(self.driver_path, headless=True)
+        self.driver, self.wait = obtener_driver(self.driver_path, self.pool)
+
+    def _liberar_driver(self):
+        liberar_driver(self.driver, self.wait, self.pool)
 
     def _extraer_info_legislatura(self):
         self.driver.get(self.url_base)
@@ -46,39 +83,46 @@ class GruposScraper:
         resultado = [(enlace.text.strip().split(':')[0], enlace.get_attribute("href")) for enlace in enlaces]
         return resultado
 
-    def _extraer_altas_bajas(self, grupo_nombre: str, url: str):
+    def _extraer_altas_bajas(self, grupo_nombre: str, url: str, driver=None, wait=None):
         """
         Accede a la página del grupo parlamentario y extrae los datos de altas y bajas de sus diputados.
 
         :param grupo_nombre: Nombre del grupo parlamentario (ej. 'PSOE').
         :param url: URL específica del grupo parlamentario.
+        :param driver: Navegador a usar (por defecto, el del scraper); en modo paralelo, el del hilo.
+        :param wait: WebDriverWait asociado al navegador.
         :return: Lista de diccionarios con nombre, fecha_alta y fecha_baja.
         """
-        self.driver.get(url)
-        esperar_spinner(self.wait)
+        driver = driver or self.driver
+        wait = wait or self.wait
+        driver.get(url)
+        # Un navegador recién arrancado para un hilo aún no ha aceptado el banner de cookies
+        aceptar_cookies(driver, wait)
+        esperar_spinner(wait)
 
         try:
             # Hacer clic en el radio "Altas y bajas"
-            hacer_click_esperando(self.driver, self.wait, By.ID, "_grupos_altaBajaA")
-            esperar_spinner(self.wait)
-            self.wait.until(EC.presence_of_element_located((By.ID, "_grupos_ajaxContentDiputados")))
-            esperar_tabla_cargada(self.wait, "#_grupos_contentPaginationDiputados table tbody tr")
+            hacer_click_esperando(driver, wait, By.ID, "_grupos_altaBajaA")
+            esperar_spinner(wait)
+            wait.until(EC.presence_of_element_located((By.ID, "_grupos_ajaxContentDiputados")))
+            esperar_tabla_cargada(wait, "#_grupos_contentPaginationDiputados table tbody tr")
         except Exception as e:
             logger.error(f"No se pudo seleccionar 'Altas y bajas' para {grupo_nombre}: {e}")
             return []
 
         datos = []
         while True:
-            filas = self.driver.find_elements(By.CSS_SELECTOR, "#_grupos_contentPaginationDiputados table tbody tr")
+            filas = extraer_filas_html(driver, By.CSS_SELECTOR, "#_grupos_contentPaginationDiputados table tbody tr")
             for fila in filas:
                 try:
                     # Nombre en <th>
-                    nombre = fila.find_element(By.TAG_NAME, "th").text.strip()
+                    cabeceras = fila["cabeceras"]
+                    nombre = cabeceras[0]["texto"].strip() if cabeceras else ""
 
                     # Fechas en <td>
-                    columnas = fila.find_elements(By.TAG_NAME, "td")
-                    fecha_alta = columnas[0].text.strip() if len(columnas) > 0 else ""
-                    fecha_baja = columnas[1].text.strip() if len(columnas) > 1 else ""
+                    columnas = fila["celdas"]
+                    fecha_alta = columnas[0]["texto"].strip() if len(columnas) > 0 else ""
+                    fecha_baja = columnas[1]["texto"].strip() if len(columnas) > 1 else ""
 
                     if nombre:
                         datos.append({
@@ -92,12 +136,12 @@ class GruposScraper:
                     logger.error(f"Error al procesar fila en {grupo_nombre}: {e}")
                     continue
 
-            if es_ultima_pagina(self.driver, "_grupos_resultsShowedFooterDiputados"):
+            if es_ultima_pagina(driver, "_grupos_resultsShowedFooterDiputados"):
                 break
 
             if not click_siguiente_pagina(
-                    driver=self.driver,
-                    wait=self.wait,
+                    driver=driver,
+                    wait=wait,
                     xpath_siguiente="//ul[@id='_grupos_paginationLinksDiputados']//a[text()='>']",
                     by_tabla=By.CSS_SELECTOR,
                     selector_tabla="#_grupos_contentPaginationDiputados table tbody tr",
@@ -107,19 +151,132 @@ class GruposScraper:
 
         return datos
 
+    def _cliente_http(self, recurso: str) -> ClientePortlet:
+        return ClientePortlet(self.url_base, self.PORTLET_ID, recurso, tamano_pagina=self.tamano_pagina,
+                              num_workers=self.num_workers, cache=self.cache)
+
+    @staticmethod
+    def _guardar_grupo(escritor: EscritorCSVIncremental, nombre_grupo: str, datos: list[dict]):
+        """Escribe las filas de un grupo y lo marca como completado en el checkpoint."""
+        escritor.escribir(datos, grupos=escritor.estado.get("grupos", []) + [nombre_grupo])
+
+    @staticmethod
+    def _nombre_grupo_http(grupo: dict) -> str:
+        return str(grupo.get("nombre", "")).split(':')[0].strip()
+
+    def _obtener_grupos_http(self, escritor: EscritorCSVIncremental):
+        """
+        Obtiene las altas y bajas de los grupos pendientes pidiendo directamente los recursos AJAX del portlet,
+        y las escribe grupo a grupo.
+
+        :param escritor: CSV incremental de salida.
+        """
+        with self._cliente_http(self.RECURSO_GRUPOS_HTTP) as cliente:
+            grupos = cliente.obtener_todo({"idLegislatura": self.legislatura})
+            cliente.comprobar_campos(grupos, ("idGrupo", "nombre"))
+        if not grupos:
+            raise ValueError(f"El recurso {self.RECURSO_GRUPOS_HTTP} no devolvió grupos para la legislatura "
+                             f"{self.legislatura}")
+
+        hechos = set(escritor.estado.get("grupos", []))
+        grupos = [grupo for grupo in grupos if self._nombre_grupo_http(grupo) not in hechos]
+
+        with self._cliente_http(self.RECURSO_COMPOSICION_HTTP) as cliente:
+            # pool.map conserva el orden de los grupos aunque terminen en distinto orden
+            with ThreadPoolExecutor(max_workers=max(1, self.grupos_en_paralelo)) as pool:
+                por_grupo = pool.map(lambda grupo: self._altas_bajas_http(cliente, grupo), grupos)
+                for grupo, datos in zip(grupos, por_grupo):
+                    self._guardar_grupo(escritor, self._nombre_grupo_http(grupo), datos)
+
+    def _altas_bajas_http(self, cliente: ClientePortlet, grupo: dict) -> list[dict]:
+        """
+        Pide las altas y bajas de un grupo al recurso de composición.
+
+        :param cliente: Cliente del recurso de composición de grupos.
+        :param grupo: Registro del grupo devuelto por el recurso de grupos (idGrupo y nombre).
+        :return: Lista de diccionarios con nombre, grupo_parlamentario, fecha_alta, fecha_baja y legislatura.
+        """
+        nombre_grupo = self._nombre_grupo_http(grupo)
+        logger.info(f"Procesando grupo: {nombre_grupo}")
+        filtros = {"idLegislatura": self.legislatura, "idGrupo": grupo.get("idGrupo", ""), "altaBaja": "A"}
+        registros = cliente.obtener_todo(filtros)
+        cliente.comprobar_campos(registros, self.CAMPOS_HTTP.values())
+        datos = []
+        for registro in registros:
+            fila = {columna: str(registro.get(campo) or "").strip() for columna, campo in self.CAMPOS_HTTP.items()}
+            if fila["nombre"]:
+                datos.append({
+                    "nombre": fila["nombre"],
+                    "grupo_parlamentario": nombre_grupo,
+                    "fecha_alta": fila["fecha_alta"],
+                    "fecha_baja": fila["fecha_baja"],
+                    "legislatura": self.legislatura
+                })
+        logger.info(f"  -> {len(registros)} diputados extraídos de {nombre_grupo}")
+        return datos
+
     def ejecutar(self, output_csv="altas_bajas_grupos.csv"):
+        """
+        Extrae las altas y bajas de todos los grupos y las guarda en CSV grupo a grupo, sin acumularlas
+        en memoria. Si una ejecución anterior se interrumpió, continúa por el primer grupo sin guardar.
+
+        :param output_csv: Ruta del CSV de salida.
+        """
+        escritor = EscritorCSVIncremental(output_csv, self.COLUMNAS, reanudar=self.reanudar,
+                                          clave=self.modo_descarga)
+        try:
+            if self.modo_descarga == "http":
+                logger.info("Accediendo a grupos parlamentarios por HTTP...")
+                self._obtener_grupos_http(escritor)
+            else:
+                self._obtener_grupos_navegador(escritor)
+            escritor.finalizar()
+        finally:
+            escritor.close()
+        logger.info(f"Guardado CSV con {escritor.filas} filas en {output_csv}")
+
+    def _obtener_grupos_navegador(self, escritor: EscritorCSVIncremental):
         self._init_driver()
         logger.info("Accediendo a grupos parlamentarios...")
-        enlaces_grupos = self._extraer_info_legislatura()
+        hechos = set(escritor.estado.get("grupos", []))
+        enlaces_grupos = [enlace for enlace in self._extraer_info_legislatura() if enlace[0] not in hechos]
+
+        if self.grupos_en_paralelo > 1:
+            self._obtener_grupos_en_paralelo(enlaces_grupos, escritor)
+            return
 
-        todos_los_datos = []
         for nombre_grupo, url in enlaces_grupos:
             logger.info(f"Procesando grupo: {nombre_grupo}")
             datos = self._extraer_altas_bajas(nombre_grupo, url)
             logger.info(f"  -> {len(datos)} diputados extraídos")
-            todos_los_datos.extend(datos)
+            self._guardar_grupo(escritor, nombre_grupo, datos)
+
+        self._liberar_driver()
+
+    def _obtener_grupos_en_paralelo(self, enlaces_grupos: list[tuple[str, str]], escritor: EscritorCSVIncremental):
+        """
+        Reparte los grupos entre varios navegadores, cada uno paginando la tabla de un grupo.
+        El navegador que listó los grupos vuelve al pool y lo aprovecha el primer hilo.
+        Cada grupo se escribe en cuanto terminan él y los anteriores, en el orden de enlaces_grupos.
 
-        self.driver.quit()
-        df = pd.DataFrame(todos_los_datos)
-        df.to_csv(output_csv, index=False, encoding="utf-8")
-        logger.info(f"Guardado CSV con {len(df)} filas en {output_csv}")
\ No newline at end of file
+        :param enlaces_grupos: Lista de tuplas (nombre del grupo, URL).
+        :param escritor: CSV incremental de salida.
+        """
+        pool = self.pool or PoolDrivers(self.driver_path, max_drivers=self.grupos_en_paralelo)
+        pool.devolver(self.driver, self.wait)
+        logger.info(f"Procesando {len(enlaces_grupos)} grupos con {self.grupos_en_paralelo} navegadores...")
+
+        def procesar(enlace: tuple[str, str]) -> list[dict]:
+            nombre_grupo, url = enlace
+            with pool.driver() as (driver, wait):
+                datos = self._extraer_altas_bajas(nombre_grupo, url, driver, wait)
+            logger.info(f"  -> {len(datos)} diputados extraídos de {nombre_grupo}")
+            return datos
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.grupos_en_paralelo) as ejecutor:
+                for (nombre_grupo, _), datos in zip(enlaces_grupos, ejecutor.map(procesar, enlaces_grupos)):
+                    self._guardar_grupo(escritor, nombre_grupo, datos)
+        finally:
+            if pool is not self.pool:
+                pool.cerrar()
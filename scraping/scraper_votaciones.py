@@ -0,0 +1,135 @@
+# scraping/scraper_votaciones.py
+
+import json
+import os
+from typing import Optional
+from urllib.parse import urljoin, urlparse, urlencode, parse_qsl, urlunparse
+import requests
+from bs4 import BeautifulSoup
+from scraping.utils.http_utils import crear_sesion_http
+from scraping.utils.cache_http import CacheHTTP
+from scraping.utils.descarga_concurrente import DescargadorConcurrente, LimitadorPeticiones
+import logging
+logger = logging.getLogger(__name__)
+
+
+def numero_romano(numero: int) -> str:
+    """Convierte un número de legislatura a números romanos (15 -> 'XV'), como aparece en la web del Congreso."""
+    valores = [(10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+    resultado = ""
+    for valor, simbolo in valores:
+        while numero >= valor:
+            resultado += simbolo
+            numero -= valor
+    return resultado
+
+
+class VotacionesScraper:
+    """
+    Descarga los ficheros JSON de votaciones de una legislatura desde los datos abiertos del Congreso.
+    No necesita navegador: la página índice y los JSON se piden con una sesión HTTP.
+    """
+
+    URL_INDICE = "https://www.congreso.es/es/opendata/votaciones"
+    # Parámetro de la página de datos abiertos que filtra por legislatura (en números romanos, p. ej. 'XV')
+    PARAM_LEGISLATURA = "targetLegislatura"
+
+    def __init__(self, output_dir: str, legislatura: str = "15", url_indice: Optional[str] = None,
+                 num_workers: int = 4, peticiones_por_segundo: float = 2.0, cache: Optional[CacheHTTP] = None):
+        """
+        :param output_dir: Directorio donde se guardarán los JSON (p. ej. 'votaciones/15').
+        :param legislatura: Número de la legislatura.
+        :param url_indice: Página con los enlaces a los JSON de votaciones (por defecto, la de datos abiertos).
+                           Se le añade el filtro de la legislatura.
+        :param num_workers: Número de descargas en paralelo.
+        :param peticiones_por_segundo: Límite de peticiones por segundo al servidor.
+        :param cache: Caché HTTP en disco (opcional) para la página índice y los JSON.
+        """
+        self.output_dir = output_dir
+        self.legislatura = legislatura
+        self.url_indice = self._url_con_legislatura(url_indice or self.URL_INDICE)
+        self.num_workers = num_workers
+        self.peticiones_por_segundo = peticiones_por_segundo
+        self.cache = cache
+        self.session = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _url_con_legislatura(self, url: str) -> str:
+        """Añade (o sustituye) en la URL del índice el filtro de la legislatura."""
+        partes = urlparse(url)
+        parametros = dict(parse_qsl(partes.query))
+        parametros[self.PARAM_LEGISLATURA] = numero_romano(int(self.legislatura))
+        return urlunparse(partes._replace(query=urlencode(parametros)))
+
+    def _es_de_la_legislatura(self, datos: dict) -> bool:
+        """
+        Comprueba que una votación pertenece a la legislatura pedida, si el JSON la indica.
+
+        :param datos: JSON de la votación.
+        :return: False si el JSON declara otra legislatura.
+        """
+        legislatura = (datos.get("informacion") or {}).get("legislatura")
+        if legislatura in (None, ""):
+            return True
+        legislatura = str(legislatura).strip().upper()
+        return legislatura in (str(self.legislatura), numero_romano(int(self.legislatura)))
+
+    def _listar_votaciones(self) -> list[tuple[str, str]]:
+        """
+        Lee la página índice y devuelve los enlaces a ficheros JSON de votaciones.
+
+        :return: Lista de tuplas (nombre de archivo, URL absoluta), sin duplicados.
+        """
+        respuesta = self.session.get(self.url_indice, timeout=30)
+        respuesta.raise_for_status()
+        soup = BeautifulSoup(respuesta.content, "lxml")
+        enlaces = {}
+        for enlace in soup.select("a[href]"):
+            url = urljoin(self.url_indice, enlace["href"])
+            nombre = os.path.basename(urlparse(url).path)
+            if nombre.lower().endswith(".json"):
+                enlaces.setdefault(nombre, url)
+        return sorted(enlaces.items())
+
+    def _descargar_votacion(self, nombre: str, url: str) -> bool:
+        """
+        Descarga un JSON de votación y lo guarda tras comprobar que es JSON válido.
+
+        :param nombre: Nombre del archivo destino.
+        :param url: URL del JSON.
+        :return: True si se guardó correctamente.
+        """
+        try:
+            respuesta = self.session.get(url, timeout=30)
+            respuesta.raise_for_status()
+            datos = json.loads(respuesta.content)
+            if not self._es_de_la_legislatura(datos):
+                logger.error(f"La votación {nombre} no es de la legislatura {self.legislatura}; se descarta.")
+                return False
+            ruta = os.path.join(self.output_dir, nombre)
+            with open(ruta, "wb") as f:
+                f.write(respuesta.content)
+            logger.info(f"Votación guardada: {nombre}")
+            return True
+        except (requests.RequestException, ValueError, OSError) as e:
+            logger.error(f"Error descargando la votación {nombre}: {e}")
+            return False
+
+    def ejecutar(self) -> int:
+        """
+        Descarga los JSON de votaciones que aún no estén en el directorio de salida.
+
+        :return: Número de votaciones descargadas.
+        """
+        self.session = crear_sesion_http(tamano_pool=max(10, self.num_workers), cache=self.cache)
+        try:
+            pendientes = [(nombre, url) for nombre, url in self._listar_votaciones()
+                          if not os.path.exists(os.path.join(self.output_dir, nombre))]
+            logger.info(f"{len(pendientes)} votaciones pendientes de descargar.")
+            limitador = LimitadorPeticiones(self.peticiones_por_segundo)
+            with DescargadorConcurrente(self._descargar_votacion, self.num_workers, limitador) as descargador:
+                for nombre, url in pendientes:
+                    descargador.encolar(nombre, url)
+            return descargador.descargados
+        finally:
+            self.session.close()
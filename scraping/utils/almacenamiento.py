@@ -0,0 +1,220 @@
+# scraping/utils/almacenamiento.py
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Iterator, Optional
+import logging
+logger = logging.getLogger(__name__)
+
+
+class AlmacenDiarios:
+    """
+    Almacén de diarios de sesiones en disco: un archivo HTML sin comprimir por CVE.
+    Es la base del resto de almacenes, que comparten la misma API de lectura y escritura.
+    """
+
+    EXTENSION = ".html"
+
+    def __init__(self, directorio: str):
+        """
+        :param directorio: Directorio de la legislatura (p. ej. 'diarios_html/15').
+        """
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta(self, cve: str) -> str:
+        """Devuelve la ruta en la que este almacén guarda el diario indicado."""
+        return os.path.join(self.directorio, f"{cve}{self.EXTENSION}")
+
+    def close(self):
+        """Libera los recursos del almacén (los almacenes de archivos no mantienen ninguno abierto)."""
+
+    def localizar(self, cve: str) -> Optional[str]:
+        """
+        Devuelve la ruta del archivo del diario si existe. Se aceptan también los .html
+        sin comprimir de descargas anteriores, para poder cambiar de almacén sin volver a descargar.
+        """
+        for ruta in (self.ruta(cve), os.path.join(self.directorio, f"{cve}.html")):
+            if ruta and os.path.exists(ruta):
+                return ruta
+        return None
+
+    def existe(self, cve: str) -> bool:
+        """Indica si el diario está guardado."""
+        return self.localizar(cve) is not None
+
+    def guardar(self, cve: str, contenido: str) -> str:
+        """
+        Guarda el HTML de un diario.
+
+        :param cve: Código del diario (p. ej. 'DSCD-15-PL-1').
+        :param contenido: HTML del diario.
+        :return: Ruta del archivo escrito.
+        """
+        ruta = self.ruta(cve)
+        self._escribir(ruta, self._codificar(contenido.encode("utf-8")))
+        return ruta
+
+    def abrir(self, cve: str):
+        """
+        Abre el diario como flujo binario de HTML descomprimido, para leerlo por partes.
+
+        :param cve: Código del diario.
+        :return: Objeto tipo archivo en modo binario.
+        :raises FileNotFoundError: Si el diario no está guardado.
+        """
+        ruta = self.localizar(cve)
+        if ruta is None:
+            raise FileNotFoundError(f"No existe el diario {cve} en {self.directorio}")
+        return abrir_archivo(ruta)
+
+    def leer(self, cve: str) -> str:
+        """
+        Lee el HTML completo de un diario.
+
+        :param cve: Código del diario.
+        :return: HTML como texto.
+        """
+        with self.abrir(cve) as f:
+            return f.read().decode("utf-8")
+
+    def cves(self) -> list[str]:
+        """Devuelve los CVE de todos los diarios guardados, ordenados."""
+        encontrados = set()
+        for nombre in os.listdir(self.directorio):
+            for extension in (".html.gz", ".html"):
+                if nombre.endswith(extension):
+                    encontrados.add(nombre[:-len(extension)])
+                    break
+        return sorted(encontrados)
+
+    def iterar(self) -> Iterator[tuple[str, str]]:
+        """Recorre los diarios guardados devolviendo tuplas (cve, html)."""
+        for cve in self.cves():
+            yield cve, self.leer(cve)
+
+    def _codificar(self, datos: bytes) -> bytes:
+        return datos
+
+    @staticmethod
+    def _escribir(ruta: str, datos: bytes):
+        """Escribe de forma atómica: primero en un temporal y después se renombra."""
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+
+class AlmacenGzip(AlmacenDiarios):
+    """Almacén que guarda cada diario comprimido con gzip (<cve>.html.gz)."""
+
+    EXTENSION = ".html.gz"
+
+    def _codificar(self, datos: bytes) -> bytes:
+        # mtime=0 para que el mismo HTML produzca siempre los mismos bytes (y el mismo hash)
+        return gzip.compress(datos, compresslevel=6, mtime=0)
+
+
+class AlmacenContenido(AlmacenGzip):
+    """
+    Almacén direccionado por contenido: cada HTML distinto se guarda una sola vez,
+    comprimido, en objetos/<xx>/<sha256>.html.gz, y un índice SQLite asocia cada CVE con su hash.
+    Los diarios republicados sin cambios no ocupan espacio adicional.
+    """
+
+    NOMBRE_INDICE = "indice_contenido.sqlite"
+
+    def __init__(self, directorio: str):
+        super().__init__(directorio)
+        self.directorio_objetos = os.path.join(directorio, "objetos")
+        os.makedirs(self.directorio_objetos, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(os.path.join(directorio, self.NOMBRE_INDICE), check_same_thread=False)
+        self._conexion.execute("CREATE TABLE IF NOT EXISTS contenidos (cve TEXT PRIMARY KEY, sha256 TEXT NOT NULL)")
+        self._conexion.commit()
+
+    def close(self):
+        """Cierra el índice del almacén."""
+        with self._lock:
+            self._conexion.close()
+
+    def _hash(self, cve: str) -> Optional[str]:
+        with self._lock:
+            fila = self._conexion.execute("SELECT sha256 FROM contenidos WHERE cve = ?", (cve,)).fetchone()
+        return fila[0] if fila else None
+
+    def _ruta_objeto(self, sha256: str) -> str:
+        return os.path.join(self.directorio_objetos, sha256[:2], f"{sha256}{self.EXTENSION}")
+
+    def ruta(self, cve: str) -> Optional[str]:
+        sha256 = self._hash(cve)
+        return self._ruta_objeto(sha256) if sha256 else None
+
+    def guardar(self, cve: str, contenido: str) -> str:
+        datos = contenido.encode("utf-8")
+        sha256 = hashlib.sha256(datos).hexdigest()
+        ruta = self._ruta_objeto(sha256)
+        if os.path.exists(ruta):
+            logger.info(f"Contenido de {cve} idéntico a un diario ya guardado; no se duplica.")
+        else:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            self._escribir(ruta, self._codificar(datos))
+        with self._lock:
+            self._conexion.execute("INSERT OR REPLACE INTO contenidos (cve, sha256) VALUES (?, ?)", (cve, sha256))
+            self._conexion.commit()
+        return ruta
+
+    def cves(self) -> list[str]:
+        with self._lock:
+            indexados = {fila[0] for fila in self._conexion.execute("SELECT cve FROM contenidos")}
+        return sorted(indexados | set(super().cves()))
+
+
+ALMACENES = {
+    "html": AlmacenDiarios,
+    "gzip": AlmacenGzip,
+    "contenido": AlmacenContenido,
+}
+
+
+def crear_almacen(directorio: str, tipo: str = "html") -> AlmacenDiarios:
+    """
+    Crea el almacén de diarios del tipo indicado.
+
+    :param directorio: Directorio de la legislatura.
+    :param tipo: 'html' (sin comprimir), 'gzip' o 'contenido' (direccionado por contenido y deduplicado).
+    :return: Instancia del almacén.
+    """
+    if tipo not in ALMACENES:
+        raise ValueError(f"Tipo de almacenamiento no válido: {tipo}")
+    return ALMACENES[tipo](directorio)
+
+
+def abrir_almacen(directorio: str) -> AlmacenDiarios:
+    """
+    Abre para lectura el almacén de un directorio detectando su tipo por los archivos que contiene.
+    Es el punto de entrada para el código de análisis: la lectura es transparente a la compresión.
+
+    :param directorio: Directorio de la legislatura.
+    :return: Instancia del almacén adecuado.
+    """
+    if os.path.exists(os.path.join(directorio, AlmacenContenido.NOMBRE_INDICE)):
+        return AlmacenContenido(directorio)
+    if os.path.isdir(directorio) and any(n.endswith(AlmacenGzip.EXTENSION) for n in os.listdir(directorio)):
+        return AlmacenGzip(directorio)
+    return AlmacenDiarios(directorio)
+
+
+def abrir_archivo(ruta: str):
+    """
+    Abre un archivo de diario en modo binario, descomprimiéndolo si es gzip.
+
+    :param ruta: Ruta del archivo (.html o .html.gz).
+    :return: Objeto tipo archivo en modo binario.
+    """
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, "rb")
+    return open(ruta, "rb")
@@ -0,0 +1,195 @@
+# scraping/utils/cache_http.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+import logging
+logger = logging.getLogger(__name__)
+
+
+class CacheHTTP:
+    """
+    Caché en disco (SQLite) de respuestas HTTP GET.
+    Cada respuesta se sirve desde disco mientras no supere su TTL. Una vez caducada, se revalida con
+    If-None-Match / If-Modified-Since si el servidor envió ETag o Last-Modified, y un 304 la renueva sin
+    volver a descargar el cuerpo. Cuando el tamaño total supera el máximo, se eliminan las respuestas
+    usadas hace más tiempo (LRU). Es segura para usarse desde varios hilos, y varios procesos pueden
+    compartir el mismo directorio.
+    """
+
+    NOMBRE_ARCHIVO = "cache_http.sqlite"
+    # requests ya ha descomprimido el cuerpo: estas cabeceras no describen lo que se guarda
+    CABECERAS_DESCARTADAS = {"content-encoding", "content-length", "transfer-encoding"}
+
+    def __init__(self, directorio: str, ttl: float = 86400, max_bytes: int = 500 * 1024 * 1024):
+        """
+        Abre (o crea) la caché en el directorio indicado.
+
+        :param directorio: Directorio de la caché (p. ej. 'cache_http').
+        :param ttl: Segundos durante los que una respuesta se sirve sin consultar al servidor.
+        :param max_bytes: Tamaño máximo de los cuerpos guardados; al superarlo se eliminan los menos usados.
+        """
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta = os.path.join(directorio, self.NOMBRE_ARCHIVO)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False, timeout=30)
+        self._conexion.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS respuestas (
+                url TEXT PRIMARY KEY,
+                estado INTEGER NOT NULL,
+                cabeceras TEXT NOT NULL,
+                cuerpo BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                guardado_en REAL NOT NULL,
+                usado_en REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS respuestas_usado_en ON respuestas (usado_en);
+        """)
+        self._conexion.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra la conexión con la base de datos de la caché."""
+        with self._lock:
+            self._conexion.close()
+
+    def obtener(self, url: str) -> Optional[dict]:
+        """
+        Devuelve la respuesta guardada para una URL y la marca como usada.
+
+        :param url: URL completa de la petición (con sus parámetros).
+        :return: Diccionario con estado, cabeceras, cuerpo, etag, last_modified y fresca
+                 (True si no ha superado el TTL), o None si no está en caché.
+        """
+        with self._lock, self._conexion:
+            fila = self._conexion.execute(
+                "SELECT estado, cabeceras, cuerpo, etag, last_modified, guardado_en FROM respuestas WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if fila is None:
+                return None
+            self._conexion.execute("UPDATE respuestas SET usado_en = ? WHERE url = ?", (time.time(), url))
+        estado, cabeceras, cuerpo, etag, last_modified, guardado_en = fila
+        return {
+            "estado": estado,
+            "cabeceras": json.loads(cabeceras),
+            "cuerpo": cuerpo,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresca": time.time() - guardado_en < self.ttl,
+        }
+
+    def guardar(self, url: str, respuesta: requests.Response):
+        """
+        Guarda una respuesta y, si se supera el tamaño máximo, elimina las menos usadas.
+
+        :param url: URL completa de la petición.
+        :param respuesta: Respuesta HTTP (ya leída) a guardar.
+        """
+        ahora = time.time()
+        cuerpo = respuesta.content
+        cabeceras = {k: v for k, v in respuesta.headers.items() if k.lower() not in self.CABECERAS_DESCARTADAS}
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas "
+                "(url, estado, cabeceras, cuerpo, tamano, etag, last_modified, guardado_en, usado_en) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, respuesta.status_code, json.dumps(cabeceras), cuerpo, len(cuerpo),
+                 respuesta.headers.get("ETag"), respuesta.headers.get("Last-Modified"), ahora, ahora)
+            )
+            self._expulsar()
+
+    def renovar(self, url: str):
+        """Reinicia el TTL de una respuesta que el servidor ha confirmado como vigente (304)."""
+        ahora = time.time()
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "UPDATE respuestas SET guardado_en = ?, usado_en = ? WHERE url = ?", (ahora, ahora, url)
+            )
+
+    def tamano_total(self) -> int:
+        """Devuelve el tamaño en bytes de los cuerpos guardados."""
+        with self._lock:
+            return self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+
+    def _expulsar(self):
+        total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        expulsadas = []
+        for url, tamano in self._conexion.execute("SELECT url, tamano FROM respuestas ORDER BY usado_en"):
+            if total <= self.max_bytes:
+                break
+            expulsadas.append((url,))
+            total -= tamano
+        self._conexion.executemany("DELETE FROM respuestas WHERE url = ?", expulsadas)
+        logger.info(f"Caché HTTP: {len(expulsadas)} respuestas eliminadas por tamaño")
+
+
+class AdaptadorCache(HTTPAdapter):
+    """
+    Adaptador de requests que sirve las peticiones GET desde una CacheHTTP.
+    Se monta en la sesión en lugar del HTTPAdapter normal, así que todas las descargas que usan esa
+    sesión pasan por la caché sin cambiar su código. Solo se guardan las respuestas 200 completas
+    (no las pedidas con stream=True ni las marcadas con Cache-Control: no-store).
+    """
+
+    def __init__(self, cache: CacheHTTP, **kwargs):
+        """
+        :param cache: Caché en disco a utilizar.
+        :param kwargs: Argumentos del HTTPAdapter (pool_connections, pool_maxsize, max_retries...).
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET" or kwargs.get("stream"):
+            return super().send(request, **kwargs)
+
+        guardada = self.cache.obtener(request.url)
+        if guardada and guardada["fresca"]:
+            return self._respuesta_guardada(request, guardada)
+        if guardada:
+            if guardada["etag"]:
+                request.headers["If-None-Match"] = guardada["etag"]
+            if guardada["last_modified"]:
+                request.headers["If-Modified-Since"] = guardada["last_modified"]
+
+        respuesta = super().send(request, **kwargs)
+        if respuesta.status_code == 304 and guardada:
+            self.cache.renovar(request.url)
+            return self._respuesta_guardada(request, guardada)
+        if respuesta.status_code == 200 and "no-store" not in respuesta.headers.get("Cache-Control", ""):
+            self.cache.guardar(request.url, respuesta)
+        return respuesta
+
+    @staticmethod
+    def _respuesta_guardada(request: requests.PreparedRequest, guardada: dict) -> requests.Response:
+        respuesta = requests.Response()
+        respuesta.status_code = guardada["estado"]
+        respuesta.headers = CaseInsensitiveDict(guardada["cabeceras"])
+        respuesta._content = guardada["cuerpo"]
+        respuesta.encoding = get_encoding_from_headers(respuesta.headers)
+        respuesta.url = request.url
+        respuesta.request = request
+        respuesta.reason = "OK"
+        respuesta.from_cache = True
+        return respuesta
@@ -0,0 +1,164 @@
+# scraping/utils/cliente_portlets.py
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+import requests
+from scraping.utils.http_utils import crear_sesion_http
+from scraping.utils.cache_http import CacheHTTP
+from scraping.utils.descarga_concurrente import LimitadorPeticiones
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ClientePortlet:
+    """
+    Cliente HTTP para los recursos AJAX de los portlets Liferay de la web del Congreso
+    (búsqueda de diputados, composición de grupos, sustituciones...).
+    Llama directamente a la URL de recurso que usa la página para cargar cada página de la tabla,
+    sin navegador, con una sesión HTTP con pool de conexiones y las páginas pedidas en paralelo.
+    Los identificadores de recurso, los parámetros de paginación y los campos del JSON que usan los
+    scrapers no se han contrastado todavía con respuestas grabadas de la web, así que main.py no
+    expone este camino ('--descarga http' se rechaza en diputados y grupos).
+    """
+
+    # Nombres (sin el prefijo del portlet) de los parámetros de paginación del recurso
+    PARAM_PAGINA = "paginaActual"
+    PARAM_TAMANO = "registrosPorPagina"
+
+    def __init__(self, url_pagina: str, portlet_id: str, recurso: str, session: Optional[requests.Session] = None,
+                 tamano_pagina: int = 50, num_workers: int = 4, peticiones_por_segundo: float = 2.0,
+                 clave_datos: str = "data", clave_total: str = "total", timeout: int = 30,
+                 cache: Optional[CacheHTTP] = None):
+        """
+        :param url_pagina: URL de la página que contiene el portlet (p. ej. 'https://www.congreso.es/busqueda-de-diputados').
+        :param portlet_id: Identificador del portlet (p. ej. 'diputadomodule'); prefija los parámetros del formulario.
+        :param recurso: Identificador del recurso AJAX (p_p_resource_id, p. ej. 'searchDiputados').
+        :param session: Sesión HTTP a reutilizar. Si no se indica, se crea una con pool de conexiones.
+        :param tamano_pagina: Número de registros por página pedidos al servidor.
+        :param num_workers: Número de páginas pedidas en paralelo.
+        :param peticiones_por_segundo: Límite de peticiones por segundo (0 = sin límite).
+        :param clave_datos: Clave de la respuesta JSON con la lista de registros.
+        :param clave_total: Clave de la respuesta JSON con el número total de registros.
+        :param timeout: Tiempo máximo de cada petición en segundos.
+        :param cache: Caché HTTP en disco para la sesión propia (opcional; no se usa si se indica session).
+        """
+        self.url_pagina = url_pagina
+        self.portlet_id = portlet_id
+        self.recurso = recurso
+        self.session = session or crear_sesion_http(tamano_pool=max(10, num_workers), cache=cache)
+        self._session_propia = session is None
+        self.tamano_pagina = tamano_pagina
+        self.num_workers = num_workers
+        self.limitador = LimitadorPeticiones(peticiones_por_segundo)
+        self.clave_datos = clave_datos
+        self.clave_total = clave_total
+        self.timeout = timeout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra la sesión HTTP si la creó el propio cliente."""
+        if self._session_propia:
+            self.session.close()
+
+    def parametros(self, filtros: dict, pagina: int) -> dict:
+        """
+        Construye los parámetros de la petición de recurso de Liferay para una página.
+
+        :param filtros: Campos del formulario sin prefijo (p. ej. {'idLegislatura': '15'}).
+        :param pagina: Número de página (empezando en 1).
+        :return: Diccionario de parámetros de la URL.
+        """
+        prefijo = f"_{self.portlet_id}_"
+        parametros = {
+            "p_p_id": self.portlet_id,
+            "p_p_lifecycle": "2",
+            "p_p_state": "normal",
+            "p_p_mode": "view",
+            "p_p_resource_id": self.recurso,
+            "p_p_cacheability": "cacheLevelPage",
+        }
+        parametros.update({f"{prefijo}{clave}": valor for clave, valor in filtros.items()})
+        parametros[f"{prefijo}{self.PARAM_PAGINA}"] = str(pagina)
+        parametros[f"{prefijo}{self.PARAM_TAMANO}"] = str(self.tamano_pagina)
+        return parametros
+
+    def obtener_pagina(self, filtros: dict, pagina: int = 1) -> dict:
+        """
+        Pide una página del recurso.
+
+        :param filtros: Campos del formulario sin prefijo.
+        :param pagina: Número de página (empezando en 1).
+        :return: Respuesta JSON decodificada.
+        :raises requests.RequestException: Si la petición falla tras los reintentos de la sesión.
+        :raises ValueError: Si la respuesta no es JSON o no tiene el formato esperado.
+        """
+        self.limitador.esperar(self.url_pagina)
+        respuesta = self.session.get(self.url_pagina, params=self.parametros(filtros, pagina), timeout=self.timeout)
+        respuesta.raise_for_status()
+        datos = respuesta.json()
+        self._validar_respuesta(datos, pagina)
+        return datos
+
+    def _validar_respuesta(self, datos, pagina: int):
+        """
+        Comprueba que la respuesta tiene la lista de registros y el total, para no confundir un cambio
+        en el formato del recurso con un listado vacío.
+        """
+        if not isinstance(datos, dict):
+            raise ValueError(f"Respuesta inesperada de {self.recurso} (página {pagina}): no es un objeto JSON")
+        faltan = [clave for clave in (self.clave_datos, self.clave_total) if clave not in datos]
+        if faltan:
+            raise ValueError(f"Respuesta inesperada de {self.recurso} (página {pagina}): faltan las claves "
+                             f"{faltan}; claves recibidas: {sorted(datos)}")
+        if not isinstance(datos[self.clave_datos], list):
+            raise ValueError(f"Respuesta inesperada de {self.recurso} (página {pagina}): "
+                             f"'{self.clave_datos}' no es una lista")
+
+    def comprobar_campos(self, registros: list[dict], campos: Iterable[str]):
+        """
+        Comprueba que los registros traen los campos que se van a leer.
+
+        :param registros: Registros devueltos por el recurso.
+        :param campos: Campos del JSON que necesita el scraper.
+        :raises ValueError: Si a los registros les falta alguno de los campos.
+        """
+        if not registros:
+            return
+        faltan = [campo for campo in campos if campo not in registros[0]]
+        if faltan:
+            raise ValueError(f"Los registros de {self.recurso} no tienen los campos {faltan}; "
+                             f"campos recibidos: {sorted(registros[0])}")
+
+    def obtener_todo(self, filtros: dict) -> list[dict]:
+        """
+        Descarga todos los registros: pide la primera página para conocer el total
+        y el resto de páginas en paralelo, conservando el orden.
+
+        :param filtros: Campos del formulario sin prefijo.
+        :return: Lista con todos los registros de todas las páginas.
+        """
+        primera = self.obtener_pagina(filtros, 1)
+        registros = list(primera[self.clave_datos])
+        total = int(primera[self.clave_total] or 0)
+        if not registros:
+            if total:
+                raise ValueError(f"{self.recurso}: la primera página está vacía pero el total es {total}")
+            return registros
+        if len(registros) >= total:
+            # El recurso devolvió todo en una sola respuesta
+            return registros
+
+        num_paginas = -(-total // len(registros))
+        logger.info(f"{self.recurso}: {total} registros en {num_paginas} páginas")
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            paginas = pool.map(lambda p: self.obtener_pagina(filtros, p), range(2, num_paginas + 1))
+            for respuesta in paginas:
+                registros.extend(respuesta[self.clave_datos])
+        if len(registros) < total:
+            logger.warning(f"{self.recurso}: se obtuvieron {len(registros)} registros de {total}")
+        return registros
@@ -0,0 +1,122 @@
+# scraping/utils/descarga_concurrente.py
+
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+import logging
+logger = logging.getLogger(__name__)
+
+
+class LimitadorPeticiones:
+    """
+    Limita la tasa de peticiones por host, reservando un turno para cada petición.
+    Es seguro para usarse desde varios hilos a la vez.
+    """
+
+    def __init__(self, peticiones_por_segundo: float = 2.0, retardo_cortesia: float = 0.0):
+        """
+        :param peticiones_por_segundo: Máximo de peticiones por segundo a un mismo host (0 = sin límite).
+        :param retardo_cortesia: Segundos adicionales de espera entre peticiones consecutivas al mismo host.
+        """
+        self.intervalo = (1.0 / peticiones_por_segundo if peticiones_por_segundo else 0.0) + retardo_cortesia
+        self._proximo_turno = {}
+        self._lock = threading.Lock()
+
+    def esperar(self, url: str):
+        """
+        Bloquea el hilo actual hasta que le corresponda turno para pedir la URL indicada.
+
+        :param url: URL que se va a descargar.
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo_turno.get(host, ahora))
+            self._proximo_turno[host] = turno + self.intervalo
+        espera = turno - ahora
+        if espera > 0:
+            time.sleep(espera)
+
+
+class DescargadorConcurrente:
+    """
+    Etapa productor/consumidor: el paginador encola descargas (clave, url)
+    y un pool acotado de hilos las descarga y guarda mientras se sigue listando.
+    """
+
+    def __init__(self, funcion_descarga, num_workers: int = 4, limitador: LimitadorPeticiones = None,
+                 tamano_cola: int = None):
+        """
+        :param funcion_descarga: Función (clave, url) -> bool que descarga y guarda un elemento.
+        :param num_workers: Número de hilos descargando en paralelo.
+        :param limitador: Limitador de peticiones por host (opcional).
+        :param tamano_cola: Máximo de tareas pendientes antes de bloquear al productor (por defecto 4 por hilo).
+        """
+        self.funcion_descarga = funcion_descarga
+        self.num_workers = num_workers
+        self.limitador = limitador
+        self.cola = queue.Queue(maxsize=tamano_cola or num_workers * 4)
+        self.descargados = 0
+        self.fallidos = 0
+        self._lock = threading.Lock()
+        self._hilos = []
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finalizar()
+
+    def iniciar(self):
+        """Arranca los hilos consumidores."""
+        for i in range(self.num_workers):
+            hilo = threading.Thread(target=self._trabajar, name=f"descarga-{i + 1}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def encolar(self, clave: str, url: str):
+        """
+        Añade una descarga a la cola. Bloquea si la cola está llena.
+
+        :param clave: Identificador de la descarga (p. ej. el CVE del pleno).
+        :param url: URL a descargar.
+        """
+        self.cola.put((clave, url))
+
+    def finalizar(self) -> int:
+        """
+        Espera a que se vacíe la cola y detiene los hilos.
+
+        :return: Número de descargas completadas con éxito.
+        """
+        for _ in self._hilos:
+            self.cola.put(None)
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos = []
+        return self.descargados
+
+    def _trabajar(self):
+        """Bucle de cada hilo consumidor: toma tareas de la cola hasta recibir la señal de parada."""
+        while True:
+            tarea = self.cola.get()
+            try:
+                if tarea is None:
+                    return
+                clave, url = tarea
+                if self.limitador:
+                    self.limitador.esperar(url)
+                try:
+                    ok = self.funcion_descarga(clave, url)
+                except Exception as e:
+                    logger.error(f"Error descargando {clave}: {e}")
+                    ok = False
+                with self._lock:
+                    if ok:
+                        self.descargados += 1
+                    else:
+                        self.fallidos += 1
+            finally:
+                self.cola.task_done()
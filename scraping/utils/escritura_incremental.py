@@ -0,0 +1,129 @@
+# scraping/utils/escritura_incremental.py
+
+import csv
+import json
+import os
+import threading
+from typing import Iterable, Optional
+import logging
+logger = logging.getLogger(__name__)
+
+
+class EscritorCSVIncremental:
+    """
+    Escribe un CSV por bloques (una página o un grupo cada vez) en lugar de acumular todas las filas
+    en memoria. Mientras la ejecución está en curso, las filas se escriben en <ruta>.parcial y el progreso
+    en <ruta>.checkpoint.json; al finalizar, el parcial sustituye al CSV anterior de una vez, así que
+    un fallo nunca deja un CSV a medias en la ruta de salida.
+    El checkpoint registra también el tamaño del parcial tras el último bloque: si el proceso se interrumpe
+    a mitad de un bloque, al reanudar se recorta a ese tamaño para no duplicar filas.
+    Es seguro para usarse desde varios hilos.
+    """
+
+    def __init__(self, ruta: str, columnas: list[str], reanudar: bool = True, clave: str = ""):
+        """
+        Abre el CSV, reanudando la ejecución anterior si quedó a medias.
+
+        :param ruta: Ruta del CSV de salida (se escribe al finalizar).
+        :param columnas: Columnas del CSV, en orden.
+        :param reanudar: Si es False, se descarta el progreso anterior y se empieza de cero.
+        :param clave: Identifica el tipo de ejecución (p. ej. el modo de descarga); un checkpoint
+                      guardado con otra clave no se reanuda, porque sus páginas no son comparables.
+        """
+        self.ruta = ruta
+        self.ruta_parcial = f"{ruta}.parcial"
+        self.ruta_checkpoint = f"{ruta}.checkpoint.json"
+        self.columnas = columnas
+        self.clave = clave
+        self._lock = threading.Lock()
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        checkpoint = self._leer_checkpoint() if reanudar else None
+        parcial = self.ruta_parcial
+        if checkpoint and os.path.exists(parcial) and os.path.getsize(parcial) >= checkpoint["bytes"]:
+            self.estado = checkpoint["estado"]
+            self.filas = checkpoint["filas"]
+            # El checkpoint guarda bytes: se recorta en binario y se sigue escribiendo en modo texto al final
+            with open(parcial, "r+b") as binario:
+                binario.truncate(checkpoint["bytes"])
+            self._archivo = open(parcial, "a", encoding="utf-8", newline="")
+            logger.info(f"Reanudando {ruta} desde el checkpoint: {self.filas} filas ya guardadas ({self.estado})")
+        else:
+            self.estado = {}
+            self.filas = 0
+            self._archivo = open(parcial, "w", encoding="utf-8", newline="")
+        self._escritor = csv.DictWriter(self._archivo, fieldnames=columnas, extrasaction="ignore")
+        if self._archivo.tell() == 0:
+            self._escritor.writeheader()
+            self._sincronizar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra el CSV. El checkpoint se conserva hasta llamar a finalizar()."""
+        with self._lock:
+            if not self._archivo.closed:
+                self._archivo.close()
+
+    def escribir(self, filas: Iterable[dict], **estado):
+        """
+        Añade un bloque de filas al CSV y, una vez en disco, actualiza el checkpoint.
+
+        :param filas: Filas del bloque, como diccionarios con las columnas del CSV.
+        :param estado: Progreso a guardar en el checkpoint (p. ej. pagina=3 o grupos=[...]).
+        """
+        with self._lock:
+            filas = list(filas)
+            self._escritor.writerows(filas)
+            self._sincronizar()
+            self.filas += len(filas)
+            self.estado.update(estado)
+            self._guardar_checkpoint()
+
+    def finalizar(self):
+        """Mueve el parcial a la ruta de salida y elimina el checkpoint: ya no hay nada que reanudar."""
+        self.close()
+        os.replace(self.ruta_parcial, self.ruta)
+        self._eliminar(self.ruta_checkpoint)
+        logger.info(f"Guardadas {self.filas} filas en {self.ruta}")
+
+    def descartar(self):
+        """Elimina el parcial y el checkpoint, cuando las filas ya se han volcado a otro archivo."""
+        self.close()
+        self._eliminar(self.ruta_parcial)
+        self._eliminar(self.ruta_checkpoint)
+
+    @staticmethod
+    def _eliminar(ruta: str):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    def _sincronizar(self):
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+
+    def _leer_checkpoint(self) -> Optional[dict]:
+        try:
+            with open(self.ruta_checkpoint, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("clave") != self.clave or checkpoint.get("columnas") != self.columnas:
+            logger.info(f"Se descarta el checkpoint de {self.ruta}: es de otro tipo de ejecución")
+            return None
+        return checkpoint
+
+    def _guardar_checkpoint(self):
+        # Se escribe en un temporal y se renombra: el checkpoint nunca queda a medio escribir
+        temporal = f"{self.ruta_checkpoint}.tmp"
+        tamano = os.fstat(self._archivo.fileno()).st_size
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"clave": self.clave, "columnas": self.columnas, "bytes": tamano,
+                       "filas": self.filas, "estado": self.estado}, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta_checkpoint)
@@ -0,0 +1,106 @@
+# scraping/utils/http_utils.py
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+from scraping.utils.cache_http import AdaptadorCache, CacheHTTP
+import logging
+logger = logging.getLogger(__name__)
+
+
+def crear_sesion_http(driver=None, tamano_pool: int = 10, reintentos: int = 3,
+                      cache: Optional[CacheHTTP] = None) -> requests.Session:
+    """
+    Crea una sesión HTTP con un pool de conexiones persistentes (keep-alive) y reintentos.
+
+    :param driver: Instancia opcional del navegador Chrome de la que copiar cookies y User-Agent.
+    :param tamano_pool: Número máximo de conexiones abiertas por host.
+    :param reintentos: Número de reintentos ante errores de conexión o respuestas 429/5xx.
+    :param cache: Caché en disco opcional: las peticiones GET se sirven desde ella mientras sigan vigentes.
+    :return: Sesión de requests lista para descargar páginas.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=reintentos,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",)
+    )
+    opciones = dict(pool_connections=tamano_pool, pool_maxsize=tamano_pool, max_retries=retry)
+    adapter = AdaptadorCache(cache, **opciones) if cache else HTTPAdapter(**opciones)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if driver is not None:
+        copiar_cookies_driver(driver, session)
+    return session
+
+
+def copiar_cookies_driver(driver, session: requests.Session):
+    """
+    Copia las cookies y el User-Agent del navegador a la sesión HTTP.
+
+    :param driver: Instancia del navegador Chrome.
+    :param session: Sesión de requests destino.
+    """
+    try:
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        if user_agent:
+            session.headers["User-Agent"] = user_agent
+        for cookie in driver.get_cookies():
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/")
+            )
+        logger.info("Cookies del navegador copiadas a la sesión HTTP.")
+    except Exception as e:
+        logger.error(f"No se pudieron copiar las cookies del navegador: {e}")
+
+
+def crear_filtro_selector(selector: str) -> Optional[SoupStrainer]:
+    """
+    Traduce un selector CSS simple ('tag', 'tag#id', 'tag.clase', '#id') a un SoupStrainer,
+    para que el parser solo construya el árbol del elemento buscado.
+
+    :param selector: Selector CSS.
+    :return: SoupStrainer equivalente, o None si el selector es más complejo.
+    """
+    match = re.fullmatch(r"([A-Za-z][\w-]*)?(?:#([\w-]+))?(?:\.([\w-]+))?", selector.strip())
+    if not match or not any(match.groups()):
+        return None
+    tag, id_, clase = match.groups()
+    attrs = {}
+    if id_:
+        attrs["id"] = id_
+    if clase:
+        attrs["class"] = clase
+    return SoupStrainer(tag, attrs=attrs) if tag else SoupStrainer(attrs=attrs)
+
+
+def obtener_html_http(session: requests.Session, url: str, selector: str, timeout: int = 30) -> Optional[str]:
+    """
+    Descarga una página por HTTP y devuelve el contenido HTML de un selector específico.
+
+    :param session: Sesión de requests a utilizar.
+    :param url: URL de la página a descargar.
+    :param selector: Selector CSS del elemento cuyo contenido HTML se quiere obtener.
+    :param timeout: Tiempo máximo de espera de la petición en segundos.
+    :return: HTML del elemento, o None si no se encontró o falló la descarga.
+    """
+    try:
+        respuesta = session.get(url, timeout=timeout)
+        respuesta.raise_for_status()
+        # Se pasan los bytes para que se detecte la codificación declarada en la página.
+        # lxml + SoupStrainer: solo se construye el árbol de la sección buscada, no el de toda la página
+        soup = BeautifulSoup(respuesta.content, "lxml", parse_only=crear_filtro_selector(selector))
+        contenido = soup.select_one(selector)
+        if contenido:
+            return str(contenido)
+    except Exception as e:
+        logger.error(f"Error al descargar el contenido HTML de {url}: {e}")
+    return None
+
@@ -0,0 +1,107 @@
+# scraping/utils/manifiesto.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Optional
+from datetime import datetime, timezone
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ManifiestoDescargas:
+    """
+    Registro persistente en SQLite de los diarios descargados de una legislatura.
+    Guarda, por cada CVE, la URL de origen, la ruta del archivo, su tamaño, su hash SHA-256
+    y la fecha de descarga. Es seguro para usarse desde varios hilos.
+    """
+
+    NOMBRE_ARCHIVO = "manifiesto.sqlite"
+
+    def __init__(self, directorio: str):
+        """
+        Abre (o crea) el manifiesto en el directorio indicado.
+
+        :param directorio: Directorio de la legislatura (p. ej. 'diarios_html/15').
+        """
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta = os.path.join(directorio, self.NOMBRE_ARCHIVO)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS descargas (
+                cve TEXT PRIMARY KEY,
+                url TEXT,
+                ruta TEXT,
+                tamano INTEGER,
+                sha256 TEXT,
+                descargado_en TEXT
+            )
+        """)
+        self._conexion.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra la conexión con la base de datos del manifiesto."""
+        with self._lock:
+            self._conexion.close()
+
+    def contiene(self, cve: str) -> bool:
+        """
+        Indica si el CVE ya está registrado como descargado.
+
+        :param cve: Código del diario (p. ej. 'DSCD-15-PL-1').
+        """
+        with self._lock:
+            fila = self._conexion.execute("SELECT 1 FROM descargas WHERE cve = ?", (cve,)).fetchone()
+        return fila is not None
+
+    def obtener(self, cve: str) -> Optional[dict]:
+        """
+        Devuelve la entrada del manifiesto para un CVE.
+
+        :param cve: Código del diario.
+        :return: Diccionario con cve, url, ruta, tamano, sha256 y descargado_en, o None si no existe.
+        """
+        with self._lock:
+            cursor = self._conexion.execute(
+                "SELECT cve, url, ruta, tamano, sha256, descargado_en FROM descargas WHERE cve = ?", (cve,)
+            )
+            fila = cursor.fetchone()
+        if fila is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], fila))
+
+    def cves(self) -> set[str]:
+        """Devuelve el conjunto de CVEs registrados."""
+        with self._lock:
+            return {fila[0] for fila in self._conexion.execute("SELECT cve FROM descargas")}
+
+    def registrar(self, cve: str, url: str, ruta: str):
+        """
+        Registra (o actualiza) un diario descargado calculando su tamaño y hash.
+
+        :param cve: Código del diario.
+        :param url: URL de la que se descargó.
+        :param ruta: Ruta del archivo guardado.
+        """
+        sha256 = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(bloque)
+        tamano = os.path.getsize(ruta)
+        descargado_en = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO descargas (cve, url, ruta, tamano, sha256, descargado_en) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cve, url, ruta, tamano, sha256.hexdigest(), descargado_en)
+            )
+            self._conexion.commit()
+        logger.debug(f"Registrado en el manifiesto: {cve}")
@@ -8,28 +8,202 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 import re
-from bs4 import BeautifulSoup
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from scraping.utils.tablas_html import parsear_filas
 import logging
 logger = logging.getLogger(__name__)
 
-def iniciar_driver(driver_path: str, headless: bool = False) -> tuple[webdriver.Chrome, WebDriverWait]:
+# Recursos que el perfil rápido no descarga: imágenes, fuentes, analítica y terceros.
+# Las hojas de estilo no se bloquean: las esperas del spinner y de elementos clicables dependen del CSS.
+URLS_BLOQUEADAS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*twitter.com*", "*youtube.com*", "*hotjar.com*",
+]
+
+
+def iniciar_driver(driver_path: str, headless: bool = False,
+                   rapido: bool = False) -> tuple[webdriver.Chrome, WebDriverWait]:
     """
     Inicializa un driver de Chrome con WebDriverWait.
 
     :param driver_path: Ruta al ejecutable de ChromeDriver.
     :param headless: Si es True, ejecuta Chrome en modo headless.
+    :param rapido: Si es True, usa un perfil de navegación rápida: carga 'eager' (sin esperar a imágenes
+                   ni subrecursos), sin GPU ni extensiones, y bloqueo de imágenes, fuentes y analítica.
     :return: Una tupla con el driver de Chrome y una instancia WebDriverWait.
     """
     options = Options()
     if headless:
         options.add_argument("--headless=new")
     options.add_argument("--start-maximized")
+    if rapido:
+        options.page_load_strategy = "eager"
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
     service = Service(driver_path)
     driver = webdriver.Chrome(service=service, options=options)
+    if rapido:
+        bloquear_recursos(driver, URLS_BLOQUEADAS)
     wait = WebDriverWait(driver, 20)
     return driver, wait
 
 
+def bloquear_recursos(driver: webdriver.Chrome, patrones: list[str]):
+    """
+    Bloquea mediante CDP las peticiones cuyas URL coincidan con los patrones indicados.
+
+    :param driver: Instancia del navegador Chrome.
+    :param patrones: Patrones de URL con comodines (p. ej. '*.png', '*google-analytics.com*').
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patrones})
+    except Exception as e:
+        logger.warning(f"No se pudo activar el bloqueo de recursos: {e}")
+
+
+class PoolDrivers:
+    """
+    Pool de navegadores Chrome reutilizables entre scrapers.
+    Los navegadores devueltos al pool se conservan abiertos (con sus cookies aceptadas) para el siguiente
+    scraper, evitando el arranque en frío y la espera del banner de cookies. Es seguro entre hilos.
+    """
+
+    def __init__(self, driver_path: str, headless: bool = True, max_drivers: int = 2, rapido: bool = True):
+        """
+        :param driver_path: Ruta al ejecutable de ChromeDriver.
+        :param headless: Si es True, los navegadores se inician en modo headless.
+        :param max_drivers: Máximo de navegadores libres que se conservan abiertos.
+        :param rapido: Si es True, los navegadores usan el perfil de navegación rápida.
+        """
+        self.driver_path = driver_path
+        self.headless = headless
+        self.rapido = rapido
+        self.max_drivers = max_drivers
+        self._libres = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cerrar()
+
+    def obtener(self) -> tuple[webdriver.Chrome, WebDriverWait]:
+        """
+        Entrega un navegador libre del pool, o inicia uno nuevo si no hay ninguno disponible.
+
+        :return: Tupla (driver, wait).
+        """
+        while True:
+            with self._lock:
+                if not self._libres:
+                    break
+                driver, wait = self._libres.pop()
+            if self._sigue_vivo(driver):
+                logger.info("Reutilizando navegador del pool.")
+                return driver, wait
+            self._cerrar_driver(driver)
+        logger.info("Iniciando nuevo navegador para el pool.")
+        return iniciar_driver(self.driver_path, headless=self.headless, rapido=self.rapido)
+
+    def devolver(self, driver: webdriver.Chrome, wait: WebDriverWait):
+        """
+        Devuelve un navegador al pool. Se cierran las pestañas adicionales; si el pool está lleno, se cierra.
+
+        :param driver: Instancia del navegador Chrome.
+        :param wait: Instancia WebDriverWait asociada.
+        """
+        try:
+            pestanas = driver.window_handles
+            for pestana in pestanas[1:]:
+                driver.switch_to.window(pestana)
+                driver.close()
+            driver.switch_to.window(pestanas[0])
+        except Exception as e:
+            logger.warning(f"Navegador descartado al devolverlo al pool: {e}")
+            self._cerrar_driver(driver)
+            return
+        with self._lock:
+            if len(self._libres) < self.max_drivers:
+                self._libres.append((driver, wait))
+                return
+        self._cerrar_driver(driver)
+
+    @contextmanager
+    def driver(self):
+        """
+        Presta un navegador durante un bloque 'with'. Si el bloque falla, el navegador se descarta
+        en lugar de devolverse, por si quedó en un estado inconsistente.
+        """
+        driver, wait = self.obtener()
+        try:
+            yield driver, wait
+        except Exception:
+            self._cerrar_driver(driver)
+            raise
+        self.devolver(driver, wait)
+
+    def cerrar(self):
+        """Cierra todos los navegadores libres del pool."""
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for driver, _ in libres:
+            self._cerrar_driver(driver)
+
+    @staticmethod
+    def _sigue_vivo(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _cerrar_driver(driver: webdriver.Chrome):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error al cerrar el navegador: {e}")
+
+
+def obtener_driver(driver_path: str, pool: Optional[PoolDrivers] = None) -> tuple[webdriver.Chrome, WebDriverWait]:
+    """
+    Toma un navegador del pool compartido o, si no hay pool, inicia uno propio con el perfil rápido.
+
+    :param driver_path: Ruta al ejecutable de ChromeDriver (solo se usa sin pool).
+    :param pool: Pool de navegadores compartido (opcional).
+    :return: Tupla (driver, wait).
+    """
+    if pool:
+        return pool.obtener()
+    return iniciar_driver(driver_path, headless=True, rapido=True)
+
+
+def liberar_driver(driver: webdriver.Chrome, wait: WebDriverWait, pool: Optional[PoolDrivers] = None):
+    """
+    Devuelve el navegador al pool para el siguiente scraper o, si es propio, lo cierra.
+    Nunca lanza excepciones, para poder usarse en bloques finally.
+
+    :param driver: Instancia del navegador Chrome.
+    :param wait: Instancia WebDriverWait asociada.
+    :param pool: Pool del que se obtuvo el navegador (None si es propio).
+    """
+    if pool:
+        pool.devolver(driver, wait)
+    else:
+        PoolDrivers._cerrar_driver(driver)
+
+
 def aceptar_cookies(driver: webdriver.Chrome, wait: WebDriverWait):
     """
     Acepta el banner de cookies si está presente en la página.
@@ -37,8 +211,12 @@ def aceptar_cookies(driver: webdriver.Chrome, wait: WebDriverWait):
     :param driver: Instancia del navegador Chrome.
     :param wait: Instancia WebDriverWait.
     """
+    # Un navegador reutilizado del pool ya tiene las cookies aceptadas: no se espera a un banner que no saldrá
+    if getattr(driver, "cookies_aceptadas", False) is True:
+        return
     try:
         wait.until(EC.element_to_be_clickable((By.XPATH, "//a[normalize-space(text())='Aceptar todas']"))).click()
+        driver.cookies_aceptadas = True
         logger.info("Cookies aceptadas.")
     except Exception as e:
         logger.error(f"No se pudo aceptar cookies: {e}")
@@ -112,63 +290,180 @@ def es_ultima_pagina(driver: webdriver.Chrome, element_id: str) -> bool:
     return False
 
 
+# Función JS común para localizar las filas de resultados por XPath o por selector CSS
+JS_BUSCAR_FILAS = """
+function buscarFilas(selector, esXPath) {
+    if (!esXPath) {
+        return Array.from(document.querySelectorAll(selector));
+    }
+    const res = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const filas = [];
+    for (let i = 0; i < res.snapshotLength; i++) {
+        filas.push(res.snapshotItem(i));
+    }
+    return filas;
+}
+function firmaContenido(selector, esXPath, idPaginador) {
+    const filas = buscarFilas(selector, esXPath);
+    const paginador = idPaginador ? document.getElementById(idPaginador) : null;
+    return [
+        filas.length,
+        filas.length ? filas[0].textContent : '',
+        filas.length ? filas[filas.length - 1].textContent : '',
+        paginador ? paginador.textContent : ''
+    ].join('|');
+}
+"""
+
+SCRIPT_FIRMA_CONTENIDO = JS_BUSCAR_FILAS + """
+return firmaContenido(arguments[0], arguments[1], arguments[2]);
+"""
+
+# Pulsa el botón solo si no está deshabilitado; devuelve false si no hay página siguiente
+SCRIPT_CLICK_SI_HABILITADO = """
+const boton = arguments[0];
+const item = boton.closest('li');
+if (boton.classList.contains('disabled') || boton.getAttribute('aria-disabled') === 'true'
+        || (item && item.classList.contains('disabled'))) {
+    return false;
+}
+boton.click();
+return true;
+"""
+
+# Espera asíncrona dirigida por eventos: un MutationObserver comprueba la firma de la tabla en cada cambio
+# del DOM y responde en cuanto cambia el contenido y no hay spinner visible (true). Responde false enseguida
+# si la petición AJAX termina sin cambios o si no hay ninguna mutación durante el periodo de inactividad.
+SCRIPT_ESPERAR_CAMBIO = JS_BUSCAR_FILAS + """
+const [selector, esXPath, idPaginador, firmaAnterior, timeoutMs, inactividadMs] = arguments;
+const responder = arguments[arguments.length - 1];
+let terminado = false, huboSpinner = false, huboMutacion = false, observador = null;
+const temporizadores = [];
+const spinnerVisible = () => Array.from(document.getElementsByClassName('spinner-border'))
+    .some(e => e.offsetParent !== null);
+function fin(resultado) {
+    if (terminado) return;
+    terminado = true;
+    if (observador) observador.disconnect();
+    temporizadores.forEach(clearTimeout);
+    responder(resultado);
+}
+function comprobar() {
+    if (spinnerVisible()) {
+        huboSpinner = true;
+        return;
+    }
+    const firma = firmaContenido(selector, esXPath, idPaginador);
+    if (firma !== firmaAnterior && buscarFilas(selector, esXPath).length > 0) {
+        fin(true);
+    } else if (huboSpinner) {
+        fin(false);
+    }
+}
+comprobar();
+if (!terminado) {
+    observador = new MutationObserver(() => { huboMutacion = true; comprobar(); });
+    observador.observe(document.body, {childList: true, subtree: true, characterData: true, attributes: true});
+    temporizadores.push(setTimeout(() => { if (!huboMutacion) fin(false); }, inactividadMs));
+    temporizadores.push(setTimeout(() => fin(false), timeoutMs));
+}
+"""
+
+
+def firma_contenido(driver: webdriver.Chrome, by: By, selector: str, id_paginador: str = None) -> Optional[str]:
+    """
+    Calcula una firma ligera del contenido de la tabla (número de filas, primera y última fila y paginador).
+
+    :param driver: Instancia del navegador Chrome.
+    :param by: Método de localización de las filas (By.XPATH o By.CSS_SELECTOR).
+    :param selector: Selector de las filas.
+    :param id_paginador: ID del elemento con el rango de resultados (opcional).
+    :return: Firma del contenido, o None si no se pudo calcular.
+    """
+    try:
+        return driver.execute_script(SCRIPT_FIRMA_CONTENIDO, selector, by == By.XPATH, id_paginador)
+    except Exception as e:
+        logger.error(f"No se pudo calcular la firma de la tabla: {e}")
+        return None
+
+
+def esperar_cambio_contenido(driver: webdriver.Chrome, by: By, selector: str, firma_anterior: Optional[str],
+                             id_paginador: str = None, timeout: float = 20,
+                             inactividad: float = 3) -> Optional[bool]:
+    """
+    Espera a que cambie el contenido de la tabla sin sondeos con sleep: la espera se resuelve en el navegador
+    con un MutationObserver en cuanto llega la respuesta AJAX.
+
+    :param driver: Instancia del navegador Chrome.
+    :param by: Método de localización de las filas (By.XPATH o By.CSS_SELECTOR).
+    :param selector: Selector de las filas.
+    :param firma_anterior: Firma del contenido antes de cambiar de página.
+    :param id_paginador: ID del elemento con el rango de resultados (opcional).
+    :param timeout: Segundos máximos de espera.
+    :param inactividad: Segundos sin ninguna mutación del DOM tras los que se considera que no hubo cambio.
+    :return: True si el contenido cambió, False si no cambió, None si no se pudo esperar en el navegador.
+    """
+    try:
+        driver.set_script_timeout(timeout + 5)
+        resultado = driver.execute_async_script(
+            SCRIPT_ESPERAR_CAMBIO, selector, by == By.XPATH, id_paginador, firma_anterior,
+            int(timeout * 1000), int(inactividad * 1000)
+        )
+    except Exception as e:
+        logger.warning(f"No se pudo esperar el cambio de la tabla en el navegador: {e}")
+        return None
+    return resultado if isinstance(resultado, bool) else None
+
+
 def click_siguiente_pagina(
     driver: webdriver.Chrome,
     wait: WebDriverWait,
     xpath_siguiente: str,
-    by_tabla: By, # <-- NUEVO PARÁMETRO
+    by_tabla: By,
     selector_tabla: str,
-    id_paginador: str = None
+    id_paginador: str = None,
+    timeout: float = 20,
+    inactividad: float = 3
 ) -> bool:
     """
-    Intenta hacer clic en el botón de siguiente página y espera que el contenido se actualice.
+    Intenta hacer clic en el botón de siguiente página y espera a que el contenido de la tabla cambie.
 
     :param driver: Navegador Selenium.
-    :param wait: Objeto WebDriverWait.
+    :param wait: Objeto WebDriverWait (se usa como respaldo si la espera en el navegador no está disponible).
     :param xpath_siguiente: XPath del botón de paginación.
     :param by_tabla: Método para localizar elementos de la tabla (By.XPATH, By.CSS_SELECTOR, etc.).
     :param selector_tabla: Selector para la tabla de resultados.
     :param id_paginador: ID del elemento que muestra el rango de resultados.
-    :return: True si avanza de página, False si no hay más páginas o falla.
+    :param timeout: Segundos máximos de espera al cambio de la tabla.
+    :param inactividad: Segundos sin ningún cambio en el DOM (ni spinner) tras los que se da por hecho que
+                        la tabla no va a cambiar. Auméntalo si el servidor tarda en responder sin mostrar spinner.
+    :return: True si avanza de página, False si no hay más páginas, la tabla no cambia o falla.
     """
-    import time
-    import re
-
     try:
-        rango_anterior = None
-        if id_paginador:
-            try:
-                texto = driver.find_element(By.ID, id_paginador).text
-                match = re.search(r"Resultados (\d+) a (\d+) de (\d+)", texto)
-                if match:
-                    rango_anterior = match.group(1)
-            except Exception as e:
-                logger.error(f"No se pudo leer el rango anterior: {e}")
+        firma_anterior = firma_contenido(driver, by_tabla, selector_tabla, id_paginador)
 
         # Rebuscar el botón de siguiente siempre justo antes del clic
         try:
             boton = driver.find_element(By.XPATH, xpath_siguiente)
-            driver.execute_script("arguments[0].click();", boton)
+            if driver.execute_script(SCRIPT_CLICK_SI_HABILITADO, boton) is False:
+                logger.info("El botón de siguiente página está deshabilitado.")
+                return False
         except Exception as e:
-            (logger.error(f"No se pudo hacer clic en el botón siguiente: {e}"))
+            logger.error(f"No se pudo hacer clic en el botón siguiente: {e}")
             return False
 
-        esperar_spinner(wait)
-
-        # Esperar que cambie el rango
-        if id_paginador and rango_anterior:
-            for _ in range(20):
-                try:
-                    texto = driver.find_element(By.ID, id_paginador).text
-                    match = re.search(r"Resultados (\\d+) a (\\d+) de (\\d+)", texto)
-                    if match and match.group(1) != rango_anterior:
-                        break # pragma: no cover
-                except:
-                    pass
-                time.sleep(0.5)
-
-        # Confirmar que la tabla aparece usando el by_tabla y selector_tabla
-        wait.until(EC.presence_of_element_located((by_tabla, selector_tabla))) # <-- CAMBIO AQUI
+        cambio = esperar_cambio_contenido(driver, by_tabla, selector_tabla, firma_anterior, id_paginador,
+                                          timeout=timeout, inactividad=inactividad)
+        if cambio is None:
+            # Respaldo: esperas de Selenium sobre el spinner y la tabla. Ambas se cumplen también en la página
+            # anterior, así que el avance solo se da por bueno si la firma del contenido ha cambiado.
+            esperar_spinner(wait)
+            wait.until(EC.presence_of_element_located((by_tabla, selector_tabla)))
+            cambio = firma_contenido(driver, by_tabla, selector_tabla, id_paginador) != firma_anterior
+        if not cambio:
+            logger.info("La tabla no cambió tras pulsar siguiente página.")
+            avisar_paginacion_incompleta(driver, id_paginador)
+            return False
         return True
 
     except Exception as e:
@@ -176,6 +471,20 @@ def click_siguiente_pagina(
         return False
 
 
+def avisar_paginacion_incompleta(driver: webdriver.Chrome, id_paginador: Optional[str]):
+    """
+    Registra un aviso si la paginación se detiene antes de llegar al último resultado según el paginador,
+    para que un listado incompleto no pase desapercibido.
+
+    :param driver: Instancia del navegador Chrome.
+    :param id_paginador: ID del elemento que muestra el rango de resultados (si no hay, no se comprueba).
+    """
+    if not id_paginador:
+        return
+    hasta, total = get_rango_resultados(driver, id_paginador)
+    if hasta is not None and total is not None and hasta < total:
+        logger.warning(f"La paginación se detuvo en el resultado {hasta} de {total}: el listado está incompleto.")
+
 
 def get_rango_resultados(driver: webdriver.Chrome, element_id: str) -> tuple[int, int]:
     """
@@ -195,24 +504,49 @@ def get_rango_resultados(driver: webdriver.Chrome, element_id: str) -> tuple[int
     return None, None
 
 
-def guardar_html_contenido(driver: webdriver.Chrome, wait: WebDriverWait, selector: str, ruta_archivo: str) -> bool:
+# Script que captura en una sola llamada a execute_script el HTML de todas las filas de la tabla
+# (y la URL base para resolver enlaces relativos); el parseo se hace después en Python con lxml.
+SCRIPT_CAPTURAR_FILAS = JS_BUSCAR_FILAS + """
+const filas = buscarFilas(arguments[0], arguments[1]);
+return {base: document.baseURI, html: filas.map(f => f.outerHTML).join('')};
+"""
+
+
+def extraer_filas_html(driver: webdriver.Chrome, by: By, selector: str) -> list[dict]:
     """
-    Guarda el contenido HTML de un selector específico en un archivo.
+    Extrae los datos de todas las filas que cumplen el selector a partir de una única captura de su HTML,
+    parseada con lxml (ver parsear_filas para el formato de cada fila).
+
+    :param driver: Instancia del navegador Chrome.
+    :param by: Método de localización de las filas (By.XPATH o By.CSS_SELECTOR).
+    :param selector: Selector de las filas.
+    :return: Lista de filas serializadas. Lista vacía si falla la extracción.
+    """
+    try:
+        captura = driver.execute_script(SCRIPT_CAPTURAR_FILAS, selector, by == By.XPATH)
+    except Exception as e:
+        logger.error(f"Error al extraer filas con '{selector}': {e}")
+        return []
+    if not isinstance(captura, dict):
+        return []
+    return parsear_filas(captura.get("html") or "", captura.get("base") or "")
+
+
+def obtener_html_contenido(driver: webdriver.Chrome, wait: WebDriverWait, selector: str) -> Optional[str]:
+    """
+    Obtiene el contenido HTML de un selector específico de la página actual.
+    Se pide al navegador solo el outerHTML del elemento, sin serializar ni parsear la página completa.
 
     :param driver: Instancia del navegador Chrome.
     :param wait: Instancia WebDriverWait.
-    :param selector: Selector CSS del elemento cuyo contenido HTML será guardado.
-    :param ruta_archivo: Ruta completa del archivo donde se guardará el contenido.
-    :return: True si el contenido se guardó correctamente, False si no se encontró.
+    :param selector: Selector CSS del elemento cuyo contenido HTML se quiere obtener.
+    :return: HTML del elemento, o None si no se encontró.
     """
     try:
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        contenido = soup.select_one(selector)
+        elemento = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+        contenido = elemento.get_attribute("outerHTML")
         if contenido:
-            with open(ruta_archivo, "w", encoding="utf-8") as f:
-                f.write(str(contenido))
-            return True
+            return contenido
     except Exception as e:
-        logger.error(f"Error al guardar el contenido HTML: {e}")
-    return False
+        logger.error(f"Error al obtener el contenido HTML: {e}")
+    return None
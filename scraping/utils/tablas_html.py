@@ -0,0 +1,102 @@
+# scraping/utils/tablas_html.py
+
+from urllib.parse import urljoin
+from lxml import etree, html as lxml_html
+
+# Las filas llegan sueltas (outerHTML de cada <tr>): se envuelven en una tabla para que el parser las conserve
+PLANTILLA_TABLA = "<table>{}</table>"
+
+# Filas de primer nivel, con o sin <tbody>/<thead> (no las de tablas anidadas en una celda)
+XPATH_FILAS = "./tr | ./tbody/tr | ./thead/tr | ./tfoot/tr"
+
+
+def normalizar_espacios(texto: str) -> str:
+    """Colapsa espacios, tabulaciones y saltos de línea consecutivos, como hace innerText al mostrar la tabla."""
+    return " ".join((texto or "").split())
+
+
+def html_interior(elemento) -> str:
+    """Devuelve el innerHTML de un elemento lxml."""
+    return (elemento.text or "") + "".join(
+        etree.tostring(hijo, encoding="unicode", method="html") for hijo in elemento
+    )
+
+
+def _enlaces(elemento, url_base: str) -> list[dict]:
+    return [
+        {"texto": normalizar_espacios(a.text_content()), "href": urljoin(url_base, a.get("href", ""))}
+        for a in elemento.iter("a")
+    ]
+
+
+def _celda(elemento, url_base: str) -> dict:
+    return {
+        "texto": normalizar_espacios(elemento.text_content()),
+        "html": html_interior(elemento),
+        "enlaces": _enlaces(elemento, url_base),
+    }
+
+
+def parsear_filas(html: str, url_base: str = "") -> list[dict]:
+    """
+    Convierte el HTML de las filas de una tabla de resultados en datos planos.
+    Es una función pura: sirve igual para una captura del navegador que para un HTML guardado en disco.
+
+    Cada fila se devuelve como un diccionario con las claves:
+    - 'celdas': lista de <td> como {'texto', 'html', 'enlaces'}
+    - 'cabeceras': lista de <th> con la misma estructura
+    - 'enlaces': lista de enlaces de la fila como {'texto', 'href'}
+
+    :param html: outerHTML de las filas (<tr>...</tr><tr>...</tr>) o de una tabla completa.
+    :param url_base: URL de la página, para convertir los href relativos en absolutos.
+    :return: Lista de filas serializadas, en orden.
+    """
+    if not html or not html.strip():
+        return []
+    # Solo es una tabla completa si empieza por <table: una tabla anidada en la primera celda no cuenta
+    if not html.lstrip().lower().startswith("<table"):
+        html = PLANTILLA_TABLA.format(html)
+    raiz = lxml_html.fromstring(html)
+    tabla = raiz if raiz.tag == "table" else raiz.find(".//table")
+    if tabla is None:
+        return []
+
+    filas = []
+    for fila in tabla.xpath(XPATH_FILAS):
+        filas.append({
+            "celdas": [_celda(c, url_base) for c in fila if c.tag == "td"],
+            "cabeceras": [_celda(c, url_base) for c in fila if c.tag == "th"],
+            "enlaces": _enlaces(fila, url_base),
+        })
+    return filas
+
+
+def enlaces_con_contexto(html: str) -> list[tuple[str, str]]:
+    """
+    Recorre un fragmento HTML en orden de documento y devuelve cada enlace junto al texto que lo precede
+    desde el enlace anterior (p. ej. 'Sustituye a:').
+
+    :param html: innerHTML de una celda.
+    :return: Lista de tuplas (texto previo normalizado, texto del enlace normalizado).
+    """
+    if not html or not html.strip():
+        return []
+    contenedor = lxml_html.fragment_fromstring(html, create_parent="div")
+    resultado = []
+    previo = []
+
+    def recorrer(elemento):
+        nonlocal previo
+        for hijo in elemento:
+            if hijo.tag == "a":
+                resultado.append((normalizar_espacios("".join(previo)), normalizar_espacios(hijo.text_content())))
+                previo = []
+            elif isinstance(hijo.tag, str):
+                previo.append(hijo.text or "")
+                recorrer(hijo)
+            # El texto que sigue a un elemento (tail) va antes del siguiente enlace
+            previo.append(hijo.tail or "")
+
+    previo.append(contenedor.text or "")
+    recorrer(contenedor)
+    return resultado
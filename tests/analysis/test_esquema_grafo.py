@@ -0,0 +1,110 @@
+# tests/analysis/test_esquema_grafo.py
+
+import logging
+import pytest
+from unittest.mock import MagicMock, patch
+from neo4j.exceptions import ClientError
+
+from analysis.esquema_grafo import GestorEsquema, RESTRICCIONES, INDICES_RELACIONES
+from analysis.graph_builder import GraphBuilder, CONSULTA_GRUPOS
+
+
+@pytest.fixture
+def sesion():
+    mock_session = MagicMock()
+    mock_driver = MagicMock()
+    mock_driver.session.return_value.__enter__.return_value = mock_session
+    return GestorEsquema(mock_driver, "Congreso"), mock_session
+
+
+def _resultado(registros=(), plan=None):
+    resultado = MagicMock()
+    resultado.__iter__.return_value = iter(registros)
+    resultado.consume.return_value.plan = plan
+    return resultado
+
+
+# Test para comprobar que se crean las restricciones de nodos y los índices de propiedades de relaciones
+def test_crear_restricciones_e_indices(sesion):
+    esquema, mock_session = sesion
+
+    esquema.crear()
+
+    consultas = [c.args[0] for c in mock_session.run.call_args_list]
+    assert len(consultas) == len(RESTRICCIONES) + len(INDICES_RELACIONES)
+    assert any("CONSTRAINT diputado_nombre_unico" in c and "REQUIRE n.nombre IS UNIQUE" in c for c in consultas)
+    assert any("INDEX pertenece_a_fechas" in c and "FOR ()-[r:PERTENECE_A]-() ON (r.fecha_alta, r.fecha_baja)" in c
+               for c in consultas)
+
+
+# Test para comprobar que SHOW INDEXES detecta los índices que faltan o no están en línea
+def test_comprobar_indices_pendientes(sesion, caplog):
+    esquema, mock_session = sesion
+    estados = [{"name": nombre, "state": "ONLINE"} for *_, nombre in RESTRICCIONES + INDICES_RELACIONES]
+    estados = [e for e in estados if e["name"] != "sustituye_a_fechas"]
+    estados[0]["state"] = "POPULATING"
+    mock_session.run.side_effect = [ClientError("tiempo agotado"), _resultado(estados)]
+
+    with caplog.at_level(logging.WARNING, logger="analysis.esquema_grafo"):
+        pendientes = esquema.comprobar(espera=5)
+
+    assert pendientes == ["diputado_nombre_unico", "sustituye_a_fechas"]
+    assert mock_session.run.call_args_list[0].kwargs == {"espera": 5}
+    assert mock_session.run.call_args_list[1].args[0].startswith("SHOW INDEXES")
+    assert "Índice 'sustituye_a_fechas' no disponible (estado: no existe)" in caplog.text
+    assert "Índice 'diputado_nombre_unico' no disponible (estado: POPULATING)" in caplog.text
+
+
+# Test para comprobar que asegurar crea el esquema y no deja índices pendientes si todos están en línea
+def test_asegurar_todo_en_linea(sesion):
+    esquema, mock_session = sesion
+    estados = [{"name": nombre, "state": "ONLINE"} for *_, nombre in RESTRICCIONES + INDICES_RELACIONES]
+    creaciones = [MagicMock()] * (len(RESTRICCIONES) + len(INDICES_RELACIONES))
+    mock_session.run.side_effect = creaciones + [MagicMock(), _resultado(estados)]
+
+    assert esquema.asegurar() == []
+
+
+# Test para comprobar que el informe de planes distingue los índices usados de los recorridos completos
+def test_informe_planes(sesion, caplog):
+    esquema, mock_session = sesion
+    plan = {
+        "operatorType": "ProduceResults@neo4j",
+        "args": {},
+        "children": [{
+            "operatorType": "Merge@neo4j",
+            "args": {"Details": "CREATE (d:Diputado {nombre: fila.nombre})"},
+            "children": [
+                {"operatorType": "NodeUniqueIndexSeek@neo4j",
+                 "args": {"Details": "UNIQUE d:Diputado(nombre) WHERE nombre = fila.nombre"}, "children": []},
+                {"operatorType": "NodeByLabelScan@neo4j", "args": {"Details": "g:Grupo"}, "children": []},
+            ],
+        }],
+    }
+    mock_session.run.return_value = _resultado(plan=plan)
+
+    with caplog.at_level(logging.INFO, logger="analysis.esquema_grafo"):
+        informe = esquema.informe_planes({"grupos": CONSULTA_GRUPOS}, {"filas": [], "legislatura": ""})
+
+    assert mock_session.run.call_args.args[0].startswith("EXPLAIN ")
+    assert informe == [{
+        "consulta": "grupos",
+        "indices": ["NodeUniqueIndexSeek(UNIQUE d:Diputado(nombre) WHERE nombre = fila.nombre)"],
+        "escaneos": ["NodeByLabelScan(g:Grupo)"],
+    }]
+    assert "recorre etiquetas o relaciones completas" in caplog.text
+
+
+# Test para comprobar que GraphBuilder prepara el esquema y analiza todas sus consultas de importación
+@patch("analysis.graph_builder.GraphDatabase.driver")
+def test_preparar_esquema(mock_driver_class):
+    builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
+
+    with patch.object(GestorEsquema, "asegurar") as mock_asegurar, \
+            patch.object(GestorEsquema, "informe_planes", return_value=[]) as mock_informe:
+        builder.preparar_esquema(espera=10)
+
+    mock_asegurar.assert_called_once_with(10)
+    consultas, parametros = mock_informe.call_args.args
+    assert list(consultas) == ["grupos", "representaciones", "suplencias", "acuerdos"]
+    assert parametros["legislatura"] == "" and len(parametros["filas"]) == 1
@@ -13,70 +13,79 @@ from analysis.graph_builder import GraphBuilder
 def test_crear_indices_maneja_errores(mock_driver_class, caplog):
     """Verifica que se loguean errores si ocurre una excepción al crear índices."""
     mock_session = MagicMock()
-    mock_session.run.side_effect = [CypherSyntaxError("índice incorrecto")] * 4
+    mock_session.run.side_effect = CypherSyntaxError("índice incorrecto")
     mock_driver = MagicMock()
     mock_driver.session.return_value.__enter__.return_value = mock_session
     mock_driver_class.return_value = mock_driver
 
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
-    with caplog.at_level(logging.ERROR, logger="analysis.graph_builder"):
+    with caplog.at_level(logging.ERROR, logger="analysis.esquema_grafo"):
         builder.crear_indices()
     assert "Error creando constraint para Diputado" in caplog.text
     assert "Error creando constraint para Grupo" in caplog.text
     assert "Error creando constraint para Provincia" in caplog.text
+    assert "Error creando índice para PERTENECE_A" in caplog.text
 
 
-@patch("analysis.graph_builder.GraphDatabase.driver")
-def test_importar_grupos_maneja_errores(mock_driver_class, caplog):
-    """Verifica que se loguean warnings si ocurre una excepción al importar grupos."""
+def _sesion_con_transacciones(mock_driver_class):
+    """Simula una sesión cuyo execute_write ejecuta la función de transacción con un tx simulado."""
+    mock_tx = MagicMock()
     mock_session = MagicMock()
-    # Primera llamada funciona, segunda lanza excepción
-    mock_session.run.side_effect = [None, CypherSyntaxError("fallo")]
+    mock_session.execute_write.side_effect = lambda funcion, *args: funcion(mock_tx, *args)
     mock_driver = MagicMock()
     mock_driver.session.return_value.__enter__.return_value = mock_session
     mock_driver_class.return_value = mock_driver
+    return mock_session, mock_tx
+
+
+@patch("analysis.graph_builder.GraphDatabase.driver")
+def test_importar_grupos_maneja_errores(mock_driver_class, caplog):
+    """Verifica que un lote fallido deja un warning y no detiene el resto de lotes."""
+    mock_session, mock_tx = _sesion_con_transacciones(mock_driver_class)
+    # El primer lote funciona, el segundo lanza excepción y el tercero vuelve a funcionar
+    mock_tx.run.side_effect = [MagicMock(), CypherSyntaxError("fallo"), MagicMock()]
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
     df = pd.DataFrame([
         {"nombre": "X", "grupo_parlamentario": "G", "fecha_alta": "01/01/2023", "fecha_baja": "", "legislatura":"15"},
-        {"nombre": "Y", "grupo_parlamentario": "G2", "fecha_alta": "02/01/2023", "fecha_baja": "", "legislatura":"15"}
+        {"nombre": "Y", "grupo_parlamentario": "G2", "fecha_alta": "02/01/2023", "fecha_baja": "", "legislatura":"15"},
+        {"nombre": "Z", "grupo_parlamentario": "G2", "fecha_alta": "03/01/2023", "fecha_baja": "", "legislatura":"15"}
     ])
     with patch("pandas.read_csv", return_value=df):
-        with caplog.at_level(logging.WARNING, logger="analysis.graph_builder"):
-            builder.importar_grupos("fake.csv", "15")
-    assert any("Error procesando fila" in r.getMessage() for r in caplog.records)
+        with caplog.at_level(logging.INFO, logger="analysis.graph_builder"):
+            builder.importar_grupos("fake.csv", "15", tamano_lote=1)
+    assert mock_session.execute_write.call_count == 3
+    assert "Error importando lote de grupos (1-2)" in caplog.text
+    assert "2 de 3 filas de grupos importadas" in caplog.text
 
 
 @patch("analysis.graph_builder.GraphDatabase.driver")
 def test_importar_diputados_maneja_errores(mock_driver_class, caplog):
-    """Verifica que se loguean warnings si ocurre una excepción al crear relaciones en diputados."""
-    mock_session = MagicMock()
-    # Primera llamada funciona, segunda lanza excepción
-    mock_session.run.side_effect = [None, CypherSyntaxError("fallo")]
-    mock_driver = MagicMock()
-    mock_driver.session.return_value.__enter__.return_value = mock_session
-    mock_driver_class.return_value = mock_driver
+    """Verifica que un lote fallido de REPRESENTA_A deja un warning y no impide importar las suplencias."""
+    mock_session, mock_tx = _sesion_con_transacciones(mock_driver_class)
+    # Falla el lote de representaciones; el de suplencias funciona
+    mock_tx.run.side_effect = [CypherSyntaxError("fallo"), MagicMock()]
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
     df = pd.DataFrame([
-        {"nombre": "A", "provincia": "Diputado por Lugo", "sustituye_a": "", "fecha_alta_suplencia": "",
+        {"nombre": "A", "provincia": "Diputado por Lugo", "sustituye_a": "B", "fecha_alta_suplencia": "",
          "fecha_baja_suplencia": "", "legislatura":"15"},
         {"nombre": "Y", "provincia": "Diputada por Cádiz", "sustituye_a": "", "fecha_alta_suplencia": "",
          "fecha_baja_suplencia": "", "legislatura":"15"}
     ])
     with patch("pandas.read_csv", return_value=df):
-        with caplog.at_level(logging.WARNING, logger="analysis.graph_builder"):
+        with caplog.at_level(logging.INFO, logger="analysis.graph_builder"):
             builder.importar_diputados("fake.csv", "15")
-    assert any("Error creando relación REPRESENTA_A" in r.getMessage() for r in caplog.records)
+    assert mock_tx.run.call_count == 2
+    assert "Error importando lote de representaciones (0-2)" in caplog.text
+    assert "0 de 2 relaciones REPRESENTA_A importadas" in caplog.text
+    assert "1 de 1 relaciones SUSTITUYE_A importadas" in caplog.text
 
 
 @patch("analysis.graph_builder.GraphDatabase.driver")
 def test_importar_diputados_suplencia_warning(mock_driver_class, caplog):
-    """Cubre el except Exception de la suplencia en importar_diputados (líneas 133-134)."""
-    mock_session = MagicMock()
-    # Primera llamada funciona (representa), segunda (suplencia) lanza excepción
-    mock_session.run.side_effect = [None, CypherSyntaxError("fallo en suplencia")]
-    mock_driver = MagicMock()
-    mock_driver.session.return_value.__enter__.return_value = mock_session
-    mock_driver_class.return_value = mock_driver
+    """Verifica que un lote fallido de suplencias deja un warning."""
+    mock_session, mock_tx = _sesion_con_transacciones(mock_driver_class)
+    # El lote de representaciones funciona, el de suplencias lanza excepción
+    mock_tx.run.side_effect = [MagicMock(), CypherSyntaxError("fallo en suplencia")]
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
     df = pd.DataFrame([
         {"nombre": "A", "provincia": "Diputado por Lugo", "sustituye_a": "B", "fecha_alta_suplencia": "",
@@ -85,7 +94,7 @@ def test_importar_diputados_suplencia_warning(mock_driver_class, caplog):
     with patch("pandas.read_csv", return_value=df):
         with caplog.at_level(logging.WARNING, logger="analysis.graph_builder"):
             builder.importar_diputados("fake.csv", "15")
-    assert any("Error creando suplencia" in r.getMessage() for r in caplog.records)
+    assert "Error importando lote de suplencias (0-1)" in caplog.text
 
 
 @patch("analysis.graph_builder.GraphDatabase.driver")
@@ -100,64 +109,68 @@ def test_close_cierra_driver(mock_driver_class):
 
 @patch("analysis.graph_builder.GraphDatabase.driver")
 def test_importar_grupos_crea_relaciones(mock_driver_class):
-    """Testea que importar_grupos() crea nodos Diputado y Grupo, y establece la relación PERTENECE_A."""
-    mock_session = MagicMock()
-    mock_driver = MagicMock()
-    mock_driver.session.return_value.__enter__.return_value = mock_session
-    mock_driver_class.return_value = mock_driver
+    """Testea que importar_grupos() envía las filas en lotes UNWIND con nodos Diputado, Grupo y PERTENECE_A."""
+    mock_session, mock_tx = _sesion_con_transacciones(mock_driver_class)
 
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
-    df = pd.DataFrame([{
-        "nombre": "Diputado X",
-        "grupo_parlamentario": "PSOE",
-        "fecha_alta": "01/01/2023",
-        "fecha_baja": "",
-        "legislatura": "15"
-    }])
+    df = pd.DataFrame([
+        {"nombre": "Diputado X", "grupo_parlamentario": "PSOE", "fecha_alta": "01/01/2023",
+         "fecha_baja": "", "legislatura": "15"},
+        {"nombre": "Diputada Y", "grupo_parlamentario": "PP", "fecha_alta": "02/01/2023",
+         "fecha_baja": "03/03/2024", "legislatura": "15"},
+        {"nombre": "Diputado Z", "grupo_parlamentario": "PP", "fecha_alta": None,
+         "fecha_baja": None, "legislatura": "15"},
+    ])
     with patch("pandas.read_csv", return_value=df):
-        builder.importar_grupos("fake.csv", "15")
-
-    calls = mock_session.run.call_args_list
-    assert any(
-        call_args[1].get("nombre") == "Diputado X" and
-        call_args[1].get("grupo") == "PSOE" and
-        call_args[1].get("fecha_alta") == "2023-01-01"
-        for call_args in calls
-    )
+        builder.importar_grupos("fake.csv", "15", tamano_lote=2)
+
+    assert mock_session.run.call_count == 0
+    assert mock_tx.run.call_count == 2
+    query, = mock_tx.run.call_args_list[0].args
+    assert "UNWIND $filas AS fila" in query and "PERTENECE_A" in query
+    assert mock_tx.run.call_args_list[0].kwargs == {
+        "filas": [
+            {"nombre": "Diputado X", "grupo": "PSOE", "fecha_alta": "2023-01-01", "fecha_baja": ""},
+            {"nombre": "Diputada Y", "grupo": "PP", "fecha_alta": "2023-01-02", "fecha_baja": "2024-03-03"},
+        ],
+        "legislatura": "15",
+    }
+    assert mock_tx.run.call_args_list[1].kwargs["filas"] == [
+        {"nombre": "Diputado Z", "grupo": "PP", "fecha_alta": "", "fecha_baja": ""}
+    ]
 
 
 @patch("analysis.graph_builder.GraphDatabase.driver")
 def test_importar_diputados_con_suplencia(mock_driver_class):
-    """Testea que importar_diputados() crea nodos Diputado y Provincia y la relación de suplencia."""
-    mock_session = MagicMock()
-    mock_driver = MagicMock()
-    mock_driver.session.return_value.__enter__.return_value = mock_session
-    mock_driver_class.return_value = mock_driver
+    """Testea que importar_diputados() separa las filas con provincia y con suplencia y envía cada grupo en lotes."""
+    mock_session, mock_tx = _sesion_con_transacciones(mock_driver_class)
 
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
-    df = pd.DataFrame([{
-        "nombre": "Diputada Y",
-        "provincia": "Diputada por Córdoba",
-        "sustituye_a": "Diputado Z",
-        "fecha_alta_suplencia": "15/02/2024",
-        "fecha_baja_suplencia": "",
-        "legislatura": "15"
-    }])
+    df = pd.DataFrame([
+        {"nombre": "Diputada Y", "provincia": "Diputada por Córdoba", "sustituye_a": "Diputado Z",
+         "fecha_alta_suplencia": "15/02/2024", "fecha_baja_suplencia": "", "legislatura": "15"},
+        {"nombre": "Diputado W", "provincia": "Diputado por Soria", "sustituye_a": None,
+         "fecha_alta_suplencia": None, "fecha_baja_suplencia": None, "legislatura": "15"},
+        {"nombre": "Diputado V", "provincia": None, "sustituye_a": None,
+         "fecha_alta_suplencia": None, "fecha_baja_suplencia": None, "legislatura": "15"},
+        {"nombre": None, "provincia": "Diputado por Lugo", "sustituye_a": "Diputado Z",
+         "fecha_alta_suplencia": None, "fecha_baja_suplencia": None, "legislatura": "15"},
+    ])
     with patch("pandas.read_csv", return_value=df):
-        builder.importar_diputados("diputados.csv", "15")
-
-    calls = mock_session.run.call_args_list
-    assert any(
-        call_args[1].get("nombre") == "Diputada Y" and
-        call_args[1].get("provincia") == "Córdoba"
-        for call_args in calls
-    )
-    assert any(
-        call_args[1].get("sustituto") == "Diputada Y" and
-        call_args[1].get("sustituido") == "Diputado Z" and
-        call_args[1].get("fecha_alta") == "2024-02-15"
-        for call_args in calls
-    )
+        builder.importar_diputados("diputados.csv", "15", tamano_lote=1)
+
+    assert mock_session.run.call_count == 0
+    llamadas = mock_tx.run.call_args_list
+    assert len(llamadas) == 3
+    assert "REPRESENTA_A" in llamadas[0].args[0] and "UNWIND $filas AS fila" in llamadas[0].args[0]
+    assert [c.kwargs for c in llamadas[:2]] == [
+        {"filas": [{"nombre": "Diputada Y", "provincia": "Córdoba"}], "legislatura": "15"},
+        {"filas": [{"nombre": "Diputado W", "provincia": "Soria"}], "legislatura": "15"},
+    ]
+    assert "SUSTITUYE_A" in llamadas[2].args[0]
+    assert llamadas[2].kwargs == {"filas": [
+        {"sustituto": "Diputada Y", "sustituido": "Diputado Z", "fecha_alta": "2024-02-15", "fecha_baja": ""}
+    ]}
 
 
 def test_formatear_fecha_valida():
@@ -201,18 +214,20 @@ def test_init_service_unavailable_logs_error(mock_driver_class, caplog):
 def test_crear_indices_ok(mock_driver_class, caplog):
     """Verifica que crear_indices loguea INFO si no hay errores."""
     mock_session = MagicMock()
-    mock_session.run.side_effect = [None, None, None, None]  # Ningún error
+    mock_session.run.return_value = None  # Ningún error
     mock_driver = MagicMock()
     mock_driver.session.return_value.__enter__.return_value = mock_session
     mock_driver_class.return_value = mock_driver
 
     builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
 
-    with caplog.at_level(logging.INFO, logger="analysis.graph_builder"):
+    with caplog.at_level(logging.INFO, logger="analysis.esquema_grafo"):
         builder.crear_indices()
-        # Verifica que el log de info esté presente para al menos un constraint
+        # Verifica que el log de info esté presente para al menos un constraint y un índice de relación
         assert any("Constraint 'diputado_nombre_unico' verificado para Diputado.nombre" in r.getMessage()
                    for r in caplog.records)
+        assert any("Índice 'pertenece_a_fechas' verificado para PERTENECE_A(fecha_alta, fecha_baja)"
+                   in r.getMessage() for r in caplog.records)
 
 @patch("analysis.graph_builder.GraphDatabase.driver")
 def test_importar_grupos_columnas_incompletas(mock_driver_class):
@@ -254,3 +269,110 @@ def test_importar_diputados_columnas_incompletas(mock_driver_class):
     with patch("pandas.read_csv", return_value=df):
         with pytest.raises(ValueError, match="Faltan columnas requeridas en el CSV"):
             builder.importar_diputados("fake.csv", "15")
+
+
+@patch("analysis.graph_builder.GraphDatabase.driver")
+def test_importar_acuerdos_por_lotes(mock_driver_class, caplog):
+    """Verifica que las aristas de acuerdo se envían en lotes con UNWIND y que un lote fallido no detiene el resto."""
+    mock_session, mock_tx = _sesion_con_transacciones(mock_driver_class)
+    mock_tx.run.side_effect = [MagicMock(), CypherSyntaxError("fallo"), MagicMock()]
+    builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
+    df = pd.DataFrame({
+        "origen": ["A", "A", "B", "C", "D"],
+        "destino": ["B", "C", "C", "D", "E"],
+        "peso": [0.9, 0.95, 1.0, 0.92, 0.91],
+        "votaciones_comunes": [10, 10, 9, 8, 7],
+    })
+
+    with caplog.at_level(logging.INFO, logger="analysis.graph_builder"):
+        builder.importar_acuerdos(df, "15", tamano_lote=2)
+
+    assert mock_session.run.call_count == 0
+    assert mock_session.execute_write.call_count == 3
+    query, = mock_tx.run.call_args_list[0].args
+    assert "UNWIND $filas" in query and "VOTA_IGUAL_QUE" in query
+    assert mock_tx.run.call_args_list[0].kwargs["filas"] == [
+        {"origen": "A", "destino": "B", "peso": 0.9, "comunes": 10},
+        {"origen": "A", "destino": "C", "peso": 0.95, "comunes": 10},
+    ]
+    assert mock_tx.run.call_args_list[2].kwargs["legislatura"] == "15"
+    assert "Error importando lote de acuerdos (2-4)" in caplog.text
+    # Solo se cuentan las aristas de los lotes que se han escrito
+    assert "3 de 5 relaciones VOTA_IGUAL_QUE importadas" in caplog.text
+
+
+@patch("analysis.graph_builder.GraphDatabase.driver")
+def test_importar_acuerdos_columnas_faltantes(mock_driver_class):
+    """Verifica que se lanza ValueError si faltan columnas en las aristas."""
+    builder = GraphBuilder(uri="bolt://fake", user="neo4j", password="test", database="Congreso")
+    with pytest.raises(ValueError, match="Faltan columnas requeridas"):
+        builder.importar_acuerdos(pd.DataFrame({"origen": ["A"]}), "15")
+
+
+def test_exportar_admin_import(tmp_path):
+    """Verifica que la exportación para neo4j-admin deduplica nodos y relaciones entre legislaturas."""
+    (tmp_path / "14").mkdir()
+    (tmp_path / "15").mkdir()
+    pd.DataFrame([
+        {"nombre": "Ana", "grupo_parlamentario": "GP A", "fecha_alta": "01/01/2020", "fecha_baja": "",
+         "legislatura": "14"},
+        {"nombre": "Luis", "grupo_parlamentario": "GP B", "fecha_alta": "01/01/2020", "fecha_baja": "",
+         "legislatura": "14"},
+    ]).to_csv(tmp_path / "14" / "grupos.csv", index=False)
+    pd.DataFrame([
+        {"nombre": "Ana", "grupo_parlamentario": "GP A", "fecha_alta": "01/01/2023", "fecha_baja": "05/05/2024",
+         "legislatura": "15"},
+    ]).to_csv(tmp_path / "15" / "grupos.csv", index=False)
+    pd.DataFrame([
+        {"nombre": "Ana", "provincia": "Diputada por Cádiz", "sustituye_a": "", "fecha_alta_suplencia": "",
+         "fecha_baja_suplencia": "", "legislatura": "15"},
+        {"nombre": "Marta", "provincia": "Diputada por Lugo", "sustituye_a": "Luis",
+         "fecha_alta_suplencia": "02/02/2024", "fecha_baja_suplencia": "", "legislatura": "15"},
+    ]).to_csv(tmp_path / "15" / "diputados.csv", index=False)
+    salida = tmp_path / "neo4j_import"
+
+    filas = GraphBuilder.exportar_admin_import(
+        str(salida),
+        {"14": str(tmp_path / "14" / "grupos.csv"), "15": str(tmp_path / "15" / "grupos.csv")},
+        {"14": str(tmp_path / "14" / "diputados.csv"), "15": str(tmp_path / "15" / "diputados.csv")},
+    )
+
+    def leer(archivo):
+        return pd.read_csv(salida / archivo, dtype=str, keep_default_na=False)
+
+    assert filas == {
+        "nodos_diputado.csv": 3, "nodos_grupo.csv": 2, "nodos_provincia.csv": 2, "nodos_legislatura.csv": 2,
+        "relaciones_pertenece_a.csv": 2, "relaciones_existe_en.csv": 3, "relaciones_participa_en.csv": 4,
+        "relaciones_representa_a.csv": 2, "relaciones_sustituye_a.csv": 1,
+    }
+    diputados = leer("nodos_diputado.csv")
+    assert list(diputados.columns) == ["nombre:ID(Diputado)", ":LABEL"]
+    assert sorted(diputados["nombre:ID(Diputado)"]) == ["Ana", "Luis", "Marta"]
+    assert list(leer("nodos_legislatura.csv").columns) == ["numero:ID(Legislatura)", ":LABEL"]
+
+    # Ana pertenece a GP A en las dos legislaturas: una sola relación con las fechas de la última
+    pertenece = leer("relaciones_pertenece_a.csv")
+    assert list(pertenece.columns) == [":START_ID(Diputado)", ":END_ID(Grupo)", "fecha_alta:date",
+                                       "fecha_baja:date", ":TYPE"]
+    assert pertenece.to_dict("records")[1] == {
+        ":START_ID(Diputado)": "Ana", ":END_ID(Grupo)": "GP A", "fecha_alta:date": "2023-01-01",
+        "fecha_baja:date": "2024-05-05", ":TYPE": "PERTENECE_A",
+    }
+    assert leer("relaciones_representa_a.csv")[":END_ID(Provincia)"].tolist() == ["Cádiz", "Lugo"]
+    assert leer("relaciones_sustituye_a.csv").to_dict("records") == [{
+        ":START_ID(Diputado)": "Marta", ":END_ID(Diputado)": "Luis", "fecha_alta:date": "2024-02-02",
+        "fecha_baja:date": "", ":TYPE": "SUSTITUYE_A",
+    }]
+
+
+def test_exportar_admin_import_sin_csv(tmp_path, caplog):
+    """Verifica que sin CSV de origen se avisa y se escriben los archivos solo con cabecera."""
+    salida = tmp_path / "neo4j_import"
+    with caplog.at_level(logging.WARNING, logger="analysis.graph_builder"):
+        filas = GraphBuilder.exportar_admin_import(str(salida), {"15": str(tmp_path / "no.csv")}, {})
+
+    assert set(filas.values()) == {0}
+    assert "se omite la legislatura 15" in caplog.text
+    assert list(pd.read_csv(salida / "relaciones_existe_en.csv").columns) == [
+        ":START_ID(Grupo)", ":END_ID(Legislatura)", ":TYPE"
+    ]
@@ -0,0 +1,161 @@
+# tests/analysis/test_indice_textual.py
+
+import os
+import sqlite3
+import pytest
+from unittest.mock import patch
+
+from analysis import indice_textual
+from analysis.indice_textual import IndiceTextual, tokenizar
+from scraping.utils.almacenamiento import crear_almacen
+
+DIARIO = """<section id="portlet_publicaciones">
+<p>Sesión plenaria celebrada el martes 10 de octubre de 2023</p>
+<p>El señor PRESIDENTE: Se abre la sesión.</p>
+<p>La señora MINISTRA DE SANIDAD (García Gómez): Hablamos del estado de alarma y de la vivienda.</p>
+<p>El señor LÓPEZ RUIZ: La vivienda es un derecho; el estado no puede alarmar.</p>
+</section>"""
+
+
+@pytest.fixture
+def diarios(tmp_path):
+    almacen = crear_almacen(str(tmp_path / "diarios" / "15"), "html")
+    almacen.guardar("DSCD-15-PL-10", DIARIO)
+    return almacen
+
+
+@pytest.fixture
+def indice(tmp_path):
+    with IndiceTextual(str(tmp_path / "indice" / "intervenciones.sqlite")) as indice:
+        yield indice
+
+
+# Test para comprobar que la tokenización ignora mayúsculas y tildes
+def test_tokenizar():
+    assert tokenizar("Sesión PLENARIA, núm. 5") == ["sesion", "plenaria", "num", "5"]
+
+
+# Test para comprobar una búsqueda por término con orador, CVE y fecha en el resultado
+def test_buscar_termino(diarios, indice):
+    assert indice.actualizar(diarios.directorio) == 1
+
+    resultados = indice.buscar("VIVIENDA")
+
+    assert [r["orador"] for r in resultados] == ["García Gómez", "LÓPEZ RUIZ"]
+    assert resultados[0]["cve"] == "DSCD-15-PL-10"
+    assert resultados[0]["fecha"] == "2023-10-10"
+    assert resultados[0]["cargo"] == "MINISTRA DE SANIDAD"
+
+
+# Test para comprobar que las frases exigen términos consecutivos
+def test_buscar_frase(diarios, indice):
+    indice.actualizar(diarios.directorio)
+
+    assert [r["orador"] for r in indice.buscar('"estado de alarma"')] == ["García Gómez"]
+    # Ambos oradores dicen 'estado', pero solo uno la frase completa junto a 'vivienda'
+    assert len(indice.buscar('estado vivienda')) == 2
+    assert indice.buscar('"alarma de estado"') == []
+
+
+# Test para comprobar el filtro por orador, el límite y las consultas sin resultados
+def test_buscar_filtros(diarios, indice):
+    indice.actualizar(diarios.directorio)
+
+    assert [r["orador"] for r in indice.buscar("vivienda", orador="lópez")] == ["LÓPEZ RUIZ"]
+    assert len(indice.buscar("vivienda", limite=1)) == 1
+    assert indice.buscar("inexistente") == []
+    assert indice.buscar("   ") == []
+
+
+# Test para comprobar que solo se reindexan los diarios nuevos o modificados
+def test_actualizar_incremental(diarios, indice):
+    assert indice.actualizar(diarios.directorio) == 1
+
+    with patch.object(indice_textual, "parsear_archivo") as mock_parsear:
+        assert indice.actualizar(diarios.directorio) == 0
+    mock_parsear.assert_not_called()
+
+    # Un diario modificado sustituye sus intervenciones anteriores en el índice
+    diarios.guardar("DSCD-15-PL-10", DIARIO.replace("vivienda", "sanidad"))
+    assert indice.actualizar(diarios.directorio) == 1
+    assert indice.buscar("vivienda") == []
+    assert len(indice.buscar("sanidad")) == 2
+
+
+# Test para comprobar que solo se calcula el hash de los diarios cuyo tamaño o fecha han cambiado
+def test_actualizar_sin_hash_si_no_cambian_metadatos(diarios, indice):
+    ruta = diarios.localizar("DSCD-15-PL-10")
+    indice.actualizar(diarios.directorio)
+
+    with patch.object(indice_textual, "hash_archivo") as mock_hash:
+        assert indice.actualizar(diarios.directorio) == 0
+    mock_hash.assert_not_called()
+
+    # Otra fecha con el mismo contenido: se calcula el hash, pero no se reindexa
+    estado = os.stat(ruta)
+    os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+    with patch.object(indice_textual, "parsear_archivo") as mock_parsear, \
+            patch.object(indice_textual, "hash_archivo", wraps=indice_textual.hash_archivo) as mock_hash:
+        assert indice.actualizar(diarios.directorio) == 0
+        assert indice.actualizar(diarios.directorio) == 0
+    mock_hash.assert_called_once_with(ruta)
+    mock_parsear.assert_not_called()
+
+
+# Test para comprobar que un índice sin tamaño ni fecha de los diarios se migra y se completa
+def test_migrar_indice_sin_metadatos(diarios, tmp_path):
+    ruta = str(tmp_path / "indice.sqlite")
+    with sqlite3.connect(ruta) as conexion:
+        conexion.execute("CREATE TABLE documentos (cve TEXT PRIMARY KEY, sha256 TEXT NOT NULL, legislatura TEXT)")
+        conexion.execute("INSERT INTO documentos VALUES (?, ?, '15')",
+                         ("DSCD-15-PL-10", indice_textual.hash_archivo(diarios.localizar("DSCD-15-PL-10"))))
+    conexion.close()
+
+    with IndiceTextual(ruta) as indice:
+        assert indice.actualizar(diarios.directorio) == 0
+        with patch.object(indice_textual, "hash_archivo") as mock_hash:
+            assert indice.actualizar(diarios.directorio) == 0
+        mock_hash.assert_not_called()
+
+
+# Test para comprobar que el índice persiste en disco entre aperturas
+def test_indice_persistente(diarios, tmp_path):
+    ruta = str(tmp_path / "indice.sqlite")
+    with IndiceTextual(ruta) as indice:
+        indice.actualizar(diarios.directorio)
+
+    with IndiceTextual(ruta) as indice:
+        assert len(indice.buscar('"estado de alarma"')) == 1
+        assert indice.actualizar(diarios.directorio) == 0
+
+
+# Test para comprobar que el filtro por orador se combina con las frases
+def test_buscar_frase_y_orador(diarios, indice):
+    indice.actualizar(diarios.directorio)
+
+    assert indice.buscar('"estado de alarma"', orador="lópez") == []
+    assert [r["orador"] for r in indice.buscar('"la vivienda"', orador="lópez")] == ["LÓPEZ RUIZ"]
+    # Una búsqueda anterior no deja candidatos para la siguiente
+    assert len(indice.buscar("vivienda")) == 2
+
+
+# Test para comprobar que los diarios borrados del disco desaparecen del índice, sin tocar otras legislaturas
+def test_actualizar_elimina_borrados(diarios, indice, tmp_path):
+    otra = crear_almacen(str(tmp_path / "diarios" / "14"), "html")
+    otra.guardar("DSCD-14-PL-3", DIARIO.replace("vivienda", "pensiones"))
+    indice.actualizar(otra.directorio)
+    diarios.guardar("DSCD-15-PL-11", DIARIO.replace("vivienda", "empleo"))
+    assert indice.actualizar(diarios.directorio) == 2
+
+    (tmp_path / "diarios" / "15" / "DSCD-15-PL-10.html").unlink()
+    assert indice.actualizar(diarios.directorio) == 0
+
+    assert indice.buscar("vivienda") == []
+    assert len(indice.buscar("empleo")) == 2
+    assert len(indice.buscar("pensiones")) == 2
+
+    # Con el directorio vacío se usa la legislatura de su nombre
+    (tmp_path / "diarios" / "15" / "DSCD-15-PL-11.html").unlink()
+    indice.actualizar(diarios.directorio)
+    assert indice.buscar("empleo") == []
+    assert len(indice.buscar("pensiones")) == 2
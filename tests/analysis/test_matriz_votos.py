@@ -0,0 +1,119 @@
+# tests/analysis/test_matriz_votos.py
+
+import os
+import numpy as np
+import pytest
+
+from analysis.matriz_votos import MatrizVotos, SI, NO, ABSTENCION, NO_VOTA
+
+DIRECTORIO_VOTACIONES = os.path.join(os.path.dirname(__file__), "..", "fixtures", "votaciones")
+
+
+@pytest.fixture
+def matriz():
+    return MatrizVotos.desde_directorio(DIRECTORIO_VOTACIONES)
+
+
+# Test para comprobar la construcción de la matriz diputado × votación
+def test_desde_directorio(matriz):
+    assert matriz.votos.shape == (5, 3)
+    assert matriz.diputados[2] == "Castro, Carla"
+    assert matriz.grupos == ["Grupo Parlamentario A", "Grupo Parlamentario B"]
+    assert list(matriz.votaciones["id"]) == ["5-1", "5-2", "5-3"]
+    assert list(matriz.votos[2]) == [SI, NO, SI]
+    assert list(matriz.votos[4]) == [NO, NO, ABSTENCION]
+
+
+# Test para comprobar que los 'No vota' quedan fuera del cálculo de acuerdo
+def test_desde_registros_no_vota():
+    registros = [
+        {"informacion": {"sesion": 1, "numeroVotacion": 1},
+         "votaciones": [{"diputado": "X", "grupo": "G", "voto": "Sí"}, {"diputado": "Y", "grupo": "G", "voto": "No vota"}]},
+        {"informacion": {"sesion": 1, "numeroVotacion": 2},
+         "votaciones": [{"diputado": "X", "grupo": "G", "voto": "No"}, {"diputado": "Y", "grupo": "G", "voto": "No"}]},
+    ]
+    matriz = MatrizVotos.desde_registros(registros)
+    acuerdo, comunes = matriz.acuerdo()
+
+    assert matriz.votos[1, 0] == NO_VOTA
+    assert comunes[0, 1] == 1
+    assert acuerdo[0, 1] == 1.0
+
+
+# Test para comprobar el acuerdo por pares
+def test_acuerdo(matriz):
+    acuerdo, comunes = matriz.acuerdo()
+
+    assert acuerdo[0, 1] == pytest.approx(1.0)
+    assert acuerdo[0, 2] == pytest.approx(2 / 3)
+    assert acuerdo[0, 3] == pytest.approx(0.0)
+    assert acuerdo[3, 4] == pytest.approx(2 / 3)
+    assert np.allclose(acuerdo, acuerdo.T)
+    assert (comunes == 3).all()
+
+
+# Test para comprobar el índice de Rice por grupo
+def test_indice_rice(matriz):
+    rice = matriz.indice_rice().set_index("grupo")["indice_rice"]
+
+    assert rice["Grupo Parlamentario B"] == pytest.approx(1.0)
+    assert rice["Grupo Parlamentario A"] == pytest.approx(7 / 9)
+
+
+# Test para comprobar la detección de rebeldes respecto a la mayoría de su grupo
+def test_rebeldes(matriz):
+    rebeldes = matriz.rebeldes().set_index("nombre")
+
+    assert rebeldes.loc["Castro, Carla", "votos_rebeldes"] == 1
+    assert rebeldes.loc["Estévez, Eva", "votos_rebeldes"] == 1
+    assert rebeldes.loc["Alonso, Ana", "votos_rebeldes"] == 0
+    assert rebeldes.loc["Castro, Carla", "tasa_rebeldia"] == pytest.approx(1 / 3)
+    assert rebeldes.loc["Castro, Carla", "grupo"] == "Grupo Parlamentario A"
+
+
+# Test para comprobar que los cambios de grupo se respetan votación a votación
+def test_rebeldes_cambio_de_grupo():
+    def votacion(n, votos):
+        return {"informacion": {"sesion": 1, "numeroVotacion": n},
+                "votaciones": [{"diputado": d, "grupo": g, "voto": v} for d, g, v in votos]}
+
+    matriz = MatrizVotos.desde_registros([
+        votacion(1, [("X", "G1", "Sí"), ("Y", "G1", "Sí"), ("Z", "G2", "No")]),
+        votacion(2, [("X", "G2", "No"), ("Y", "G1", "Sí"), ("Z", "G2", "No")]),
+    ])
+    rebeldes = matriz.rebeldes().set_index("nombre")
+
+    assert rebeldes.loc["X", "votos_rebeldes"] == 0
+    assert rebeldes.loc["X", "grupo"] == "G2"
+
+
+# Test para comprobar que una matriz vacía no falla
+def test_matriz_vacia(tmp_path):
+    matriz = MatrizVotos.desde_directorio(str(tmp_path))
+
+    assert matriz.votos.shape == (0, 0)
+    assert matriz.rebeldes().empty
+    assert matriz.aristas_acuerdo().empty
+
+
+# Test para comprobar las aristas VOTA_IGUAL_QUE por encima del umbral
+def test_aristas_acuerdo(matriz):
+    aristas = matriz.aristas_acuerdo(umbral=0.6)
+
+    pares = set(zip(aristas["origen"], aristas["destino"]))
+    assert ("Alonso, Ana", "Bueno, Beto") in pares
+    assert ("Alonso, Ana", "Castro, Carla") in pares
+    assert ("Díaz, Dani", "Estévez, Eva") in pares
+    assert not any(("Díaz, Dani" in par and "Alonso, Ana" in par) for par in pares)
+    assert matriz.aristas_acuerdo(umbral=0.6, min_comunes=4).empty
+
+
+# Test para comprobar la exportación de arrays a .npz
+def test_exportar_npz(matriz, tmp_path):
+    ruta = str(tmp_path / "salida" / "matriz.npz")
+    matriz.exportar_npz(ruta)
+
+    with np.load(ruta) as datos:
+        assert datos["votos"].shape == (5, 3)
+        assert list(datos["diputados"])[0] == "Alonso, Ana"
+        assert datos["acuerdo"][0, 1] == pytest.approx(1.0)
@@ -0,0 +1,123 @@
+# tests/analysis/test_parser_intervenciones.py
+
+import io
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from analysis import parser_intervenciones as parser
+from scraping.utils.almacenamiento import crear_almacen
+
+DIARIO = """<section id="portlet_publicaciones">
+<h2>DIARIO DE SESIONES DEL CONGRESO DE LOS DIPUTADOS</h2>
+<p>Sesión plenaria núm. 5, celebrada el miércoles 29 de noviembre de 2023</p>
+<p>ORDEN DEL DÍA</p>
+<p>Se abre la sesión a las nueve de la mañana.</p>
+<p>El señor PRESIDENTE: Buenos días. Se abre la sesión. (Rumores.)</p>
+<p>La señora MINISTRA DE HACIENDA (Montero Cuadrado): Gracias, señor presidente.</p>
+<p>Señorías, <b>continúo</b> con mi intervención.</p>
+<p>(Aplausos.)</p>
+<p>El señor SÁNCHEZ PÉREZ-CASTEJÓN (Presidente del Gobierno): Muchas gracias.</p>
+</section>"""
+
+
+@pytest.fixture
+def directorio_diarios(tmp_path):
+    almacen = crear_almacen(str(tmp_path / "15"), "gzip")
+    almacen.guardar("DSCD-15-PL-5", DIARIO)
+    almacen.guardar("DSCD-15-PL-6", DIARIO.replace("29 de noviembre", "30 de noviembre"))
+    return str(tmp_path / "15")
+
+
+# Test para comprobar que un diario se divide en intervenciones con orador, cargo y acotaciones
+def test_parsear_diario():
+    intervenciones = parser.parsear_diario(io.BytesIO(DIARIO.encode("utf-8")), "DSCD-15-PL-5")
+
+    assert [i["orden"] for i in intervenciones] == [1, 2, 3]
+    assert all(i["fecha"] == "2023-11-29" and i["legislatura"] == "15" for i in intervenciones)
+
+    presidente, ministra, sanchez = intervenciones
+    assert (presidente["orador"], presidente["cargo"]) == ("PRESIDENTE", "PRESIDENTE")
+    assert presidente["texto"] == "Buenos días. Se abre la sesión."
+    assert presidente["anotaciones"] == ["Rumores"]
+
+    # El paréntesis tras un cargo es el nombre del orador; los párrafos siguientes se acumulan
+    assert (ministra["orador"], ministra["cargo"]) == ("Montero Cuadrado", "MINISTRA DE HACIENDA")
+    assert ministra["texto"] == "Gracias, señor presidente.\nSeñorías, continúo con mi intervención."
+    assert ministra["anotaciones"] == ["Aplausos"]
+
+    assert (sanchez["orador"], sanchez["cargo"]) == ("SÁNCHEZ PÉREZ-CASTEJÓN", "Presidente del Gobierno")
+
+
+# Test para comprobar que un diario sin oradores no genera intervenciones
+def test_parsear_diario_sin_oradores():
+    html = b"<section><p>celebrada el lunes 1 de enero de 2024</p><p>Texto suelto.</p></section>"
+    assert parser.parsear_diario(io.BytesIO(html), "DSCD-15-PL-1") == []
+
+
+# Test para comprobar la extracción de fechas y la legislatura del CVE
+def test_extraer_fecha_y_legislatura():
+    assert parser.extraer_fecha("Sesión celebrada el martes, 5 de marzo de 2024") == "2024-03-05"
+    assert parser.extraer_fecha("celebrada el 5 de brumario de 2024") is None
+    assert parser.extraer_fecha("Sin fecha") is None
+    assert parser.legislatura_de_cve("DSCD-14-PL-120") == "14"
+    assert parser.legislatura_de_cve("desconocido") == ""
+
+
+# Test para comprobar que solo se separan las acotaciones y no los paréntesis del propio discurso
+def test_separar_anotaciones_conserva_referencias():
+    texto = "La Ley de Amnistía (Ley Orgánica 1/2024) es inconstitucional, dice el (PNV). (Aplausos.) (Rumores)"
+
+    limpio, anotaciones = parser.separar_anotaciones(texto)
+
+    assert limpio == "La Ley de Amnistía (Ley Orgánica 1/2024) es inconstitucional, dice el (PNV)."
+    assert anotaciones == ["Aplausos", "Rumores"]
+
+
+# Test para comprobar que se reconocen oradores con apellidos catalanes o gallegos (À, Ç, L·L...)
+def test_parsear_diario_oradores_latin1():
+    html = """<section><p>celebrada el lunes 1 de enero de 2024</p>
+<p>El señor PRESIDENTE: Tiene la palabra la señora Borràs.</p>
+<p>La señora BORRÀS CASTANYER: Gràcies.</p>
+<p>El señor GARCIA I COL·LEGI (Portavoz): Moltes gràcies.</p></section>"""
+
+    intervenciones = parser.parsear_diario(io.BytesIO(html.encode("utf-8")), "DSCD-15-PL-1")
+
+    assert [i["orador"] for i in intervenciones] == ["PRESIDENTE", "BORRÀS CASTANYER", "GARCIA I COL·LEGI"]
+    assert intervenciones[1]["texto"] == "Gràcies."
+
+
+# Test para comprobar que un archivo ilegible se registra y no detiene el proceso
+def test_parsear_archivo_error(caplog):
+    assert parser.parsear_archivo(("DSCD-15-PL-1", "/no/existe.html")) == []
+    assert "Error parseando el diario DSCD-15-PL-1" in caplog.text
+
+
+# Test para comprobar que se parsea un directorio comprimido con un pool de procesos
+def test_parsear_legislatura_pool(directorio_diarios):
+    df = parser.parsear_legislatura(directorio_diarios, num_procesos=2)
+
+    assert list(df.columns) == parser.COLUMNAS
+    assert len(df) == 6
+    assert set(df["fecha"]) == {"2023-11-29", "2023-11-30"}
+
+
+# Test para comprobar la exportación a Parquet particionado por legislatura
+def test_procesar_legislatura_parquet(directorio_diarios, tmp_path):
+    salida = str(tmp_path / "parquet")
+
+    assert parser.procesar_legislatura(directorio_diarios, salida, num_procesos=1) == 6
+    # Reprocesar la legislatura reemplaza la partición en lugar de duplicar filas
+    assert parser.procesar_legislatura(directorio_diarios, salida, num_procesos=1) == 6
+
+    assert (tmp_path / "parquet" / "legislatura=15").is_dir()
+    df = pd.read_parquet(salida)
+    assert len(df) == 6
+    assert list(df[df["cve"] == "DSCD-15-PL-5"]["anotaciones"].iloc[1]) == ["Aplausos"]
+
+
+# Test para comprobar que no se exporta nada si no hay intervenciones
+def test_procesar_legislatura_vacia(tmp_path):
+    with patch.object(parser, "exportar_parquet") as mock_exportar:
+        assert parser.procesar_legislatura(str(tmp_path / "vacio"), str(tmp_path / "parquet"), num_procesos=1) == 0
+    mock_exportar.assert_not_called()
@@ -0,0 +1,102 @@
+# tests/analysis/test_preprocesado.py
+
+import logging
+import pandas as pd
+
+from analysis.preprocesado import (
+    convertir_fechas,
+    fechas_iso,
+    normalizar_provincias,
+    preprocesar_grupos,
+    preprocesar_diputados,
+    registrar_invalidos,
+)
+
+
+# Test para comprobar la conversión de fechas por columnas: vacías e inválidas quedan como NaT
+def test_convertir_fechas_y_fechas_iso():
+    fechas = convertir_fechas(pd.Series(["01/12/2023", "", None, "31/02/2023", " 05/01/2024 "]))
+
+    assert str(fechas.dtype).startswith("datetime64")
+    assert list(fechas_iso(fechas)) == ["2023-12-01", "", "", "", "2024-01-05"]
+
+
+# Test para comprobar que se elimina el prefijo de la provincia en toda la columna
+def test_normalizar_provincias():
+    provincias = pd.Series(["Diputada por Cádiz", "Diputado por Lugo ", "Barcelona", None])
+
+    assert list(normalizar_provincias(provincias)) == ["Cádiz", "Lugo", "Barcelona", ""]
+
+
+# Test para comprobar que preprocesar_grupos tipa las columnas, descarta filas incompletas e informa de ellas
+def test_preprocesar_grupos():
+    df = pd.DataFrame({
+        "nombre": [" Ana ", "Luis", None, "Marta"],
+        "grupo_parlamentario": ["GP A", "GP B", "GP A", ""],
+        "fecha_alta": ["01/01/2023", "2023-13-01", "01/01/2023", "01/01/2023"],
+        "fecha_baja": [None, "", "", ""],
+        "legislatura": ["15"] * 4,
+    })
+
+    limpio, invalidos = preprocesar_grupos(df)
+
+    assert list(limpio.index) == [0, 1]
+    assert list(limpio["nombre"]) == ["Ana", "Luis"]
+    assert isinstance(limpio["grupo_parlamentario"].dtype, pd.CategoricalDtype)
+    assert list(fechas_iso(limpio["fecha_alta"])) == ["2023-01-01", ""]
+    assert limpio["fecha_baja"].isna().all()
+    assert invalidos.to_dict("records") == [
+        {"fila": 1, "columna": "fecha_alta", "valor": "2023-13-01", "motivo": "fecha inválida"},
+        {"fila": 2, "columna": "nombre", "valor": "", "motivo": "fila sin nombre"},
+        {"fila": 3, "columna": "grupo_parlamentario", "valor": "", "motivo": "fila sin grupo"},
+    ]
+
+
+# Test para comprobar que preprocesar_diputados normaliza provincias y fechas de suplencia
+def test_preprocesar_diputados():
+    df = pd.DataFrame({
+        "nombre": ["Ana", ""],
+        "provincia": ["Diputada por Cádiz", "Diputado por Lugo"],
+        "sustituye_a": [None, "Luis"],
+        "fecha_alta_suplencia": ["15/02/2024", ""],
+        "fecha_baja_suplencia": ["", "ayer"],
+        "legislatura": ["15", "15"],
+    })
+
+    limpio, invalidos = preprocesar_diputados(df)
+
+    assert list(limpio["nombre"]) == ["Ana"]
+    assert list(limpio["provincia"]) == ["Cádiz"]
+    assert isinstance(limpio["provincia"].dtype, pd.CategoricalDtype)
+    assert list(limpio["sustituye_a"]) == [""]
+    assert list(fechas_iso(limpio["fecha_alta_suplencia"])) == ["2024-02-15"]
+    assert list(invalidos["motivo"]) == ["fecha inválida", "fila sin nombre"]
+    assert list(invalidos["columna"]) == ["fecha_baja_suplencia", "nombre"]
+
+
+# Test para comprobar que un CSV limpio no genera informe ni avisos
+def test_sin_invalidos(caplog):
+    df = pd.DataFrame({"nombre": ["Ana"], "grupo_parlamentario": ["GP A"], "fecha_alta": ["01/01/2023"],
+                       "fecha_baja": [""]})
+
+    limpio, invalidos = preprocesar_grupos(df)
+    with caplog.at_level(logging.WARNING, logger="analysis.preprocesado"):
+        registrar_invalidos(invalidos, "grupos.csv")
+
+    assert len(limpio) == 1
+    assert invalidos.empty
+    assert list(invalidos.columns) == ["fila", "columna", "valor", "motivo"]
+    assert caplog.text == ""
+
+
+# Test para comprobar el resumen de valores inválidos en el log
+def test_registrar_invalidos(caplog):
+    invalidos = pd.DataFrame([
+        {"fila": 1, "columna": "fecha_alta", "valor": "x", "motivo": "fecha inválida"},
+        {"fila": 4, "columna": "fecha_baja", "valor": "y", "motivo": "fecha inválida"},
+    ])
+
+    with caplog.at_level(logging.WARNING, logger="analysis.preprocesado"):
+        registrar_invalidos(invalidos, "grupos.csv")
+
+    assert "2 valores inválidos en grupos.csv: {'fecha inválida': 2}" in caplog.text
@@ -2,5 +2,73 @@
 
 import sys
 import os
+import threading
+import functools
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class _ManejadorSilencioso(SimpleHTTPRequestHandler):
+    """Sirve archivos de tests/fixtures sin escribir cada petición en la salida de los tests."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def servidor_fixtures():
+    """
+    Servidor HTTP local que sustituye a la web del Congreso sirviendo los archivos de tests/fixtures.
+    Devuelve la URL base (p. ej. 'http://127.0.0.1:54321').
+    """
+    manejador = functools.partial(_ManejadorSilencioso, directory=FIXTURES_DIR)
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), manejador)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+class _ManejadorPortlets(_ManejadorSilencioso):
+    """
+    Imita los recursos AJAX de los portlets Liferay: responde a cada petición con la respuesta guardada
+    en tests/fixtures/portlets/<p_p_resource_id>[_<idGrupo>]_<página>.json.
+    Esas respuestas siguen el formato que suponen RECURSO_HTTP y CAMPOS_HTTP; no son capturas de la web,
+    así que deben sustituirse por respuestas grabadas en cuanto se valide el modo 'http' contra el servidor real.
+    """
+
+    def do_GET(self):
+        parametros = {clave.rsplit("_", 1)[-1] if clave.startswith("_") else clave: valores[0]
+                      for clave, valores in parse_qs(urlparse(self.path).query).items()}
+        partes = [parametros.get("p_p_resource_id", ""), parametros.get("idGrupo"), parametros.get("paginaActual", "1")]
+        ruta = os.path.join(FIXTURES_DIR, "portlets", "_".join(p for p in partes if p) + ".json")
+        if not os.path.exists(ruta):
+            self.send_error(404)
+            return
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+
+@pytest.fixture
+def servidor_portlets():
+    """
+    Servidor HTTP local que sustituye a los recursos AJAX paginados de la web del Congreso.
+    Devuelve la URL base (p. ej. 'http://127.0.0.1:54321').
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ManejadorPortlets)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
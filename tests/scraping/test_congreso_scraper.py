@@ -2,10 +2,52 @@
 
 import pytest
 from unittest.mock import patch, MagicMock
-from scraping.congreso_scraper import CongresoScraper
+from scraping.congreso_scraper import CongresoScraper, FilaPleno
 import logging
 
 
+def _fila(cve, href="http://fake.link"):
+    """Construye una fila de resultados con el formato que devuelve extraer_filas_html."""
+    return {
+        "celdas": [{"texto": "Diario de Sesiones", "html": "", "enlaces": []},
+                   {"texto": cve, "html": cve, "enlaces": []}],
+        "cabeceras": [],
+        "enlaces": [{"texto": "PDF", "href": "http://fake.pdf"}, {"texto": "Texto íntegro", "href": href}]
+    }
+
+
+def _fila_html(cve, href="http://fake.link"):
+    """Construye el HTML de una fila de resultados tal como aparece en la tabla de la web."""
+    return (f'<tr><td>Diario de Sesiones</td><td>{cve}</td>'
+            f'<td><a href="http://fake.pdf">PDF</a> <a href="{href}">Texto íntegro</a></td></tr>')
+
+
+def _captura(*filas_html):
+    """Simula la captura del HTML de las filas que devuelve el navegador a extraer_filas_html."""
+    return {"base": "https://www.congreso.es/busqueda-de-publicaciones", "html": "".join(filas_html)}
+
+
+@pytest.fixture(autouse=True)
+def manifiesto():
+    """
+    Sustituye el manifiesto SQLite por un mock para no crear archivos en los tests del scraper.
+    """
+    with patch("scraping.congreso_scraper.ManifiestoDescargas") as mock_cls:
+        mock_cls.return_value.contiene.return_value = False
+        yield mock_cls.return_value
+
+
+@pytest.fixture(autouse=True)
+def almacen():
+    """
+    Sustituye el almacén de diarios por un mock para no escribir archivos en los tests del scraper.
+    """
+    with patch("scraping.congreso_scraper.crear_almacen") as mock_crear:
+        mock_crear.return_value.localizar.return_value = None
+        mock_crear.return_value.guardar.side_effect = lambda cve, contenido: f"fake/output/{cve}.html"
+        yield mock_crear.return_value
+
+
 @pytest.fixture
 def scraper():
     """
@@ -41,7 +83,7 @@ def test_apply_filters_ok(mock_ec, mock_select, mock_sel_valor, mock_click, scra
     mock_click.assert_called_once()
 
 
-# Test para comprobar que _apply_filters lanza excepción y cierra el driver si algo falla
+# Test para comprobar que _apply_filters relanza la excepción y deja el navegador a descargar_plenos
 @patch("scraping.congreso_scraper.Select", side_effect=Exception("fallo"))
 def test_apply_filters_exception(mock_select, scraper):
     scraper.driver = MagicMock()
@@ -52,20 +94,37 @@ def test_apply_filters_exception(mock_select, scraper):
     with pytest.raises(Exception):
         scraper._apply_filters()
 
-    scraper.driver.quit.assert_called_once()
+    scraper.driver.quit.assert_not_called()
 
 
-# Test que verifica que _procesar_fila guarda un archivo nuevo correctamente
-@patch("scraping.congreso_scraper.guardar_html_contenido", return_value=True)
-@patch("os.path.exists", return_value=False)
-def test_procesar_fila_guarda(mock_exists, mock_guardar, scraper):
-    fila = MagicMock()
-    td = MagicMock(text="DSCD-15-PL-1")
-    fila.find_elements.return_value = [td]
+# Test para comprobar que si falla la paginación se liberan el navegador, los hilos de descarga y el SQLite
+@patch("scraping.congreso_scraper.crear_sesion_http")
+@patch("scraping.congreso_scraper.DescargadorConcurrente")
+@patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
+@patch("scraping.congreso_scraper.aceptar_cookies")
+def test_descargar_plenos_libera_recursos_si_falla(mock_cookies, mock_filtros, mock_descargador, mock_sesion,
+                                                   manifiesto, almacen):
+    pool = MagicMock()
+    driver, wait = MagicMock(), MagicMock()
+    pool.obtener.return_value = (driver, wait)
+    scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", modo_descarga="http",
+                              num_workers=4, pool=pool)
+
+    with patch.object(scraper, "_snapshot_pagina", side_effect=RuntimeError("página rota")):
+        with pytest.raises(RuntimeError, match="página rota"):
+            scraper.descargar_plenos()
 
-    enlace = MagicMock()
-    enlace.get_attribute.return_value = "http://fake.link"
-    fila.find_element.return_value = enlace
+    pool.devolver.assert_called_once_with(driver, wait)
+    mock_descargador.return_value.finalizar.assert_called_once()
+    manifiesto.close.assert_called_once()
+    almacen.close.assert_called_once()
+    mock_sesion.return_value.close.assert_called_once()
+
+
+# Test que verifica que _procesar_fila guarda un archivo nuevo correctamente
+@patch("scraping.congreso_scraper.obtener_html_contenido", return_value="<section>pleno</section>")
+def test_procesar_fila_guarda(mock_guardar, scraper, almacen, manifiesto):
+    fila = FilaPleno("DSCD-15-PL-1", "http://fake.link")
 
     scraper.driver = MagicMock()
     scraper.driver.window_handles = ["main", "popup"]
@@ -76,23 +135,52 @@ def test_procesar_fila_guarda(mock_exists, mock_guardar, scraper):
 
     assert result is True
     mock_guardar.assert_called_once()
+    scraper.driver.execute_script.assert_called_once_with("window.open(arguments[0]);", "http://fake.link")
+    almacen.guardar.assert_called_once_with("DSCD-15-PL-1", "<section>pleno</section>")
+    manifiesto.registrar.assert_called_once_with("DSCD-15-PL-1", "http://fake.link", "fake/output/DSCD-15-PL-1.html")
 
 
 # Test que verifica que _procesar_fila devuelve False si el archivo ya existe
-@patch("os.path.exists", return_value=True)
-def test_procesar_fila_ya_existe(mock_exists, scraper):
-    fila = MagicMock()
-    fila.find_elements.return_value = [MagicMock(text="DSCD-15-PL-1")]
-    result = scraper._procesar_fila(fila)
+def test_procesar_fila_ya_existe(scraper, almacen):
+    almacen.localizar.return_value = "fake/output/DSCD-15-PL-1.html"
+    result = scraper._procesar_fila(FilaPleno("DSCD-15-PL-1", "http://fake.link"))
     assert result is False
 
 
-# Test que verifica que _procesar_fila devuelve False si no es un pleno
-def test_procesar_fila_no_es_pleno(scraper):
-    fila = MagicMock()
-    fila.find_elements.return_value = [MagicMock(text="DSCD-15-CM-1")]
-    result = scraper._procesar_fila(fila)
-    assert result is False
+# Test que verifica que _leer_fila extrae el CVE normalizado y el enlace al texto íntegro
+def test_leer_fila_pleno(scraper):
+    fila = _fila(" DSCD-15-PL-12 (Sesión plenaria) ", href="http://fake/texto")
+    assert scraper._leer_fila(fila) == FilaPleno("DSCD-15-PL-12", "http://fake/texto")
+
+
+# Test que verifica que _leer_fila descarta las filas que no son de pleno
+def test_leer_fila_no_es_pleno(scraper):
+    assert scraper._leer_fila(_fila("DSCD-15-CM-1")) is None
+
+
+# Test que verifica que _leer_fila descarta la fila si no tiene enlace al texto íntegro
+def test_leer_fila_sin_enlace(scraper, caplog):
+    fila = _fila("DSCD-15-PL-2")
+    fila["enlaces"] = [{"texto": "PDF", "href": "http://fake.pdf"}]
+
+    assert scraper._leer_fila(fila) is None
+    assert "No se encontró el enlace 'Texto íntegro'" in caplog.text
+
+
+# Test que verifica que el snapshot de la página lee las filas una sola vez y solo conserva plenos
+def test_snapshot_pagina(scraper):
+    scraper.driver = MagicMock()
+    scraper.driver.execute_script.return_value = _captura(
+        _fila_html("DSCD-15-PL-1", href="http://fake/1"),
+        _fila_html("DSCD-15-CM-3", href="http://fake/cm"),
+        _fila_html("DSCD-15-PL-2", href="http://fake/2"),
+    )
+
+    plenos = scraper._snapshot_pagina("//tr")
+
+    assert plenos == [FilaPleno("DSCD-15-PL-1", "http://fake/1"), FilaPleno("DSCD-15-PL-2", "http://fake/2")]
+    scraper.driver.execute_script.assert_called_once()
+    scraper.driver.find_elements.assert_not_called()
 
 
 # Test para descargar plenos con una sola página y sin errores
@@ -101,34 +189,29 @@ def test_procesar_fila_no_es_pleno(scraper):
 @patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", return_value=True)
 @patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
 @patch("scraping.congreso_scraper.aceptar_cookies")
-@patch("scraping.congreso_scraper.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 def test_descargar_plenos_simple(mock_iniciar, mock_cookies, mock_filtros, mock_procesar, mock_rangos, mock_click,
                                  scraper):
     driver = MagicMock()
     wait = MagicMock()
-    driver.find_elements.return_value = [MagicMock(), MagicMock()]
+    driver.execute_script.return_value = _captura(_fila_html("DSCD-15-PL-1"), _fila_html("DSCD-15-PL-2"))
     mock_iniciar.return_value = (driver, wait)
 
     scraper.descargar_plenos()
 
     mock_filtros.assert_called_once()
-    assert mock_procesar.call_count >= 1
+    assert mock_procesar.call_count == 2
+    # Una sola llamada al navegador para leer todas las filas de la página
+    driver.execute_script.assert_called_once()
     driver.quit.assert_called_once()
 
 
-@patch("scraping.congreso_scraper.guardar_html_contenido", return_value=False)
-@patch("os.path.exists", return_value=False)
-def test_procesar_fila_sin_contenido(mock_exists, mock_guardar, scraper):
+@patch("scraping.congreso_scraper.obtener_html_contenido", return_value=None)
+def test_procesar_fila_sin_contenido(mock_guardar, scraper, almacen):
     """
     Test para comprobar el mensaje cuando no se encuentra contenido HTML en la página.
     """
-    fila = MagicMock()
-    td = MagicMock(text="DSCD-15-PL-1")
-    fila.find_elements.return_value = [td]
-
-    enlace = MagicMock()
-    enlace.get_attribute.return_value = "http://fake.link"
-    fila.find_element.return_value = enlace
+    fila = FilaPleno("DSCD-15-PL-1", "http://fake.link")
 
     scraper.driver = MagicMock()
     scraper.driver.window_handles = ["main", "popup"]
@@ -139,6 +222,7 @@ def test_procesar_fila_sin_contenido(mock_exists, mock_guardar, scraper):
 
     assert result is True  # el método sigue devolviendo True aunque no haya contenido
     mock_guardar.assert_called_once()
+    almacen.guardar.assert_not_called()
 
 
 @patch("scraping.congreso_scraper.click_siguiente_pagina", return_value=False)
@@ -146,20 +230,21 @@ def test_procesar_fila_sin_contenido(mock_exists, mock_guardar, scraper):
 @patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", side_effect=Exception("fallo inesperado"))
 @patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
 @patch("scraping.congreso_scraper.aceptar_cookies")
-@patch("scraping.congreso_scraper.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 def test_descargar_plenos_error_en_fila(mock_iniciar, mock_cookies, mock_apply, mock_procesar, mock_rango, mock_click,
                                         scraper):
     """
-    Test para cubrir la excepción lanzada en _procesar_fila dentro del bucle de filas.
+    Test para cubrir la excepción lanzada en _procesar_fila dentro del bucle de filas:
+    el error se registra y se continúa con la siguiente fila.
     """
     mock_driver = MagicMock()
     mock_wait = MagicMock()
-    mock_driver.find_elements.return_value = [MagicMock()]
+    mock_driver.execute_script.return_value = _captura(_fila_html("DSCD-15-PL-1"), _fila_html("DSCD-15-PL-2"))
     mock_iniciar.return_value = (mock_driver, mock_wait)
 
     scraper.descargar_plenos()
 
-    assert mock_procesar.call_count >= 3  # intenta 3 veces
+    assert mock_procesar.call_count == 2
     mock_driver.quit.assert_called_once()
 
 
@@ -190,20 +275,22 @@ def test_apply_filters_prints(mock_ec, mock_select, mock_sel_valor, mock_click,
 @patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", return_value=True)
 @patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
 @patch("scraping.congreso_scraper.aceptar_cookies")
-@patch("scraping.congreso_scraper.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 def test_descargar_plenos_ultima_pagina(mock_iniciar, mock_cookies, mock_filtros, mock_procesar, mock_rango, mock_click,
-                                        scraper):
+                                        scraper, caplog):
     """
-    Test para cubrir el print de 'Última página detectada.' al alcanzar el final de resultados.
+    Test para cubrir el log de 'Última página detectada.' al alcanzar el final de resultados.
     """
     mock_driver = MagicMock()
     mock_wait = MagicMock()
-    mock_driver.find_elements.return_value = [MagicMock()]
+    mock_driver.execute_script.return_value = _captura(_fila_html("DSCD-15-PL-1"))
     mock_iniciar.return_value = (mock_driver, mock_wait)
 
-    scraper.descargar_plenos()
+    with caplog.at_level(logging.INFO, logger="scraping.congreso_scraper"):
+        scraper.descargar_plenos()
 
     mock_rango.assert_called_once()
+    assert "Última página detectada." in caplog.text
     mock_driver.quit.assert_called_once()
 
 
@@ -212,20 +299,22 @@ def test_descargar_plenos_ultima_pagina(mock_iniciar, mock_cookies, mock_filtros
 @patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", return_value=True)
 @patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
 @patch("scraping.congreso_scraper.aceptar_cookies")
-@patch("scraping.congreso_scraper.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 def test_descargar_plenos_no_hay_mas_paginas(mock_iniciar, mock_cookies, mock_filtros, mock_procesar, mock_rango,
-                                             mock_click, scraper):
+                                             mock_click, scraper, caplog):
     """
-    Test para cubrir el print de 'No hay más páginas.' cuando click_siguiente_pagina devuelve False.
+    Test para cubrir el log de 'No hay más páginas.' cuando click_siguiente_pagina devuelve False.
     """
     mock_driver = MagicMock()
     mock_wait = MagicMock()
-    mock_driver.find_elements.return_value = [MagicMock()]
+    mock_driver.execute_script.return_value = _captura(_fila_html("DSCD-15-PL-1"))
     mock_iniciar.return_value = (mock_driver, mock_wait)
 
-    scraper.descargar_plenos()
+    with caplog.at_level(logging.INFO, logger="scraping.congreso_scraper"):
+        scraper.descargar_plenos()
 
     mock_click.assert_called_once()
+    assert "No hay más páginas." in caplog.text
     mock_driver.quit.assert_called_once()
 
 
@@ -254,10 +343,10 @@ def test_apply_filters_cobertura_final(mock_ec, mock_select, mock_sel_valor, moc
 
 
 
-@patch("scraping.congreso_scraper.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 @patch("scraping.congreso_scraper.get_rango_resultados")
 @patch("scraping.congreso_scraper.click_siguiente_pagina", return_value=False)
-@patch("scraping.congreso_scraper.guardar_html_contenido", return_value=True)
+@patch("scraping.congreso_scraper.obtener_html_contenido", return_value="<section></section>")
 @patch("scraping.congreso_scraper.hacer_click_esperando")
 @patch("scraping.congreso_scraper.seleccionar_opcion_por_valor")
 @patch("scraping.congreso_scraper.Select")
@@ -267,8 +356,7 @@ def test_descargar_plenos_cobertura_final(
         scraper
 ):
     """
-    Test para cubrir el 'if i >= len(filas_actualizadas)' y 'pagina += 1'
-    en descargar_plenos().
+    Test para cubrir una página sin filas de resultados en descargar_plenos().
     """
     # Preparamos mocks del driver y el wait
     driver_mock = MagicMock()
@@ -277,12 +365,8 @@ def test_descargar_plenos_cobertura_final(
 
     scraper.driver, scraper.wait = driver_mock, wait_mock
 
-    # Fila simulada
-    fila = MagicMock()
-    driver_mock.find_elements.side_effect = [
-        [fila],  # filas iniciales
-        []  # filas_actualizadas vacías → se cumple i >= len()
-    ]
+    # Página sin filas
+    driver_mock.execute_script.return_value = _captura()
 
     wait_mock.until.return_value = True
     mock_rango.return_value = (1, 100)
@@ -293,13 +377,14 @@ def test_descargar_plenos_cobertura_final(
     scraper.descargar_plenos()
 
     # Afirmación básica de finalización
+    scraper._procesar_fila.assert_not_called()
     assert driver_mock.quit.called
 
 
-@patch("scraping.congreso_scraper.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 @patch("scraping.congreso_scraper.get_rango_resultados")
 @patch("scraping.congreso_scraper.click_siguiente_pagina", side_effect=[True, False])
-@patch("scraping.congreso_scraper.guardar_html_contenido", return_value=True)
+@patch("scraping.congreso_scraper.obtener_html_contenido", return_value="<section></section>")
 @patch("scraping.congreso_scraper.hacer_click_esperando")
 @patch("scraping.congreso_scraper.seleccionar_opcion_por_valor")
 @patch("scraping.congreso_scraper.Select")
@@ -323,12 +408,10 @@ def test_descargar_plenos_cobertura_pagina_incrementada(
 
     scraper._apply_filters = MagicMock()
 
-    # Mock de filas encontradas
-    fila = MagicMock()
-    mock_driver.find_elements.side_effect = [
-        [fila], [fila],  # Primera página
-        [fila], [fila],  # Segunda página
-        []  # Tercera iteración: se detiene
+    # Mock de filas encontradas: una por página
+    mock_driver.execute_script.side_effect = [
+        _captura(_fila_html("DSCD-15-PL-1")),  # Primera página
+        _captura(_fila_html("DSCD-15-PL-2")),  # Segunda página
     ]
 
     mock_rango.return_value = (1, 100)
@@ -341,3 +424,153 @@ def test_descargar_plenos_cobertura_pagina_incrementada(
     # Verificamos que hubo 2 iteraciones (y por tanto un incremento de página)
     assert scraper._procesar_fila.call_count == 2
     assert mock_next.call_count == 2  # click_siguiente_pagina fue llamado 2 veces
+
+
+def test_congreso_scraper_modo_descarga_invalido():
+    """Verifica que se rechaza un modo de descarga desconocido."""
+    with pytest.raises(ValueError, match="Modo de descarga no válido"):
+        CongresoScraper(driver_path="fake/path", output_dir="fake/output", modo_descarga="ftp")
+
+
+@patch("scraping.congreso_scraper.obtener_html_contenido")
+@patch("scraping.congreso_scraper.obtener_html_http", return_value="<section></section>")
+def test_procesar_fila_modo_http(mock_descargar, mock_guardar):
+    """Verifica que en modo 'http' el pleno se descarga con la sesión HTTP sin abrir pestañas."""
+    scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", modo_descarga="http")
+    fila = FilaPleno("DSCD-15-PL-1", "http://fake.link")
+
+    scraper.driver = MagicMock()
+    scraper.wait = MagicMock()
+    scraper.session = MagicMock()
+
+    assert scraper._procesar_fila(fila) is True
+    mock_descargar.assert_called_once()
+    assert mock_descargar.call_args[0][:2] == (scraper.session, "http://fake.link")
+    mock_guardar.assert_not_called()
+    scraper.driver.execute_script.assert_not_called()
+
+
+@patch("scraping.congreso_scraper.crear_sesion_http")
+@patch("scraping.congreso_scraper.get_rango_resultados", return_value=(10, 10))
+@patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", return_value=True)
+@patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
+@patch("scraping.congreso_scraper.aceptar_cookies")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_descargar_plenos_modo_http_crea_y_cierra_sesion(mock_iniciar, mock_cookies, mock_filtros, mock_procesar,
+                                                         mock_rango, mock_sesion):
+    """Verifica que en modo 'http' se crea la sesión a partir del navegador y se cierra al terminar."""
+    driver = MagicMock()
+    driver.execute_script.return_value = _captura(_fila_html("DSCD-15-PL-1"))
+    mock_iniciar.return_value = (driver, MagicMock())
+
+    scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", modo_descarga="http")
+    scraper.descargar_plenos()
+
+    mock_sesion.assert_called_once_with(driver, tamano_pool=10, cache=None)
+    mock_sesion.return_value.close.assert_called_once()
+
+
+def test_congreso_scraper_paralelo_requiere_http():
+    """Verifica que no se permite descargar en paralelo usando pestañas del navegador."""
+    with pytest.raises(ValueError, match="requiere el modo de descarga 'http'"):
+        CongresoScraper(driver_path="fake/path", output_dir="fake/output", num_workers=4)
+
+
+def test_procesar_fila_encola_si_hay_descargador():
+    """Verifica que con descargador concurrente la fila se encola en lugar de descargarse en el acto."""
+    scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", modo_descarga="http", num_workers=2)
+    scraper.descargador = MagicMock()
+    scraper._descargar_pleno = MagicMock()
+    fila = FilaPleno("DSCD-15-PL-7", "http://fake.link")
+
+    assert scraper._procesar_fila(fila) is True
+    scraper.descargador.encolar.assert_called_once()
+    scraper.descargador.encolar.assert_called_once_with("DSCD-15-PL-7", "http://fake.link")
+    scraper._descargar_pleno.assert_not_called()
+
+
+@patch("scraping.congreso_scraper.DescargadorConcurrente")
+@patch("scraping.congreso_scraper.crear_sesion_http")
+@patch("scraping.congreso_scraper.get_rango_resultados", return_value=(10, 10))
+@patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", return_value=True)
+@patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
+@patch("scraping.congreso_scraper.aceptar_cookies")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_descargar_plenos_paralelo(mock_iniciar, mock_cookies, mock_filtros, mock_procesar, mock_rango, mock_sesion,
+                                   mock_descargador_cls):
+    """Verifica que en modo paralelo se arranca el pool de descargas y se espera a que termine."""
+    driver = MagicMock()
+    driver.execute_script.return_value = _captura(_fila_html("DSCD-15-PL-1"))
+    mock_iniciar.return_value = (driver, MagicMock())
+    descargador = mock_descargador_cls.return_value
+    descargador.finalizar.return_value = 1
+    descargador.fallidos = 0
+
+    scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", modo_descarga="http", num_workers=8)
+    scraper.descargar_plenos()
+
+    assert mock_descargador_cls.call_args[1]["num_workers"] == 8
+    mock_sesion.assert_called_once_with(driver, tamano_pool=10, cache=None)
+    descargador.iniciar.assert_called_once()
+    descargador.finalizar.assert_called_once()
+    assert scraper.descargador is None
+
+
+def test_procesar_fila_ya_en_manifiesto(scraper, manifiesto):
+    """Verifica que un pleno registrado en el manifiesto no se vuelve a descargar."""
+    manifiesto.contiene.return_value = True
+    scraper._descargar_pleno = MagicMock()
+
+    assert scraper._procesar_fila(FilaPleno("DSCD-15-PL-1", "http://fake.link")) is False
+    scraper._descargar_pleno.assert_not_called()
+
+
+def test_procesar_fila_registra_archivo_previo(scraper, manifiesto, almacen):
+    """Verifica que un archivo descargado antes de existir el manifiesto se registra sin descargarse."""
+    almacen.localizar.return_value = "fake/output/DSCD-15-PL-3.html"
+
+    assert scraper._procesar_fila(FilaPleno("DSCD-15-PL-3", "http://fake/3")) is False
+    manifiesto.registrar.assert_called_once_with("DSCD-15-PL-3", "http://fake/3", "fake/output/DSCD-15-PL-3.html")
+
+
+def test_guardar_pleno_registra_en_manifiesto(scraper, manifiesto):
+    """Verifica que solo se registran en el manifiesto las descargas correctas."""
+    scraper._descargar_pleno = MagicMock(side_effect=["<section></section>", None])
+
+    assert scraper._guardar_pleno("DSCD-15-PL-1", "http://fake/1") is True
+    assert scraper._guardar_pleno("DSCD-15-PL-2", "http://fake/2") is False
+    manifiesto.registrar.assert_called_once_with("DSCD-15-PL-1", "http://fake/1", "fake/output/DSCD-15-PL-1.html")
+
+
+@patch("scraping.congreso_scraper.click_siguiente_pagina", return_value=True)
+@patch("scraping.congreso_scraper.get_rango_resultados", return_value=(25, 100))
+@patch("scraping.congreso_scraper.CongresoScraper._procesar_fila", return_value=True)
+@patch("scraping.congreso_scraper.CongresoScraper._apply_filters")
+@patch("scraping.congreso_scraper.aceptar_cookies")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_descargar_plenos_incremental_para_en_pagina_conocida(mock_iniciar, mock_cookies, mock_filtros, mock_procesar,
+                                                              mock_rango, mock_click, manifiesto):
+    """Verifica que en modo incremental se deja de paginar al llegar a una página ya descargada."""
+    driver = MagicMock()
+    driver.execute_script.side_effect = [
+        _captura(_fila_html("DSCD-15-PL-4"), _fila_html("DSCD-15-PL-3")),  # Página con un pleno nuevo
+        _captura(_fila_html("DSCD-15-PL-2"), _fila_html("DSCD-15-PL-1")),  # Página ya conocida
+    ]
+    mock_iniciar.return_value = (driver, MagicMock())
+    manifiesto.contiene.side_effect = lambda cve: cve != "DSCD-15-PL-4"
+
+    scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", incremental=True)
+    scraper.descargar_plenos()
+
+    assert mock_procesar.call_count == 2
+    mock_click.assert_called_once()
+    manifiesto.close.assert_called_once()
+    driver.quit.assert_called_once()
+
+
+def test_congreso_scraper_almacenamiento(almacen):
+    """Verifica que el scraper crea el almacén del tipo indicado en el directorio de salida."""
+    with patch("scraping.congreso_scraper.crear_almacen") as mock_crear:
+        scraper = CongresoScraper(driver_path="fake/path", output_dir="fake/output", almacenamiento="gzip")
+    mock_crear.assert_called_once_with("fake/output", "gzip")
+    assert scraper.almacen is mock_crear.return_value
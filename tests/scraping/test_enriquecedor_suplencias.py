@@ -1,11 +1,26 @@
 # test/scraping/test_enriquecedor_suplencias.py
 
+import os
 import pytest
 import pandas as pd
 from scraping.enriquecedor_suplencias import EnriquecedorSuplencias
+from scraping.utils.tablas_html import parsear_filas
 from unittest.mock import patch, MagicMock
 
 
+def _fila(html_nombre, fecha_alta, fecha_baja):
+    """Construye una fila de sustituciones con el formato que devuelve extraer_filas_html."""
+    return {
+        "celdas": [
+            {"texto": "", "html": html_nombre, "enlaces": []},
+            {"texto": fecha_alta, "html": fecha_alta, "enlaces": []},
+            {"texto": fecha_baja, "html": fecha_baja, "enlaces": []},
+        ],
+        "cabeceras": [],
+        "enlaces": []
+    }
+
+
 @pytest.fixture
 def scraper():
     """Fixture que devuelve una instancia del enriquecedor para reutilizar en varios tests"""
@@ -14,17 +29,11 @@ def scraper():
 
 # Test: fila completa con nombre, sustituye_a y sustituido_por
 def test_parsear_fila_completa(scraper):
-    fila = MagicMock()
-    columnas = [MagicMock(), MagicMock(), MagicMock()]
-    fila.find_elements.return_value = columnas
-
-    columnas[0].get_attribute.return_value = """
+    fila = _fila("""
         <a href="#">Diputado Ejemplo</a><br>
         Sustituye a: <a href="#">Diputado A</a><br>
         Sustituido por: <a href="#">Diputado B</a>
-    """
-    columnas[1].text = "01/01/2023"
-    columnas[2].text = "01/02/2023"
+    """, "01/01/2023", "01/02/2023")
 
     resultado = scraper._parsear_fila(fila)
     assert resultado == {
@@ -38,16 +47,10 @@ def test_parsear_fila_completa(scraper):
 
 # Test: solo sustituye_a
 def test_parsear_fila_solo_sustituye(scraper):
-    fila = MagicMock()
-    columnas = [MagicMock(), MagicMock(), MagicMock()]
-    fila.find_elements.return_value = columnas
-
-    columnas[0].get_attribute.return_value = """
+    fila = _fila("""
         <a href="#">Diputado Ejemplo</a><br>
         Sustituye a: <a href="#">Diputado A</a>
-    """
-    columnas[1].text = "10/01/2023"
-    columnas[2].text = "10/03/2023"
+    """, "10/01/2023", "10/03/2023")
 
     resultado = scraper._parsear_fila(fila)
     assert resultado["sustituye_a"] == "Diputado A"
@@ -56,16 +59,10 @@ def test_parsear_fila_solo_sustituye(scraper):
 
 # Test: solo sustituido_por
 def test_parsear_fila_solo_sustituido(scraper):
-    fila = MagicMock()
-    columnas = [MagicMock(), MagicMock(), MagicMock()]
-    fila.find_elements.return_value = columnas
-
-    columnas[0].get_attribute.return_value = """
+    fila = _fila("""
         <a href="#">Diputado Ejemplo</a><br>
         Sustituido por: <a href="#">Diputado B</a>
-    """
-    columnas[1].text = "15/01/2023"
-    columnas[2].text = "15/03/2023"
+    """, "15/01/2023", "15/03/2023")
 
     resultado = scraper._parsear_fila(fila)
     assert resultado["sustituye_a"] == ""
@@ -74,8 +71,8 @@ def test_parsear_fila_solo_sustituido(scraper):
 
 # Test: fila incompleta (menos de 3 columnas)
 def test_parsear_fila_incompleta(scraper):
-    fila = MagicMock()
-    fila.find_elements.return_value = [MagicMock(), MagicMock()]  # solo 2 columnas
+    fila = _fila("<a>X</a>", "01/01/2023", "")
+    fila["celdas"] = fila["celdas"][:2]  # solo 2 columnas
     resultado = scraper._parsear_fila(fila)
     assert resultado is None
 
@@ -101,12 +98,24 @@ def test_enriquecer_df_diputados_merge():
     assert resultado.loc[0, "sustituye_a"] == "Diputado A"
 
 
+# Test para comprobar que con las suplencias ya obtenidas no se vuelven a descargar
+def test_enriquecer_df_diputados_con_suplencias_previas(scraper):
+    df_diputados = pd.DataFrame([{"nombre": "Diputado Ejemplo"}])
+    df_suplencias = pd.DataFrame([{"nombre": "Diputado Ejemplo", "fecha_alta": "2023-01-01", "fecha_baja": "",
+                                   "sustituye_a": "", "sustituido_por": "Diputado B"}])
+
+    with patch.object(scraper, "obtener_df_suplencias") as mock_obtener:
+        resultado = scraper.enriquecer_df_diputados(df_diputados, df_suplencias=df_suplencias)
+
+    mock_obtener.assert_not_called()
+    assert resultado.loc[0, "sustituido_por"] == "Diputado B"
+
+
 @patch("scraping.enriquecedor_suplencias.click_siguiente_pagina", return_value=False)
 @patch("scraping.enriquecedor_suplencias.es_ultima_pagina", return_value=True)
 def test_obtener_df_suplencias_simple(mock_ultima, mock_click):
     scraper = EnriquecedorSuplencias(driver_path="fake/path")
 
-    fila_mock = MagicMock()
     fila_dict = {
         "nombre": "Diputado X",
         "fecha_alta": "2023-01-01",
@@ -119,7 +128,10 @@ def test_obtener_df_suplencias_simple(mock_ultima, mock_click):
             patch.object(scraper, "_seleccionar_filtros"), \
             patch.object(scraper, "_parsear_fila", return_value=fila_dict), \
             patch.object(scraper, "driver") as mock_driver:
-        mock_driver.find_elements.return_value = [fila_mock]
+        mock_driver.execute_script.return_value = {
+            "base": "https://www.congreso.es/",
+            "html": "<tr><td><a>Diputado X</a></td><td>2023-01-01</td><td>2023-01-02</td></tr>"
+        }
         df_resultado = scraper.obtener_df_suplencias()
 
     assert isinstance(df_resultado, pd.DataFrame)
@@ -193,9 +205,7 @@ def test_obtener_df_suplencias_caso_no_hay_mas_paginas(mock_ultima, mock_click_s
     mock_wait = MagicMock()
 
     # Simula una única fila sin datos relevantes
-    fila_mock = MagicMock()
-    fila_mock.find_elements.return_value = []
-    mock_driver.find_elements.return_value = [fila_mock]
+    mock_driver.execute_script.return_value = {"base": "https://www.congreso.es/", "html": "<tr></tr>"}
 
     scraper.driver = mock_driver
     scraper.wait = mock_wait
@@ -204,3 +214,32 @@ def test_obtener_df_suplencias_caso_no_hay_mas_paginas(mock_ultima, mock_click_s
     assert isinstance(df, pd.DataFrame)
     assert df.empty
     assert mock_click_siguiente.called
+
+
+# Test para comprobar que en modo 'http' las suplencias se piden al servidor local sin navegador
+def test_obtener_df_suplencias_modo_http(servidor_portlets):
+    scraper = EnriquecedorSuplencias(driver_path="fake/path", modo_descarga="http")
+    scraper.url = f"{servidor_portlets}/es/diputados-sustituidos-y-sustitutos"
+
+    with patch.object(scraper, "_init_driver") as mock_init:
+        df = scraper.obtener_df_suplencias()
+
+    mock_init.assert_not_called()
+    assert df.to_dict("records") == [{
+        "nombre": "Esteban Sanz, Rosa", "fecha_alta": "12/03/2024", "fecha_baja": "",
+        "sustituye_a": "Castro Ruiz, Eva", "sustituido_por": ""
+    }]
+
+
+# Test para comprobar el parseo de las suplencias sobre una tabla guardada, sin navegador
+def test_parsear_fila_tabla_guardada(scraper):
+    ruta = os.path.join(os.path.dirname(__file__), "..", "fixtures", "tablas", "sustituciones.html")
+    with open(ruta, encoding="utf-8") as f:
+        filas = parsear_filas(f.read(), "https://www.congreso.es/")
+
+    assert [scraper._parsear_fila(fila) for fila in filas] == [
+        {"nombre": "Esteban Sanz, Rosa", "fecha_alta": "12/03/2024", "fecha_baja": "",
+         "sustituye_a": "Castro Ruiz, Eva", "sustituido_por": ""},
+        {"nombre": "Castro Ruiz, Eva", "fecha_alta": "17/08/2023", "fecha_baja": "11/03/2024",
+         "sustituye_a": "", "sustituido_por": "Esteban Sanz, Rosa"},
+    ]
@@ -1,19 +1,21 @@
 # tests/scraping/test_scraper_diputados.py
 
+import os
+import threading
 import pytest
 import pandas as pd
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock
 from scraping.scraper_diputados import DiputadosScraper
 
 
 @pytest.fixture
-def scraper():
+def scraper(tmp_path):
     """Crea una instancia del scraper con paths ficticios para pruebas."""
-    return DiputadosScraper(driver_path="fake/path", output_csv="salida.csv", legislatura="15")
+    return DiputadosScraper(driver_path="fake/path", output_csv=str(tmp_path / "salida.csv"), legislatura="15")
 
 
 # Test para verificar que el método _init_driver asigna correctamente el driver y wait
-@patch("scraping.scraper_diputados.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 def test_init_driver(mock_init, scraper):
     driver_mock, wait_mock = MagicMock(), MagicMock()
     mock_init.return_value = (driver_mock, wait_mock)
@@ -24,6 +26,22 @@ def test_init_driver(mock_init, scraper):
     assert scraper.wait == wait_mock
 
 
+# Test para verificar que con un pool el driver se toma del pool y se devuelve en lugar de cerrarse
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_init_y_liberar_driver_con_pool(mock_init):
+    pool = MagicMock()
+    driver_mock, wait_mock = MagicMock(), MagicMock()
+    pool.obtener.return_value = (driver_mock, wait_mock)
+    scraper = DiputadosScraper(driver_path="fake/path", output_csv="salida.csv", pool=pool)
+
+    scraper._init_driver()
+    scraper._liberar_driver()
+
+    mock_init.assert_not_called()
+    pool.devolver.assert_called_once_with(driver_mock, wait_mock)
+    driver_mock.quit.assert_not_called()
+
+
 # Test para verificar que se aplican correctamente los filtros en la búsqueda
 @patch("scraping.scraper_diputados.esperar_tabla_cargada")
 @patch("scraping.scraper_diputados.esperar_spinner")
@@ -50,18 +68,28 @@ def test_buscar_diputados(mock_aceptar, mock_sel, mock_click, mock_spinner, mock
 
 # Test para verificar que se extrae correctamente la información de un diputado
 def test_extraer_info_diputado(scraper):
-    fila = MagicMock()
-    celda1, celda2 = MagicMock(), MagicMock()
-    fila.find_elements.return_value = [celda1, celda2]
-    celda1.text = "Grupo A"
-    celda2.text = "Provincia X"
-    fila.find_element.return_value.text = "Juan Pérez"
+    fila = {
+        "celdas": [{"texto": " Grupo A ", "html": "", "enlaces": []},
+                   {"texto": "Provincia X", "html": "", "enlaces": []}],
+        "cabeceras": [],
+        "enlaces": [{"texto": "Juan Pérez ", "href": "https://www.congreso.es/diputado/1"}]
+    }
 
     resultado = scraper._extraer_info_diputado(fila)
 
     assert resultado["nombre"] == "Juan Pérez"
     assert resultado["grupo_actual"] == "Grupo A"
     assert resultado["provincia"] == "Provincia X"
+    assert resultado["legislatura"] == "15"
+
+
+# Test para verificar que una fila sin enlace ni celdas no rompe la extracción
+def test_extraer_info_diputado_fila_vacia(scraper):
+    resultado = scraper._extraer_info_diputado({"celdas": [], "cabeceras": [], "enlaces": []})
+
+    assert resultado["nombre"] == ""
+    assert resultado["grupo_actual"] == ""
+    assert resultado["provincia"] == ""
 
 
 # Test para verificar que se procesan correctamente los diputados de una página
@@ -70,14 +98,16 @@ def test_procesar_pagina(mock_esperar, scraper):
     scraper.driver = MagicMock()
     scraper.wait = MagicMock()
 
-    fila = MagicMock()
-    scraper.driver.find_elements.return_value = [fila]
+    fila = {"celdas": [], "cabeceras": [], "enlaces": []}
+    scraper.driver.execute_script.return_value = {"base": "https://www.congreso.es/", "html": "<tr></tr>"}
     scraper._extraer_info_diputado = MagicMock(return_value={"nombre": "Dip", "grupo_actual": "G", "provincia": "P"})
 
     resultados = scraper._procesar_pagina()
 
     assert len(resultados) == 1
     assert resultados[0]["nombre"] == "Dip"
+    scraper._extraer_info_diputado.assert_called_once_with(fila)
+    scraper.driver.execute_script.assert_called_once()
 
 
 # Test para verificar que guardar_csv utiliza pandas to_csv correctamente
@@ -85,26 +115,24 @@ def test_procesar_pagina(mock_esperar, scraper):
 def test_guardar_csv(mock_to_csv, scraper):
     df = pd.DataFrame([{"nombre": "X"}])
     scraper.guardar_csv(df)
-    mock_to_csv.assert_called_once_with("salida.csv", index=False, encoding="utf-8")
+    mock_to_csv.assert_called_once_with(scraper.output_csv, index=False, encoding="utf-8")
 
 
 # Test completo del método ejecutar para flujo con una sola página sin paginación
 @patch("scraping.scraper_diputados.EnriquecedorSuplencias")
-@patch("scraping.scraper_diputados.pd.DataFrame")
 @patch("scraping.scraper_diputados.click_siguiente_pagina", return_value=False)
 @patch("scraping.scraper_diputados.es_ultima_pagina", return_value=True)
 @patch("scraping.scraper_diputados.DiputadosScraper._procesar_pagina")
 @patch("scraping.scraper_diputados.DiputadosScraper._buscar_diputados")
 @patch("scraping.scraper_diputados.DiputadosScraper._init_driver")
 def test_ejecutar_flujo_simple(
-    mock_init, mock_buscar, mock_procesar, mock_es_ultima, mock_siguiente, mock_df, mock_enriquecedor, scraper
+    mock_init, mock_buscar, mock_procesar, mock_es_ultima, mock_siguiente, mock_enriquecedor, scraper
 ):
     scraper.driver = MagicMock()
 
     mock_procesar.return_value = [{"nombre": "Dip", "grupo_actual": "Grupo", "provincia": "Provincia"}]
 
     df_mock = MagicMock()
-    mock_df.return_value = df_mock
     enriq_mock = MagicMock()
     enriq_mock.enriquecer_df_diputados.return_value = df_mock
     mock_enriquecedor.return_value = enriq_mock
@@ -117,6 +145,15 @@ def test_ejecutar_flujo_simple(
     mock_buscar.assert_called_once()
     mock_procesar.assert_called_once()
     scraper.guardar_csv.assert_called_once_with(df_mock)
+    # El enriquecedor recibe el listado leído del CSV parcial, que después se elimina
+    df_listado = enriq_mock.enriquecer_df_diputados.call_args.args[0]
+    assert df_listado.to_dict("records") == [{"nombre": "Dip", "grupo_actual": "Grupo", "provincia": "Provincia",
+                                              "legislatura": ""}]
+    assert not os.path.exists(f"{scraper.output_csv}.parcial")
+    # El enriquecedor recibe el mismo pool para reutilizar el navegador
+    mock_enriquecedor.assert_called_once_with(driver_path="fake/path", legislatura="15", pool=None,
+                                              modo_descarga="navegador", tamano_pagina=50, num_workers=4,
+                                              cache=None)
 
 
 # Test de ejecución con múltiples páginas (click_siguiente_pagina devuelve True una vez, luego False)
@@ -134,7 +171,8 @@ def test_ejecutar_multiple_paginas(
     mock_procesar,
     mock_es_ultima,
     mock_click_siguiente,
-    mock_enriquecedor
+    mock_enriquecedor,
+    tmp_path
 ):
     """
     Test para ejecutar el flujo completo simulando múltiples páginas de resultados
@@ -156,7 +194,7 @@ def test_ejecutar_multiple_paginas(
     ])
 
     # Crear instancia y mockear el driver (necesario para que .quit() no falle)
-    scraper = DiputadosScraper(driver_path="fake_path", output_csv="output.csv")
+    scraper = DiputadosScraper(driver_path="fake_path", output_csv=str(tmp_path / "output.csv"))
     scraper.driver = MagicMock()  # Añadir este mock para evitar el error de 'NoneType'
 
     # Ejecutar
@@ -169,3 +207,90 @@ def test_ejecutar_multiple_paginas(
     mock_enriquecer_df.assert_called_once()
     mock_to_csv.assert_called_once()
 
+
+
+# Test para comprobar el modo 'http' contra el servidor local, sin navegador
+@patch("scraping.scraper_diputados.EnriquecedorSuplencias")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_ejecutar_modo_http(mock_init, mock_enriquecedor, servidor_portlets, tmp_path):
+    salida = tmp_path / "diputados.csv"
+    scraper = DiputadosScraper(driver_path="fake/path", output_csv=str(salida), modo_descarga="http",
+                               tamano_pagina=2, num_workers=2)
+    scraper.url = f"{servidor_portlets}/busqueda-de-diputados"
+    mock_enriquecedor.return_value.enriquecer_df_diputados.side_effect = lambda df, df_suplencias: df
+
+    scraper.ejecutar()
+
+    mock_init.assert_not_called()
+    assert mock_enriquecedor.call_args.kwargs["modo_descarga"] == "http"
+    df = pd.read_csv(salida)
+    assert len(df) == 5
+    assert df.iloc[0].to_dict() == {"nombre": "Abad Pérez, Ana", "grupo_actual": "GS", "provincia": "Madrid",
+                                    "legislatura": 15}
+
+
+# Test para comprobar que las suplencias se obtienen mientras se recorre el listado y se unen al final
+@patch("scraping.scraper_diputados.EnriquecedorSuplencias")
+def test_ejecutar_suplencias_en_paralelo(mock_enriquecedor, scraper):
+    listado_en_curso = threading.Event()
+    suplencias_en_curso = threading.Event()
+    df_suplencias = pd.DataFrame([{"nombre": "Dip"}])
+
+    # Cada tarea espera a que la otra haya empezado: solo terminan si se ejecutan a la vez
+    def obtener_suplencias():
+        suplencias_en_curso.set()
+        assert listado_en_curso.wait(timeout=5)
+        return df_suplencias
+
+    def obtener_diputados():
+        listado_en_curso.set()
+        assert suplencias_en_curso.wait(timeout=5)
+        return [{"nombre": "Dip", "grupo_actual": "G", "provincia": "P"}]
+
+    enriquecedor = mock_enriquecedor.return_value
+    enriquecedor.obtener_df_suplencias.side_effect = obtener_suplencias
+    scraper.guardar_csv = MagicMock()
+
+    with patch.object(scraper, "_obtener_diputados_navegador",
+                      side_effect=lambda escritor: escritor.escribir(obtener_diputados())):
+        scraper.ejecutar()
+
+    args, kwargs = enriquecedor.enriquecer_df_diputados.call_args
+    assert list(args[0]["nombre"]) == ["Dip"]
+    assert kwargs["df_suplencias"] is df_suplencias
+    scraper.guardar_csv.assert_called_once_with(enriquecedor.enriquecer_df_diputados.return_value)
+
+
+# Test para comprobar que tras un fallo se reanuda por la primera página sin guardar, sin volver a extraer las demás
+@patch("scraping.scraper_diputados.EnriquecedorSuplencias")
+@patch("scraping.scraper_diputados.click_siguiente_pagina", return_value=True)
+@patch("scraping.scraper_diputados.es_ultima_pagina")
+@patch("scraping.scraper_diputados.DiputadosScraper._buscar_diputados")
+@patch("scraping.scraper_diputados.DiputadosScraper._init_driver")
+def test_ejecutar_reanuda_tras_fallo(mock_init, mock_buscar, mock_es_ultima, mock_siguiente, mock_enriquecedor,
+                                     scraper):
+    scraper.driver = MagicMock()
+    mock_enriquecedor.return_value.enriquecer_df_diputados.side_effect = lambda df, df_suplencias: df
+    # Tres páginas: es_ultima_pagina se consulta con dos ids por página
+    mock_es_ultima.side_effect = lambda driver, id_: paginas[-1] == 3
+    paginas = []
+
+    def procesar(fallar_en=None):
+        pagina = len(paginas) + 1
+        if pagina == fallar_en:
+            raise RuntimeError("tabla no cargada")
+        paginas.append(pagina)
+        return [{"nombre": f"Dip {pagina}", "grupo_actual": "G", "provincia": "P", "legislatura": "15"}]
+
+    with patch.object(scraper, "_procesar_pagina", side_effect=lambda: procesar(fallar_en=3)):
+        with pytest.raises(RuntimeError):
+            scraper.ejecutar()
+    assert not os.path.exists(scraper.output_csv)
+
+    # En la segunda ejecución las páginas 1 y 2 solo se atraviesan
+    with patch.object(scraper, "_procesar_pagina", side_effect=procesar) as mock_procesar:
+        scraper.ejecutar()
+
+    assert mock_procesar.call_count == 1
+    assert list(pd.read_csv(scraper.output_csv)["nombre"]) == ["Dip 1", "Dip 2", "Dip 3"]
+    assert not os.path.exists(f"{scraper.output_csv}.checkpoint.json")
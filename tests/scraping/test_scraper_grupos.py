@@ -1,11 +1,17 @@
 # tests/scraping/test_scraper_grupos.py
 
+import time
 import pytest
 import pandas as pd
 from unittest.mock import MagicMock, patch
 from scraping.scraper_grupos import GruposScraper
 
 
+def _captura(*filas_html):
+    """Simula la captura del HTML de las filas que devuelve el navegador a extraer_filas_html."""
+    return {"base": "https://www.congreso.es/es/grupos", "html": "".join(filas_html)}
+
+
 @pytest.fixture
 def scraper():
     """Fixture que inicializa el GruposScraper con mocks para el driver y la espera."""
@@ -40,24 +46,13 @@ def test_extraer_info_legislatura(mock_cookies, mock_spinner, mock_select, scrap
 def test_extraer_altas_bajas(mock_spinner, mock_click, mock_espera_tabla, mock_ultima, scraper):
     """Verifica que se extraen correctamente las filas de diputados con nombre en <th> y fechas en <td>."""
 
-    # Fila simulada con un <th> y dos <td>
-    fila = MagicMock()
-
-    # Simula el <th> con el nombre del diputado
-    th = MagicMock()
-    th.text = "Nombre Diputado"
-    fila.find_element.return_value = th  # .find_element(By.TAG_NAME, "th")
-
-    # Simula los <td> con fecha de alta y baja
-    td1 = MagicMock()
-    td1.text = "01/01/2023"
-    td2 = MagicMock()
-    td2.text = "31/12/2023"
-    fila.find_elements.return_value = [td1, td2]  # .find_elements(By.TAG_NAME, "td")
+    # Fila con un <th> (nombre) y dos <td> (fechas de alta y baja)
+    fila = "<tr><th> Nombre Diputado </th><td>01/01/2023</td><td>31/12/2023</td></tr>"
+    # Segunda fila sin <th>: se descarta
+    fila_sin_nombre = "<tr></tr>"
 
-    # Asignar la fila simulada al driver mock
-    scraper.driver.find_elements.return_value = [fila]
-    scraper.driver.find_element.return_value = MagicMock()  # requerido por hacer_click_esperando
+    # Asignar la captura de las filas al driver mock (una sola llamada a execute_script por página)
+    scraper.driver.execute_script.return_value = _captura(fila, fila_sin_nombre)
 
     # Ejecutar
     datos = scraper._extraer_altas_bajas("PSOE", "https://www.fake-url.com")
@@ -82,11 +77,10 @@ def test_extraer_altas_bajas_click_falla(mock_spinner, mock_click, scraper):
 
 
 # Test completo del método ejecutar simulando dos grupos con una fila cada uno.
-@patch("scraping.scraper_grupos.pd.DataFrame.to_csv")
 @patch("scraping.scraper_grupos.GruposScraper._extraer_altas_bajas")
 @patch("scraping.scraper_grupos.GruposScraper._extraer_info_legislatura")
-@patch("scraping.scraper_grupos.iniciar_driver", return_value=(MagicMock(), MagicMock()))
-def test_ejecutar_guarda_csv(mock_driver, mock_info, mock_altas, mock_csv):
+@patch("scraping.utils.selenium_utils.iniciar_driver", return_value=(MagicMock(), MagicMock()))
+def test_ejecutar_guarda_csv(mock_driver, mock_info, mock_altas, tmp_path):
     """Test de integración del método ejecutar para verificar guardado correcto de CSV."""
     # Simular dos grupos parlamentarios con un diputado cada uno
     mock_info.return_value = [("PSOE", "url1"), ("PP", "url2")]
@@ -95,19 +89,17 @@ def test_ejecutar_guarda_csv(mock_driver, mock_info, mock_altas, mock_csv):
         [{"nombre": "Nombre2", "grupo_parlamentario": "PP", "fecha_alta": "02/01/2023", "fecha_baja": ""}]
     ]
 
+    salida = tmp_path / "grupos.csv"
     scraper = GruposScraper(driver_path="fake/path", legislatura="15")
-    scraper.ejecutar(output_csv="test_grupos.csv")
+    scraper.ejecutar(output_csv=str(salida))
 
-    # Verifica que se llamó a to_csv
-    mock_csv.assert_called_once()
+    # El CSV tiene las 2 filas y no quedan ni el parcial ni el checkpoint
+    df = pd.read_csv(salida, keep_default_na=False)
+    assert list(df["nombre"]) == ["Nombre1", "Nombre2"]
+    assert list(df.columns) == GruposScraper.COLUMNAS
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["grupos.csv"]
 
-    # Verifica que el DataFrame tenía 2 filas
-    args, kwargs = mock_csv.call_args
-    df_resultante: pd.DataFrame = args[0] if isinstance(args[0], pd.DataFrame) else None
-    assert df_resultante is None or len(df_resultante) == 2
 
-
-@patch("scraping.scraper_grupos.pd.DataFrame.to_csv")
 @patch("scraping.scraper_grupos.click_siguiente_pagina", side_effect=[True, False])
 @patch("scraping.scraper_grupos.es_ultima_pagina", side_effect=[False, True])
 @patch("scraping.scraper_grupos.esperar_tabla_cargada")
@@ -115,7 +107,7 @@ def test_ejecutar_guarda_csv(mock_driver, mock_info, mock_altas, mock_csv):
 @patch("scraping.scraper_grupos.hacer_click_esperando")
 @patch("scraping.scraper_grupos.aceptar_cookies")
 @patch("scraping.scraper_grupos.seleccionar_opcion_por_valor")
-@patch("scraping.scraper_grupos.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 @patch.object(GruposScraper, "_extraer_info_legislatura", return_value=[("Grupo Ficticio", "https://grupo.test")])
 def test_ejecutar_casos_edge_grupos(
         mock_info_legislatura,
@@ -127,13 +119,13 @@ def test_ejecutar_casos_edge_grupos(
         mock_esperar_tabla,
         mock_ultima,
         mock_siguiente,
-        mock_to_csv
+        tmp_path
 ):
     """
     Cubre casos límite en el scraping de grupos parlamentarios:
-    - Filas con solo <th> en lugar de <td>
-    - Filas con menos de 3 columnas
-    - Filas que lanzan excepción al parsear
+    - Filas con <th> y sin <td>
+    - Filas con menos columnas de las esperadas
+    - Filas mal formadas que lanzan excepción al parsear
     - Detección de paginación con múltiples páginas
     """
     scraper = GruposScraper(driver_path="fake/path")
@@ -144,35 +136,31 @@ def test_ejecutar_casos_edge_grupos(
     mock_init_driver.return_value = (mock_driver, mock_wait)
     scraper.driver, scraper.wait = mock_driver, mock_wait
 
-    # Fila con solo <th> (mock con .find_elements)
-    fila_th = MagicMock()
-    fila_th.find_elements.side_effect = [
-        [],  # No <td>
-        [MagicMock(text="Nombre TH"), MagicMock(text="2024-01-01"), MagicMock(text="2024-12-01")]  # como <th>
-    ]
+    # Fila con <th> y sin <td>
+    fila_th = "<tr><th>Nombre TH</th></tr>"
 
-    # Fila con menos de 3 columnas
-    fila_corta = MagicMock()
-    fila_corta.find_elements.return_value = [MagicMock(text="Solo nombre")]
+    # Fila con una sola columna de fecha
+    fila_corta = "<tr><th>Solo alta</th><td>01/01/2024</td></tr>"
 
-    # Fila con excepción
-    fila_error = MagicMock()
-    fila_error.find_elements.side_effect = Exception("Fallo procesando fila")
+    # Fila vacía, sin nombre
+    fila_vacia = "<tr></tr>"
 
-    # Simula find_elements en dos páginas distintas
-    mock_driver.find_elements.side_effect = [
-        [fila_th, fila_corta, fila_error],  # Página 1
-        [fila_th]  # Página 2
+    # Simula la captura de filas en dos páginas distintas
+    mock_driver.execute_script.side_effect = [
+        _captura(fila_th, fila_corta, fila_vacia),  # Página 1
+        _captura(fila_th)  # Página 2
     ]
 
     # Ejecutar
-    scraper.ejecutar(output_csv="dummy.csv")
+    salida = tmp_path / "grupos.csv"
+    scraper.ejecutar(output_csv=str(salida))
 
-    # Verificar que se guardó el CSV
-    mock_to_csv.assert_called_once()
+    # Verificar que se guardó el CSV con las filas con nombre de ambas páginas
+    df = pd.read_csv(salida, keep_default_na=False)
+    assert list(df["nombre"]) == ["Nombre TH", "Solo alta", "Nombre TH"]
+    assert mock_driver.execute_script.call_count == 2
 
 
-@patch("scraping.scraper_grupos.pd.DataFrame.to_csv")
 @patch("scraping.scraper_grupos.click_siguiente_pagina", return_value=False)  # ← se activa el `break`
 @patch("scraping.scraper_grupos.es_ultima_pagina", return_value=False)  # ← no se detiene por final
 @patch("scraping.scraper_grupos.esperar_tabla_cargada")
@@ -180,7 +168,7 @@ def test_ejecutar_casos_edge_grupos(
 @patch("scraping.scraper_grupos.hacer_click_esperando")
 @patch("scraping.scraper_grupos.aceptar_cookies")
 @patch("scraping.scraper_grupos.seleccionar_opcion_por_valor")
-@patch("scraping.scraper_grupos.iniciar_driver")
+@patch("scraping.utils.selenium_utils.iniciar_driver")
 @patch.object(GruposScraper, "_extraer_info_legislatura", return_value=[("Grupo de prueba", "https://grupo.test")])
 def test_click_siguiente_falla_activa_break(
         mock_info_legislatura,
@@ -192,7 +180,7 @@ def test_click_siguiente_falla_activa_break(
         mock_esperar_tabla,
         mock_ultima,
         mock_siguiente,
-        mock_to_csv
+        tmp_path
 ):
     """
     Cubre el caso en el que click_siguiente_pagina devuelve False en la primera iteración,
@@ -207,15 +195,110 @@ def test_click_siguiente_falla_activa_break(
     scraper.driver, scraper.wait = mock_driver, mock_wait
 
     # Fila mínima válida
-    fila = MagicMock()
-    fila.find_elements.return_value = [
-        MagicMock(text="Diputada X"),
-        MagicMock(text="2024-01-01"),
-        MagicMock(text="2024-12-01")
-    ]
+    fila = "<tr><th>Diputada X</th><td>2024-01-01</td><td>2024-12-01</td></tr>"
+
+    mock_driver.execute_script.return_value = _captura(fila)
+
+    salida = tmp_path / "grupos.csv"
+    scraper.ejecutar(output_csv=str(salida))
+
+    assert len(pd.read_csv(salida)) == 1
+
+
+# Test para comprobar el modo 'http' contra el servidor local, con un grupo de dos páginas
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_ejecutar_modo_http(mock_init, servidor_portlets, tmp_path):
+    salida = tmp_path / "grupos.csv"
+    scraper = GruposScraper(driver_path="fake/path", modo_descarga="http", tamano_pagina=2, num_workers=2)
+    scraper.url_base = f"{servidor_portlets}/es/grupos/composicion-en-la-legislatura"
+
+    scraper.ejecutar(output_csv=str(salida))
+
+    mock_init.assert_not_called()
+    df = pd.read_csv(salida, keep_default_na=False)
+    assert df["grupo_parlamentario"].value_counts().to_dict() == {
+        "Grupo Parlamentario Socialista": 3, "Grupo Parlamentario Popular": 2
+    }
+    fila = df[df["nombre"] == "Castro Ruiz, Eva"].iloc[0]
+    assert (fila["fecha_alta"], fila["fecha_baja"]) == ("17/08/2023", "11/03/2024")
 
-    mock_driver.find_elements.return_value = [fila]
 
-    scraper.ejecutar(output_csv="dummy.csv")
+# Test para comprobar que en paralelo cada grupo usa su propio navegador y el resultado sigue el orden de los grupos
+@patch.object(GruposScraper, "_extraer_info_legislatura",
+              return_value=[("Grupo A", "url-a"), ("Grupo B", "url-b"), ("Grupo C", "url-c")])
+def test_ejecutar_grupos_en_paralelo(mock_info, tmp_path):
+    pool = MagicMock()
+    pool.obtener.return_value = (MagicMock(), MagicMock())
+    pool.driver.return_value.__enter__.side_effect = lambda: (MagicMock(), MagicMock())
+    scraper = GruposScraper(driver_path="fake/path", pool=pool, grupos_en_paralelo=3)
 
-    mock_to_csv.assert_called_once()
+    # El primer grupo es el que más tarda: termina el último pero debe salir el primero
+    def extraer(nombre, url, driver, wait):
+        time.sleep(0.1 if nombre == "Grupo A" else 0)
+        return [{"nombre": f"Diputado de {nombre}", "grupo_parlamentario": nombre}]
+
+    with patch.object(scraper, "_extraer_altas_bajas", side_effect=extraer) as mock_altas:
+        scraper.ejecutar(output_csv=str(tmp_path / "grupos.csv"))
+
+    df = pd.read_csv(tmp_path / "grupos.csv")
+    assert mock_altas.call_count == 3
+    assert pool.driver.call_count == 3
+    # El navegador que listó los grupos vuelve al pool para que lo reutilicen los hilos
+    pool.devolver.assert_called_once()
+    pool.cerrar.assert_not_called()
+    assert list(df["grupo_parlamentario"]) == ["Grupo A", "Grupo B", "Grupo C"]
+
+
+# Test para comprobar que en modo 'http' con varios grupos en paralelo se mantiene el orden de los grupos
+def test_ejecutar_modo_http_grupos_en_paralelo(servidor_portlets, tmp_path):
+    salida = tmp_path / "grupos.csv"
+    scraper = GruposScraper(driver_path="fake/path", modo_descarga="http", tamano_pagina=2, grupos_en_paralelo=2)
+    scraper.url_base = f"{servidor_portlets}/es/grupos/composicion-en-la-legislatura"
+
+    scraper.ejecutar(output_csv=str(salida))
+
+    df = pd.read_csv(salida, keep_default_na=False)
+    assert list(df["nombre"]) == ["Abad Pérez, Ana", "Castro Ruiz, Eva", "Esteban Sanz, Rosa",
+                                  "Bravo Gil, Luis", "Díaz Mora, Pablo"]
+
+
+# Test para comprobar que un formato de respuesta desconocido detiene el modo 'http' sin escribir un CSV vacío
+def test_ejecutar_modo_http_formato_desconocido(servidor_portlets, tmp_path):
+    salida = tmp_path / "grupos.csv"
+    scraper = GruposScraper(driver_path="fake/path", modo_descarga="http")
+    scraper.url_base = f"{servidor_portlets}/es/grupos/composicion-en-la-legislatura"
+    scraper.RECURSO_GRUPOS_HTTP = "formatoDesconocido"
+
+    with pytest.raises(ValueError, match="faltan las claves"):
+        scraper.ejecutar(output_csv=str(salida))
+    assert not salida.exists()
+
+
+# Test para comprobar que tras un fallo se conservan los grupos ya guardados y se reanuda por el siguiente
+@patch.object(GruposScraper, "_extraer_info_legislatura",
+              return_value=[("Grupo A", "url-a"), ("Grupo B", "url-b"), ("Grupo C", "url-c")])
+@patch("scraping.utils.selenium_utils.iniciar_driver", return_value=(MagicMock(), MagicMock()))
+def test_ejecutar_reanuda_tras_fallo(mock_driver, mock_info, tmp_path):
+    salida = tmp_path / "grupos.csv"
+    procesados = []
+
+    def extraer(nombre, url, fallar_en=None):
+        procesados.append(nombre)
+        if nombre == fallar_en:
+            raise RuntimeError("navegador caído")
+        return [{"nombre": f"Diputado de {nombre}", "grupo_parlamentario": nombre}]
+
+    scraper = GruposScraper(driver_path="fake/path")
+    with patch.object(scraper, "_extraer_altas_bajas", side_effect=lambda n, u: extraer(n, u, "Grupo B")):
+        with pytest.raises(RuntimeError):
+            scraper.ejecutar(output_csv=str(salida))
+    # El CSV final aún no existe: el progreso está en el parcial y en el checkpoint
+    assert not salida.exists()
+
+    procesados.clear()
+    with patch.object(scraper, "_extraer_altas_bajas", side_effect=lambda n, u: extraer(n, u)):
+        scraper.ejecutar(output_csv=str(salida))
+
+    assert procesados == ["Grupo B", "Grupo C"]
+    assert list(pd.read_csv(salida)["grupo_parlamentario"]) == ["Grupo A", "Grupo B", "Grupo C"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["grupos.csv"]
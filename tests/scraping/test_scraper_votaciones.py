@@ -0,0 +1,97 @@
+# tests/scraping/test_scraper_votaciones.py
+
+import json
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+
+from scraping.scraper_votaciones import VotacionesScraper
+
+
+@pytest.fixture
+def scraper(tmp_path, servidor_fixtures):
+    return VotacionesScraper(
+        output_dir=str(tmp_path / "votaciones" / "15"),
+        url_indice=f"{servidor_fixtures}/votaciones/indice.html",
+        num_workers=2,
+        peticiones_por_segundo=0
+    )
+
+
+# Test para comprobar que se descargan los JSON enlazados desde el servidor local
+def test_ejecutar_descarga_votaciones(scraper, caplog):
+    descargadas = scraper.ejecutar()
+
+    # La votación 4 está enlazada pero no existe en el servidor: se registra el error y se continúa
+    assert descargadas == 3
+    assert sorted(os.listdir(scraper.output_dir)) == [
+        "Sesion005Votacion001.json", "Sesion005Votacion002.json", "Sesion005Votacion003.json"
+    ]
+    with open(os.path.join(scraper.output_dir, "Sesion005Votacion002.json"), encoding="utf-8") as f:
+        assert json.load(f)["informacion"]["numeroVotacion"] == 2
+    assert "Error descargando la votación Sesion005Votacion004.json" in caplog.text
+
+
+# Test para comprobar que solo se descargan las votaciones nuevas
+def test_ejecutar_incremental(scraper):
+    assert scraper.ejecutar() == 3
+    assert scraper.ejecutar() == 0
+
+
+# Test para comprobar que se listan solo enlaces JSON, sin duplicados y con URL absoluta
+def test_listar_votaciones(scraper, servidor_fixtures):
+    scraper.session = MagicMock()
+    scraper.session.get.return_value.content = open(
+        os.path.join(os.path.dirname(__file__), "..", "fixtures", "votaciones", "indice.html"), "rb"
+    ).read()
+
+    enlaces = scraper._listar_votaciones()
+
+    assert [nombre for nombre, _ in enlaces] == [
+        "Sesion005Votacion001.json", "Sesion005Votacion002.json",
+        "Sesion005Votacion003.json", "Sesion005Votacion004.json"
+    ]
+    assert dict(enlaces)["Sesion005Votacion003.json"] == f"{servidor_fixtures}/votaciones/Sesion005Votacion003.json"
+
+
+# Test para comprobar que una respuesta que no es JSON no se guarda
+def test_descargar_votacion_invalida(scraper, caplog):
+    scraper.session = MagicMock()
+    scraper.session.get.return_value.content = b"<html>Error</html>"
+
+    assert scraper._descargar_votacion("roto.json", "http://fake/roto.json") is False
+    assert not os.path.exists(os.path.join(scraper.output_dir, "roto.json"))
+    assert "Error descargando la votación roto.json" in caplog.text
+
+
+# Test para comprobar que la sesión se cierra aunque falle el índice
+@patch("scraping.scraper_votaciones.crear_sesion_http")
+def test_ejecutar_cierra_sesion_si_falla_indice(mock_crear_sesion, scraper):
+    mock_crear_sesion.return_value.get.side_effect = Exception("índice caído")
+
+    with pytest.raises(Exception, match="índice caído"):
+        scraper.ejecutar()
+    mock_crear_sesion.return_value.close.assert_called_once()
+
+
+# Test para comprobar que la URL del índice se filtra por la legislatura pedida
+def test_url_indice_con_legislatura(tmp_path):
+    scraper = VotacionesScraper(output_dir=str(tmp_path), legislatura="14")
+    assert scraper.url_indice == "https://www.congreso.es/es/opendata/votaciones?targetLegislatura=XIV"
+
+    scraper = VotacionesScraper(output_dir=str(tmp_path), url_indice="http://fake/indice?x=1&targetLegislatura=XV",
+                                legislatura="14")
+    assert scraper.url_indice == "http://fake/indice?x=1&targetLegislatura=XIV"
+
+
+# Test para comprobar que no se guarda una votación que declara otra legislatura
+def test_descargar_votacion_otra_legislatura(scraper, caplog):
+    scraper.session = MagicMock()
+    scraper.session.get.return_value.content = json.dumps({"informacion": {"legislatura": "XIV"}}).encode()
+
+    assert scraper._descargar_votacion("otra.json", "http://fake/otra.json") is False
+    assert not os.path.exists(os.path.join(scraper.output_dir, "otra.json"))
+    assert "no es de la legislatura 15" in caplog.text
+
+    scraper.session.get.return_value.content = json.dumps({"informacion": {"legislatura": 15}}).encode()
+    assert scraper._descargar_votacion("misma.json", "http://fake/misma.json") is True
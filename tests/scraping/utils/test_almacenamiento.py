@@ -0,0 +1,99 @@
+# test/scraping/utils/test_almacenamiento.py
+
+import gzip
+import os
+import pytest
+from scraping.utils.almacenamiento import (
+    AlmacenDiarios,
+    AlmacenGzip,
+    AlmacenContenido,
+    crear_almacen,
+    abrir_almacen
+)
+
+HTML = "<section id='portlet_publicaciones'>Sesión plenaria núm. 1</section>"
+
+
+# Test para comprobar el almacén sin comprimir: un .html por CVE
+def test_almacen_html(tmp_path):
+    almacen = AlmacenDiarios(str(tmp_path))
+    ruta = almacen.guardar("DSCD-15-PL-1", HTML)
+
+    assert ruta == str(tmp_path / "DSCD-15-PL-1.html")
+    assert (tmp_path / "DSCD-15-PL-1.html").read_text(encoding="utf-8") == HTML
+    assert almacen.existe("DSCD-15-PL-1")
+    assert not almacen.existe("DSCD-15-PL-2")
+    assert almacen.leer("DSCD-15-PL-1") == HTML
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+
+# Test para comprobar que el almacén gzip comprime y se lee de forma transparente
+def test_almacen_gzip(tmp_path):
+    almacen = AlmacenGzip(str(tmp_path))
+    ruta = almacen.guardar("DSCD-15-PL-1", HTML * 100)
+
+    assert ruta.endswith("DSCD-15-PL-1.html.gz")
+    assert gzip.decompress(open(ruta, "rb").read()).decode("utf-8") == HTML * 100
+    assert os.path.getsize(ruta) < len((HTML * 100).encode("utf-8"))
+    assert almacen.leer("DSCD-15-PL-1") == HTML * 100
+    with almacen.abrir("DSCD-15-PL-1") as f:
+        assert f.read(8) == HTML.encode("utf-8")[:8]
+
+
+# Test para comprobar que el almacén gzip lee los .html de descargas anteriores
+def test_almacen_gzip_lee_html_previos(tmp_path):
+    (tmp_path / "DSCD-15-PL-1.html").write_text(HTML, encoding="utf-8")
+    almacen = AlmacenGzip(str(tmp_path))
+    almacen.guardar("DSCD-15-PL-2", HTML)
+
+    assert almacen.existe("DSCD-15-PL-1")
+    assert almacen.localizar("DSCD-15-PL-1") == str(tmp_path / "DSCD-15-PL-1.html")
+    assert almacen.cves() == ["DSCD-15-PL-1", "DSCD-15-PL-2"]
+    assert dict(almacen.iterar()) == {"DSCD-15-PL-1": HTML, "DSCD-15-PL-2": HTML}
+
+
+# Test para comprobar que el almacén por contenido deduplica diarios idénticos
+def test_almacen_contenido_deduplica(tmp_path):
+    almacen = AlmacenContenido(str(tmp_path))
+    ruta_1 = almacen.guardar("DSCD-15-PL-1", HTML)
+    ruta_2 = almacen.guardar("DSCD-15-PL-1-bis", HTML)
+    ruta_3 = almacen.guardar("DSCD-15-PL-2", HTML + "<p>otro</p>")
+
+    objetos = [f for _, _, archivos in os.walk(tmp_path / "objetos") for f in archivos]
+    assert ruta_1 == ruta_2 != ruta_3
+    assert len(objetos) == 2
+    assert almacen.ruta("DSCD-15-PL-1") == ruta_1
+    assert almacen.ruta("DSCD-15-PL-9") is None
+    assert almacen.leer("DSCD-15-PL-1-bis") == HTML
+    assert almacen.cves() == ["DSCD-15-PL-1", "DSCD-15-PL-1-bis", "DSCD-15-PL-2"]
+    almacen.close()
+
+
+# Test para comprobar que leer un diario inexistente lanza FileNotFoundError
+def test_almacen_leer_inexistente(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        AlmacenGzip(str(tmp_path)).leer("DSCD-15-PL-1")
+
+
+# Test para comprobar la factoría de almacenes y su validación
+def test_crear_almacen(tmp_path):
+    assert type(crear_almacen(str(tmp_path))) is AlmacenDiarios
+    assert type(crear_almacen(str(tmp_path), "gzip")) is AlmacenGzip
+    with pytest.raises(ValueError, match="Tipo de almacenamiento no válido"):
+        crear_almacen(str(tmp_path), "zip")
+
+
+# Test para comprobar que abrir_almacen detecta el tipo de almacén por su contenido
+def test_abrir_almacen_detecta_tipo(tmp_path):
+    assert type(abrir_almacen(str(tmp_path / "vacio"))) is AlmacenDiarios
+
+    AlmacenGzip(str(tmp_path / "gz")).guardar("DSCD-15-PL-1", HTML)
+    assert type(abrir_almacen(str(tmp_path / "gz"))) is AlmacenGzip
+
+    contenido = AlmacenContenido(str(tmp_path / "cas"))
+    contenido.guardar("DSCD-15-PL-1", HTML)
+    contenido.close()
+    almacen = abrir_almacen(str(tmp_path / "cas"))
+    assert type(almacen) is AlmacenContenido
+    assert almacen.leer("DSCD-15-PL-1") == HTML
+    almacen.close()
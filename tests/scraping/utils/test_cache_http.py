@@ -0,0 +1,103 @@
+# tests/scraping/utils/test_cache_http.py
+
+import time
+import pytest
+import requests
+from unittest.mock import patch
+from requests.adapters import HTTPAdapter
+from scraping.utils.cache_http import CacheHTTP, AdaptadorCache
+from scraping.utils.http_utils import crear_sesion_http
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with CacheHTTP(str(tmp_path / "cache")) as cache:
+        yield cache
+
+
+def _respuesta(cuerpo: bytes, **cabeceras) -> requests.Response:
+    respuesta = requests.Response()
+    respuesta.status_code = 200
+    respuesta._content = cuerpo
+    respuesta.headers.update(cabeceras)
+    return respuesta
+
+
+# Test para comprobar que la segunda petición se sirve desde disco sin llegar al servidor
+def test_sesion_sirve_desde_cache(cache, servidor_fixtures):
+    url = f"{servidor_fixtures}/tablas/diputados.html"
+    session = crear_sesion_http(cache=cache)
+
+    with patch.object(HTTPAdapter, "send", autospec=True, side_effect=HTTPAdapter.send) as mock_send:
+        primera = session.get(url, timeout=5)
+        segunda = session.get(url, timeout=5)
+
+    assert isinstance(session.get_adapter(url), AdaptadorCache)
+    assert mock_send.call_count == 1
+    assert getattr(segunda, "from_cache", False) is True
+    assert segunda.status_code == 200
+    assert segunda.content == primera.content
+    assert segunda.text == primera.text
+
+
+# Test para comprobar que una respuesta caducada se revalida con If-Modified-Since y un 304 la renueva
+def test_revalidacion_condicional(tmp_path, servidor_fixtures):
+    url = f"{servidor_fixtures}/tablas/diputados.html"
+    with CacheHTTP(str(tmp_path / "cache"), ttl=0) as cache:
+        session = crear_sesion_http(cache=cache)
+        primera = session.get(url, timeout=5)
+
+        with patch.object(HTTPAdapter, "send", autospec=True, side_effect=HTTPAdapter.send) as mock_send:
+            segunda = session.get(url, timeout=5)
+
+    peticion = mock_send.call_args.args[1]
+    assert peticion.headers["If-Modified-Since"] == primera.headers["Last-Modified"]
+    # El servidor responde 304 y el cuerpo sale de la caché
+    assert segunda.status_code == 200
+    assert segunda.from_cache is True
+    assert segunda.content == primera.content
+
+
+# Test para comprobar que no se guardan errores ni respuestas marcadas como no-store
+def test_no_guarda_errores_ni_no_store(cache, servidor_fixtures):
+    session = crear_sesion_http(cache=cache, reintentos=0)
+
+    assert session.get(f"{servidor_fixtures}/no-existe.html", timeout=5).status_code == 404
+    assert cache.obtener(f"{servidor_fixtures}/no-existe.html") is None
+
+    adaptador = session.get_adapter(servidor_fixtures)
+    with patch.object(HTTPAdapter, "send", return_value=_respuesta(b"x", **{"Cache-Control": "no-store"})):
+        adaptador.send(requests.Request("GET", f"{servidor_fixtures}/privado").prepare())
+    assert cache.obtener(f"{servidor_fixtures}/privado") is None
+
+
+# Test para comprobar que al superar el tamaño máximo se eliminan las respuestas usadas hace más tiempo
+def test_expulsion_lru(tmp_path):
+    with CacheHTTP(str(tmp_path / "cache"), max_bytes=25) as cache:
+        cache.guardar("http://x/a", _respuesta(b"a" * 10))
+        time.sleep(0.01)
+        cache.guardar("http://x/b", _respuesta(b"b" * 10))
+        time.sleep(0.01)
+        # Usar 'a' la convierte en la más reciente: al guardar 'c' se expulsa 'b'
+        assert cache.obtener("http://x/a") is not None
+        time.sleep(0.01)
+        cache.guardar("http://x/c", _respuesta(b"c" * 10))
+
+        assert cache.obtener("http://x/b") is None
+        assert cache.obtener("http://x/a")["cuerpo"] == b"a" * 10
+        assert cache.tamano_total() == 20
+
+
+# Test para comprobar que la caché persiste en disco y descarta las cabeceras de compresión
+def test_cache_persistente(tmp_path):
+    directorio = str(tmp_path / "cache")
+    with CacheHTTP(directorio) as cache:
+        cache.guardar("http://x/a", _respuesta(b"hola", **{"ETag": '"v1"', "Content-Encoding": "gzip"}))
+
+    with CacheHTTP(directorio) as cache:
+        guardada = cache.obtener("http://x/a")
+
+    assert guardada["cuerpo"] == b"hola"
+    assert guardada["etag"] == '"v1"'
+    assert guardada["fresca"] is True
+    assert "Content-Encoding" not in guardada["cabeceras"]
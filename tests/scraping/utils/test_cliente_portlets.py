@@ -0,0 +1,91 @@
+# tests/scraping/utils/test_cliente_portlets.py
+
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from scraping.utils.cliente_portlets import ClientePortlet
+
+
+@pytest.fixture
+def cliente(servidor_portlets):
+    with ClientePortlet(f"{servidor_portlets}/busqueda-de-diputados", "diputadomodule", "searchDiputados",
+                        tamano_pagina=2, num_workers=2, peticiones_por_segundo=0) as cliente:
+        yield cliente
+
+
+# Test para comprobar que los parámetros del formulario llevan el prefijo del portlet
+def test_parametros_recurso():
+    cliente = ClientePortlet("https://www.congreso.es/busqueda-de-diputados", "diputadomodule", "searchDiputados",
+                             session=MagicMock(), tamano_pagina=25)
+
+    parametros = cliente.parametros({"idLegislatura": "15"}, 3)
+
+    assert parametros["p_p_id"] == "diputadomodule"
+    assert parametros["p_p_lifecycle"] == "2"
+    assert parametros["p_p_resource_id"] == "searchDiputados"
+    assert parametros["_diputadomodule_idLegislatura"] == "15"
+    assert parametros["_diputadomodule_paginaActual"] == "3"
+    assert parametros["_diputadomodule_registrosPorPagina"] == "25"
+
+
+# Test para comprobar que se descargan todas las páginas del servidor local en orden
+def test_obtener_todo_paginas(cliente):
+    registros = cliente.obtener_todo({"idLegislatura": "15"})
+
+    assert [r["apellidosNombre"] for r in registros] == [
+        "Abad Pérez, Ana", "Bravo Gil, Luis", "Castro Ruiz, Eva", "Díaz Mora, Pablo", "Esteban Sanz, Rosa"
+    ]
+
+
+# Test para comprobar que una respuesta completa no genera más peticiones
+def test_obtener_todo_una_sola_respuesta():
+    session = MagicMock()
+    session.get.return_value.json.return_value = {"data": [{"id": 1}, {"id": 2}], "total": 2}
+    cliente = ClientePortlet("https://www.congreso.es/x", "p", "r", session=session, peticiones_por_segundo=0)
+
+    assert cliente.obtener_todo({}) == [{"id": 1}, {"id": 2}]
+    session.get.assert_called_once()
+    cliente.close()
+    session.close.assert_not_called()
+
+
+# Test para comprobar que un error HTTP se propaga
+def test_obtener_pagina_error(servidor_portlets):
+    with ClientePortlet(servidor_portlets, "diputadomodule", "inexistente", peticiones_por_segundo=0) as cliente:
+        with pytest.raises(requests.HTTPError):
+            cliente.obtener_pagina({})
+
+
+# Test para comprobar que una respuesta sin las claves de datos y total es un error, no un listado vacío
+def test_obtener_pagina_formato_inesperado():
+    session = MagicMock()
+    session.get.return_value.json.return_value = {"items": [], "count": 0}
+    cliente = ClientePortlet("https://www.congreso.es/x", "p", "recurso", session=session, peticiones_por_segundo=0)
+
+    with pytest.raises(ValueError, match="faltan las claves"):
+        cliente.obtener_todo({})
+
+    session.get.return_value.json.return_value = {"data": None, "total": 0}
+    with pytest.raises(ValueError, match="no es una lista"):
+        cliente.obtener_todo({})
+
+
+# Test para comprobar que una primera página vacía con total positivo es un error
+def test_obtener_todo_pagina_vacia_con_total():
+    session = MagicMock()
+    session.get.return_value.json.return_value = {"data": [], "total": 10}
+    cliente = ClientePortlet("https://www.congreso.es/x", "p", "recurso", session=session, peticiones_por_segundo=0)
+
+    with pytest.raises(ValueError, match="el total es 10"):
+        cliente.obtener_todo({})
+
+
+# Test para comprobar la validación de los campos que leen los scrapers
+def test_comprobar_campos():
+    cliente = ClientePortlet("https://www.congreso.es/x", "p", "recurso", session=MagicMock())
+
+    cliente.comprobar_campos([], ["nombre"])
+    cliente.comprobar_campos([{"nombre": "A", "otro": 1}], ["nombre"])
+    with pytest.raises(ValueError, match="nombre"):
+        cliente.comprobar_campos([{"apellidos": "A"}], ["nombre"])
@@ -0,0 +1,81 @@
+# test/scraping/utils/test_descarga_concurrente.py
+
+import threading
+from unittest.mock import patch
+from scraping.utils.descarga_concurrente import DescargadorConcurrente, LimitadorPeticiones
+
+
+# Test para comprobar que todas las tareas encoladas se descargan y se cuentan
+def test_descargador_procesa_todas_las_tareas():
+    procesadas = []
+    lock = threading.Lock()
+
+    def descargar(clave, url):
+        with lock:
+            procesadas.append((clave, url))
+        return clave != "fallo"
+
+    with DescargadorConcurrente(descargar, num_workers=3) as descargador:
+        for i in range(10):
+            descargador.encolar(f"c{i}", f"http://host/{i}")
+        descargador.encolar("fallo", "http://host/x")
+
+    assert len(procesadas) == 11
+    assert descargador.descargados == 10
+    assert descargador.fallidos == 1
+
+
+# Test para comprobar que una excepción en la descarga se cuenta como fallo sin detener los hilos
+def test_descargador_excepcion_en_descarga(caplog):
+    def descargar(clave, url):
+        if clave == "malo":
+            raise RuntimeError("timeout")
+        return True
+
+    descargador = DescargadorConcurrente(descargar, num_workers=2)
+    descargador.iniciar()
+    descargador.encolar("malo", "http://host/1")
+    descargador.encolar("bueno", "http://host/2")
+
+    assert descargador.finalizar() == 1
+    assert descargador.fallidos == 1
+    assert "Error descargando malo" in caplog.text
+
+
+# Test para comprobar que el descargador consulta al limitador antes de cada descarga
+def test_descargador_usa_limitador():
+    urls = []
+
+    class LimitadorFalso:
+        def esperar(self, url):
+            urls.append(url)
+
+    with DescargadorConcurrente(lambda c, u: True, num_workers=1, limitador=LimitadorFalso()) as descargador:
+        descargador.encolar("a", "http://host/a")
+        descargador.encolar("b", "http://host/b")
+
+    assert urls == ["http://host/a", "http://host/b"]
+
+
+# Test para comprobar que el limitador espacia las peticiones al mismo host y no entre hosts distintos
+@patch("scraping.utils.descarga_concurrente.time.sleep")
+@patch("scraping.utils.descarga_concurrente.time.monotonic", return_value=100.0)
+def test_limitador_reserva_turnos_por_host(mock_monotonic, mock_sleep):
+    limitador = LimitadorPeticiones(peticiones_por_segundo=2.0, retardo_cortesia=0.5)
+
+    limitador.esperar("https://www.congreso.es/a")
+    limitador.esperar("https://www.congreso.es/b")
+    limitador.esperar("https://otro.es/a")
+    limitador.esperar("https://www.congreso.es/c")
+
+    # Primer acceso a cada host sin espera; después 1 s (0,5 de tasa + 0,5 de cortesía) por petición
+    assert [c[0][0] for c in mock_sleep.call_args_list] == [1.0, 2.0]
+
+
+# Test para comprobar que sin límite de tasa no se espera nunca
+@patch("scraping.utils.descarga_concurrente.time.sleep")
+def test_limitador_sin_limite(mock_sleep):
+    limitador = LimitadorPeticiones(peticiones_por_segundo=0)
+    for _ in range(5):
+        limitador.esperar("https://www.congreso.es/a")
+    mock_sleep.assert_not_called()
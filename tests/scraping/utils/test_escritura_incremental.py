@@ -0,0 +1,72 @@
+# tests/scraping/utils/test_escritura_incremental.py
+
+import pandas as pd
+from scraping.utils.escritura_incremental import EscritorCSVIncremental
+
+COLUMNAS = ["nombre", "grupo"]
+
+
+# Test para comprobar que los bloques se escriben en el parcial y al finalizar sustituyen al CSV
+def test_escribir_y_finalizar(tmp_path):
+    ruta = tmp_path / "salida.csv"
+    ruta.write_text("nombre,grupo\nAntiguo,X\n", encoding="utf-8")
+
+    escritor = EscritorCSVIncremental(str(ruta), COLUMNAS)
+    escritor.escribir([{"nombre": "Ana", "grupo": "A"}], pagina=1)
+    escritor.escribir([{"nombre": "Luis", "grupo": "B", "extra": "se ignora"}], pagina=2)
+    # Mientras no se finaliza, el CSV anterior sigue intacto
+    assert list(pd.read_csv(ruta)["nombre"]) == ["Antiguo"]
+    escritor.finalizar()
+
+    assert list(pd.read_csv(ruta)["nombre"]) == ["Ana", "Luis"]
+    assert escritor.filas == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["salida.csv"]
+
+
+# Test para comprobar que al reanudar se recorta el bloque que quedó a medias y se recupera el progreso
+def test_reanudar_recorta_bloque_incompleto(tmp_path):
+    ruta = str(tmp_path / "salida.csv")
+    escritor = EscritorCSVIncremental(ruta, COLUMNAS)
+    # Nombres con caracteres de varios bytes: el recorte se hace por bytes, no por caracteres
+    escritor.escribir([{"nombre": "Ángela Muñoz", "grupo": "Ç"}], pagina=1)
+    escritor.close()
+    # Simula una caída a mitad del siguiente bloque, antes de actualizar el checkpoint
+    with open(f"{ruta}.parcial", "a", encoding="utf-8") as f:
+        f.write("Luis,B\nMaría")
+
+    escritor = EscritorCSVIncremental(ruta, COLUMNAS)
+    assert escritor.estado == {"pagina": 1}
+    assert escritor.filas == 1
+    escritor.escribir([{"nombre": "Luis", "grupo": "B"}], pagina=2)
+    escritor.finalizar()
+
+    assert list(pd.read_csv(ruta)["nombre"]) == ["Ángela Muñoz", "Luis"]
+
+
+# Test para comprobar que no se reanuda un checkpoint de otro tipo de ejecución ni si se pide empezar de cero
+def test_no_reanuda_otra_clave_ni_sin_reanudar(tmp_path):
+    ruta = str(tmp_path / "salida.csv")
+    escritor = EscritorCSVIncremental(ruta, COLUMNAS, clave="navegador")
+    escritor.escribir([{"nombre": "Ana", "grupo": "A"}], pagina=1)
+    escritor.close()
+
+    assert EscritorCSVIncremental(ruta, COLUMNAS, clave="http").estado == {}
+
+    escritor = EscritorCSVIncremental(ruta, COLUMNAS, clave="navegador")
+    escritor.escribir([{"nombre": "Ana", "grupo": "A"}], pagina=1)
+    escritor.close()
+    escritor = EscritorCSVIncremental(ruta, COLUMNAS, clave="navegador", reanudar=False)
+    assert escritor.estado == {}
+    escritor.finalizar()
+    assert pd.read_csv(ruta).empty
+
+
+# Test para comprobar que descartar elimina el parcial y el checkpoint sin tocar la ruta de salida
+def test_descartar(tmp_path):
+    ruta = str(tmp_path / "salida.csv")
+    escritor = EscritorCSVIncremental(ruta, COLUMNAS)
+    escritor.escribir([{"nombre": "Ana", "grupo": "A"}], completo=True)
+
+    escritor.descartar()
+
+    assert list(tmp_path.iterdir()) == []
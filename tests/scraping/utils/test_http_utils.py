@@ -0,0 +1,116 @@
+# test/scraping/utils/test_http_utils.py
+
+import pytest
+from unittest.mock import MagicMock
+from scraping.utils import http_utils as utils
+
+
+@pytest.fixture
+def mock_session():
+    return MagicMock()
+
+
+# Test para comprobar que la sesión monta un adaptador con pool y reintentos
+def test_crear_sesion_http_sin_driver():
+    session = utils.crear_sesion_http(tamano_pool=5, reintentos=2)
+    adapter = session.get_adapter("https://www.congreso.es")
+
+    assert adapter._pool_maxsize == 5
+    assert adapter.max_retries.total == 2
+    assert session.get_adapter("http://www.congreso.es") is adapter
+
+
+# Test para comprobar que se copian cookies y User-Agent del navegador
+def test_crear_sesion_http_copia_cookies():
+    driver = MagicMock()
+    driver.execute_script.return_value = "Mozilla/5.0 Test"
+    driver.get_cookies.return_value = [
+        {"name": "JSESSIONID", "value": "abc", "domain": "www.congreso.es", "path": "/"},
+        {"name": "cookie_consent", "value": "1", "domain": "www.congreso.es"}
+    ]
+
+    session = utils.crear_sesion_http(driver)
+
+    assert session.headers["User-Agent"] == "Mozilla/5.0 Test"
+    assert session.cookies.get("JSESSIONID") == "abc"
+    assert session.cookies.get("cookie_consent") == "1"
+
+
+# Test para comprobar que un fallo al leer las cookies no rompe la sesión
+def test_copiar_cookies_driver_error(caplog):
+    driver = MagicMock()
+    driver.execute_script.side_effect = Exception("driver cerrado")
+    session = MagicMock()
+
+    utils.copiar_cookies_driver(driver, session)
+
+    assert "No se pudieron copiar las cookies" in caplog.text
+
+
+# Test para comprobar que se pide la página con timeout y se valida el código HTTP
+def test_obtener_html_http_peticion(mock_session):
+    respuesta = MagicMock()
+    respuesta.content = "<html><body><section id='portlet_publicaciones'>Texto</section></body></html>".encode()
+    mock_session.get.return_value = respuesta
+
+    contenido = utils.obtener_html_http(mock_session, "http://fake", "section#portlet_publicaciones")
+
+    assert contenido == '<section id="portlet_publicaciones">Texto</section>'
+    mock_session.get.assert_called_once_with("http://fake", timeout=30)
+    respuesta.raise_for_status.assert_called_once()
+
+
+# Test para comprobar que se devuelve None si el selector no existe
+def test_obtener_html_http_sin_seccion(mock_session):
+    mock_session.get.return_value.content = b"<html><body><p>Nada</p></body></html>"
+
+    assert utils.obtener_html_http(mock_session, "http://fake", "section#portlet_publicaciones") is None
+
+
+# Test para comprobar que un error HTTP se registra y devuelve None
+def test_obtener_html_http_error_http(mock_session, caplog):
+    mock_session.get.return_value.raise_for_status.side_effect = Exception("404")
+
+    assert utils.obtener_html_http(mock_session, "http://fake", "section") is None
+    assert "Error al descargar el contenido HTML de http://fake" in caplog.text
+
+
+# Test para comprobar que obtener_html_http devuelve el HTML de la sección sin escribir archivos
+def test_obtener_html_http_ok(mock_session):
+    mock_session.get.return_value.content = "<section id='portlet_publicaciones'>Sesión</section>".encode()
+
+    contenido = utils.obtener_html_http(mock_session, "http://fake", "section#portlet_publicaciones")
+
+    assert contenido == '<section id="portlet_publicaciones">Sesión</section>'
+
+
+# Test para comprobar que los selectores simples se traducen a un filtro del parser
+def test_crear_filtro_selector():
+    filtro = utils.crear_filtro_selector("section#portlet_publicaciones")
+
+    assert filtro is not None
+    assert utils.crear_filtro_selector("div.contenido") is not None
+    assert utils.crear_filtro_selector("#portlet") is not None
+    # Los selectores compuestos no se filtran: se parsea la página completa
+    assert utils.crear_filtro_selector("div > section") is None
+
+
+# Test para comprobar que con el filtro solo se devuelve la sección, aunque haya otras parecidas
+def test_obtener_html_http_filtra_otras_secciones(mock_session):
+    mock_session.get.return_value.content = (
+        "<html><head><script>var x = 1;</script></head><body>"
+        "<section id='cabecera'>Menú</section>"
+        "<section id='portlet_publicaciones'><p>Diario</p></section>"
+        "</body></html>"
+    ).encode()
+
+    contenido = utils.obtener_html_http(mock_session, "http://fake", "section#portlet_publicaciones")
+
+    assert contenido == '<section id="portlet_publicaciones"><p>Diario</p></section>'
+
+
+# Test para comprobar que un selector compuesto sigue funcionando sin filtro
+def test_obtener_html_http_selector_compuesto(mock_session):
+    mock_session.get.return_value.content = b"<div><section class='a'>Uno</section></div>"
+
+    assert utils.obtener_html_http(mock_session, "http://fake", "div > section.a") == '<section class="a">Uno</section>'
@@ -0,0 +1,59 @@
+# test/scraping/utils/test_manifiesto.py
+
+import hashlib
+import pytest
+from scraping.utils.manifiesto import ManifiestoDescargas
+
+
+@pytest.fixture
+def manifiesto(tmp_path):
+    m = ManifiestoDescargas(str(tmp_path / "15"))
+    yield m
+    m.close()
+
+
+# Test para comprobar que el manifiesto se crea vacío en el directorio de la legislatura
+def test_manifiesto_vacio(manifiesto, tmp_path):
+    assert manifiesto.ruta == str(tmp_path / "15" / "manifiesto.sqlite")
+    assert manifiesto.cves() == set()
+    assert not manifiesto.contiene("DSCD-15-PL-1")
+    assert manifiesto.obtener("DSCD-15-PL-1") is None
+
+
+# Test para comprobar que registrar guarda URL, ruta, tamaño, hash y fecha
+def test_registrar_guarda_metadatos(manifiesto, tmp_path):
+    ruta = tmp_path / "DSCD-15-PL-1.html"
+    ruta.write_bytes(b"<section>pleno</section>")
+
+    manifiesto.registrar("DSCD-15-PL-1", "http://fake/1", str(ruta))
+
+    entrada = manifiesto.obtener("DSCD-15-PL-1")
+    assert manifiesto.contiene("DSCD-15-PL-1")
+    assert entrada["url"] == "http://fake/1"
+    assert entrada["ruta"] == str(ruta)
+    assert entrada["tamano"] == len(b"<section>pleno</section>")
+    assert entrada["sha256"] == hashlib.sha256(b"<section>pleno</section>").hexdigest()
+    assert entrada["descargado_en"]
+
+
+# Test para comprobar que volver a registrar un CVE actualiza la entrada existente
+def test_registrar_actualiza(manifiesto, tmp_path):
+    ruta = tmp_path / "a.html"
+    ruta.write_text("v1", encoding="utf-8")
+    manifiesto.registrar("DSCD-15-PL-1", "http://fake/1", str(ruta))
+    ruta.write_text("version 2", encoding="utf-8")
+    manifiesto.registrar("DSCD-15-PL-1", "http://fake/1", str(ruta))
+
+    assert manifiesto.cves() == {"DSCD-15-PL-1"}
+    assert manifiesto.obtener("DSCD-15-PL-1")["tamano"] == len("version 2")
+
+
+# Test para comprobar que el manifiesto persiste entre ejecuciones
+def test_manifiesto_persiste(tmp_path):
+    ruta = tmp_path / "a.html"
+    ruta.write_text("x", encoding="utf-8")
+    with ManifiestoDescargas(str(tmp_path)) as m:
+        m.registrar("DSCD-15-PL-9", "http://fake/9", str(ruta))
+
+    with ManifiestoDescargas(str(tmp_path)) as m:
+        assert m.contiene("DSCD-15-PL-9")
@@ -1,7 +1,7 @@
 # test/scraping/utils/test_selenium_utils.py
 
 import pytest
-from unittest.mock import mock_open, patch, MagicMock
+from unittest.mock import patch, MagicMock
 from selenium.webdriver.common.by import By
 from scraping.utils import selenium_utils as utils
 
@@ -48,6 +48,47 @@ def test_iniciar_driver(mock_wait, mock_options, mock_service, mock_chrome):
     assert wait == mock_wait_instance
 
 
+# Test para comprobar el perfil rápido: carga eager, sin GPU ni extensiones y bloqueo de recursos por CDP
+@patch("scraping.utils.selenium_utils.webdriver.Chrome")
+@patch("scraping.utils.selenium_utils.Service")
+@patch("scraping.utils.selenium_utils.Options")
+@patch("scraping.utils.selenium_utils.WebDriverWait")
+def test_iniciar_driver_rapido(mock_wait, mock_options, mock_service, mock_chrome):
+    opciones = mock_options.return_value
+    driver = mock_chrome.return_value
+
+    utils.iniciar_driver("fake/path/to/chromedriver", headless=True, rapido=True)
+
+    assert opciones.page_load_strategy == "eager"
+    opciones.add_argument.assert_any_call("--disable-gpu")
+    opciones.add_argument.assert_any_call("--disable-extensions")
+    prefs = opciones.add_experimental_option.call_args.args[1]
+    assert prefs["profile.managed_default_content_settings.images"] == 2
+    driver.execute_cdp_cmd.assert_any_call("Network.enable", {})
+    driver.execute_cdp_cmd.assert_any_call("Network.setBlockedURLs", {"urls": utils.URLS_BLOQUEADAS})
+    # Las hojas de estilo no se bloquean porque las esperas del spinner dependen de ellas
+    assert not any(p.endswith(".css") for p in utils.URLS_BLOQUEADAS)
+
+
+# Test para comprobar que sin perfil rápido no se modifica la carga ni se usa CDP
+@patch("scraping.utils.selenium_utils.webdriver.Chrome")
+@patch("scraping.utils.selenium_utils.Service")
+@patch("scraping.utils.selenium_utils.Options")
+@patch("scraping.utils.selenium_utils.WebDriverWait")
+def test_iniciar_driver_sin_perfil_rapido(mock_wait, mock_options, mock_service, mock_chrome):
+    utils.iniciar_driver("fake/path/to/chromedriver")
+
+    mock_chrome.return_value.execute_cdp_cmd.assert_not_called()
+    mock_options.return_value.add_experimental_option.assert_not_called()
+
+
+# Test para comprobar que un fallo de CDP no impide usar el navegador
+def test_bloquear_recursos_error(mock_driver, caplog):
+    mock_driver.execute_cdp_cmd.side_effect = Exception("CDP no disponible")
+    utils.bloquear_recursos(mock_driver, ["*.png"])
+    assert "No se pudo activar el bloqueo de recursos" in caplog.text
+
+
 # Test para verificar que se selecciona correctamente una opción por valor en un <select>.
 def test_seleccionar_opcion_por_valor_ok():
     mock_select = MagicMock()
@@ -117,28 +158,12 @@ def test_es_ultima_pagina_error(mock_driver):
     assert utils.es_ultima_pagina(mock_driver, "element_id") is False
 
 
-# Test para simular correctamente el avance de página cuando cambia el rango de resultados.
-@patch("time.sleep", return_value=None)
-def test_click_siguiente_pagina_success(mock_sleep, mock_driver, mock_wait):
-    # Simula el rango antes del clic
-    paginador_antes = MagicMock()
-    paginador_antes.text = "Resultados 1 a 10 de 100"
-
-    # Simula el botón de siguiente
+# Test para simular correctamente el avance de página cuando la tabla cambia.
+def test_click_siguiente_pagina_success(mock_driver, mock_wait):
     boton = MagicMock()
-
-    # Simula el rango después del clic
-    paginador_despues = MagicMock()
-    paginador_despues.text = "Resultados 11 a 20 de 100"
-
-    # Define el comportamiento encadenado de find_element
-    mock_driver.find_element.side_effect = [
-        paginador_antes,  # lectura inicial del rango
-        boton,  # clic en botón siguiente
-        paginador_despues  # nueva lectura tras clic
-    ]
-
-    mock_wait.until.return_value = True
+    mock_driver.find_element.return_value = boton
+    mock_driver.execute_script.side_effect = ["10|fila 1|fila 10|Resultados 1 a 10 de 100", True]
+    mock_driver.execute_async_script.return_value = True
 
     result = utils.click_siguiente_pagina(
         driver=mock_driver,
@@ -150,31 +175,94 @@ def test_click_siguiente_pagina_success(mock_sleep, mock_driver, mock_wait):
     )
 
     assert result is True
+    mock_driver.execute_script.assert_any_call(utils.SCRIPT_CLICK_SI_HABILITADO, boton)
+    # La espera recibe la firma previa y se resuelve en el navegador, sin sondeos ni esperas de Selenium
+    args = mock_driver.execute_async_script.call_args.args
+    assert args[:5] == (utils.SCRIPT_ESPERAR_CAMBIO, "tabla", False, "id_del_paginador",
+                        "10|fila 1|fila 10|Resultados 1 a 10 de 100")
+    mock_wait.until.assert_not_called()
 
 
 # Test para simular error al hacer clic en el botón de paginación.
-@patch("time.sleep", return_value=None)
-def test_click_siguiente_pagina_fail_click(mock_sleep, mock_driver, mock_wait):
+def test_click_siguiente_pagina_fail_click(mock_driver, mock_wait):
     mock_driver.find_element.side_effect = Exception("click fail")
     assert not utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.CSS_SELECTOR, "tabla")
 
 
-# Test para manejar correctamente el caso en que no se puede leer el rango anterior pero sigue funcionando.
-@patch("time.sleep", return_value=None)
-def test_click_siguiente_pagina_fallback(mock_sleep, mock_driver, mock_wait):
-    # Simula que no se puede leer el rango anterior, pero que luego sí encuentra el botón de "siguiente"
-    boton = MagicMock()
-    paginador = MagicMock(text="Resultados 11 a 20 de 100")
+# Test para comprobar que un botón deshabilitado no se pulsa ni se espera
+def test_click_siguiente_pagina_boton_deshabilitado(mock_driver, mock_wait):
+    mock_driver.execute_script.side_effect = ["firma", False]
 
-    mock_driver.find_element.side_effect = [
-        Exception("range fail"),  # intento leer el rango anterior
-        boton,  # clic botón siguiente
-        paginador,  # nuevo rango de resultados
-    ]
-    mock_wait.until.return_value = True
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.XPATH, "//tr") is False
+    mock_driver.execute_async_script.assert_not_called()
 
-    result = utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.CSS_SELECTOR, "tabla", "element_id")
-    assert result is True
+
+# Test para comprobar que se detecta enseguida que la tabla no cambió
+def test_click_siguiente_pagina_sin_cambios(mock_driver, mock_wait):
+    mock_driver.execute_script.side_effect = ["firma", True]
+    mock_driver.execute_async_script.return_value = False
+
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.XPATH, "//tr") is False
+    mock_wait.until.assert_not_called()
+
+
+# Test para comprobar el respaldo con esperas de Selenium si la espera en el navegador falla
+def test_click_siguiente_pagina_respaldo(mock_driver, mock_wait, caplog):
+    mock_driver.execute_script.side_effect = ["firma", True, "firma nueva"]
+    mock_driver.execute_async_script.side_effect = Exception("script timeout")
+
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.CSS_SELECTOR, "tabla") is True
+    assert mock_wait.until.call_count == 2  # spinner y tabla
+    assert "No se pudo esperar el cambio de la tabla en el navegador" in caplog.text
+
+
+# Test para comprobar que el respaldo no da por avanzada la página si el contenido sigue siendo el mismo
+def test_click_siguiente_pagina_respaldo_sin_cambios(mock_driver, mock_wait, caplog):
+    mock_driver.execute_script.side_effect = ["firma", True, "firma"]
+    mock_driver.execute_async_script.side_effect = Exception("script timeout")
+    mock_driver.find_element.return_value.text = "Resultados 1 a 25 de 60"
+
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.CSS_SELECTOR, "tabla",
+                                        "paginador") is False
+    assert "La paginación se detuvo en el resultado 25 de 60" in caplog.text
+
+
+# Test para comprobar que el periodo de inactividad es configurable y que se avisa si se corta el listado
+def test_click_siguiente_pagina_inactividad_configurable(mock_driver, mock_wait, caplog):
+    mock_driver.execute_script.side_effect = ["firma", True]
+    mock_driver.execute_async_script.return_value = False
+    mock_driver.find_element.return_value.text = "Resultados 1 a 25 de 60"
+
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.XPATH, "//tr", "paginador",
+                                        timeout=60, inactividad=10) is False
+    assert mock_driver.execute_async_script.call_args.args[-2:] == (60000, 10000)
+    assert any(r.levelname == "WARNING" and "25 de 60" in r.message for r in caplog.records)
+
+
+# Test para comprobar que no se avisa cuando la paginación termina en el último resultado
+def test_click_siguiente_pagina_sin_cambios_ultima_pagina(mock_driver, mock_wait, caplog):
+    mock_driver.execute_script.side_effect = ["firma", True]
+    mock_driver.execute_async_script.return_value = False
+    mock_driver.find_element.return_value.text = "Resultados 51 a 60 de 60"
+
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.XPATH, "//tr", "paginador") is False
+    assert "La paginación se detuvo" not in caplog.text
+
+
+# Test para comprobar que un fallo en la espera de respaldo devuelve False
+def test_click_siguiente_pagina_lanza_excepcion_final(mock_driver, mock_wait):
+    mock_driver.execute_script.side_effect = ["firma", True]
+    mock_driver.execute_async_script.return_value = None
+    mock_wait.until.side_effect = Exception("fallo inesperado")
+
+    assert utils.click_siguiente_pagina(mock_driver, mock_wait, "//xpath", By.CSS_SELECTOR, "tabla") is False
+
+
+# Test para comprobar que un fallo al calcular la firma no impide paginar
+def test_firma_contenido_error(mock_driver, caplog):
+    mock_driver.execute_script.side_effect = Exception("página recargándose")
+    assert utils.firma_contenido(mock_driver, By.CSS_SELECTOR, "tabla") is None
+    assert "No se pudo calcular la firma de la tabla" in caplog.text
 
 
 # Test para extraer correctamente el rango de resultados desde el paginador.
@@ -189,138 +277,167 @@ def test_get_rango_resultados_fail(mock_driver):
     assert utils.get_rango_resultados(mock_driver, "element_id") == (None, None)
 
 
-# Test para guardar correctamente el contenido HTML de un selector en un archivo.
-@patch("scraping.utils.selenium_utils.BeautifulSoup")
-@patch("builtins.open", new_callable=mock_open)
-def test_guardar_html_contenido_ok(mock_open_fn, mock_bs, mock_driver, mock_wait):
-    """
-    Test para comprobar que guardar_html_contenido guarda correctamente
-    el contenido HTML en un archivo si el selector existe.
-    """
-    # Simula que el contenido existe
-    contenido_html = "<section>Contenido</section>"
-    mock_driver.page_source = "<html></html>"
-    mock_wait.until.return_value = True
-    mock_soup = MagicMock()
-    mock_soup.select_one.return_value = contenido_html
-    mock_bs.return_value = mock_soup
-
-    # Ejecutar función
-    result = utils.guardar_html_contenido(mock_driver, mock_wait, "selector", "archivo.html")
+# Test para comprobar que extraer_filas_html hace un único execute_script y parsea la captura con lxml
+def test_extraer_filas_html_css(mock_driver):
+    mock_driver.execute_script.return_value = {
+        "base": "https://www.congreso.es/busqueda-de-diputados",
+        "html": '<tr><td><a href="/diputado/1">Pérez, Ana</a></td><td>G</td></tr>'
+    }
 
-    # Comprobaciones
-    assert result is True
-    mock_open_fn.assert_called_once_with("archivo.html", "w", encoding="utf-8")
-    mock_open_fn().write.assert_called_once_with(contenido_html)
+    resultado = utils.extraer_filas_html(mock_driver, By.CSS_SELECTOR, "table tbody tr")
 
+    assert resultado == [{
+        "celdas": [
+            {"texto": "Pérez, Ana", "html": '<a href="/diputado/1">Pérez, Ana</a>',
+             "enlaces": [{"texto": "Pérez, Ana", "href": "https://www.congreso.es/diputado/1"}]},
+            {"texto": "G", "html": "G", "enlaces": []}
+        ],
+        "cabeceras": [],
+        "enlaces": [{"texto": "Pérez, Ana", "href": "https://www.congreso.es/diputado/1"}]
+    }]
+    mock_driver.execute_script.assert_called_once_with(utils.SCRIPT_CAPTURAR_FILAS, "table tbody tr", False)
 
-# Test para comprobar que si no se encuentra el contenido, no se guarda archivo.
-@patch("scraping.utils.selenium_utils.BeautifulSoup")
-def test_guardar_html_contenido_fail(mock_bs, mock_driver, mock_wait):
-    mock_bs.return_value.select_one.return_value = None
-    mock_driver.page_source = "<html></html>"
-    mock_wait.until.return_value = True
-    assert not utils.guardar_html_contenido(mock_driver, mock_wait, "selector", "archivo.html")
 
+# Test para comprobar que con XPath se indica al script que evalúe una expresión XPath
+def test_extraer_filas_html_xpath(mock_driver):
+    mock_driver.execute_script.return_value = {"base": "", "html": ""}
+    assert utils.extraer_filas_html(mock_driver, By.XPATH, "//tr") == []
+    assert mock_driver.execute_script.call_args[0][1:] == ("//tr", True)
 
-@patch("time.sleep", return_value=None)
-def test_click_siguiente_pagina_detecta_cambio_rango(mock_sleep, mock_driver, mock_wait):
-    paginador_antes = MagicMock()
-    paginador_antes.text = "Resultados 1 a 10 de 100"
 
-    boton = MagicMock()
+# Test para comprobar que un error en el script devuelve una lista vacía
+def test_extraer_filas_html_error(mock_driver, caplog):
+    mock_driver.execute_script.side_effect = Exception("javascript error")
+    assert utils.extraer_filas_html(mock_driver, By.CSS_SELECTOR, "tr") == []
+    assert "Error al extraer filas" in caplog.text
 
-    paginador_despues = MagicMock()
-    paginador_despues.text = "Resultados 11 a 20 de 100"
 
-    mock_driver.find_element.side_effect = [
-        paginador_antes,  # rango anterior
-        boton,  # clic
-        paginador_despues  # nuevo rango
-    ]
-    mock_wait.until.return_value = True
+# Test para comprobar que una respuesta inesperada del navegador se trata como lista vacía
+def test_extraer_filas_html_respuesta_inesperada(mock_driver):
+    mock_driver.execute_script.return_value = None
+    assert utils.extraer_filas_html(mock_driver, By.CSS_SELECTOR, "tr") == []
 
-    result = utils.click_siguiente_pagina(
-        mock_driver, mock_wait,
-        xpath_siguiente="//xpath",
-        by_tabla=By.CSS_SELECTOR,
-        selector_tabla="tabla",
-        id_paginador="id_del_paginador"
-    )
-    assert result is True
 
+# Test para comprobar que obtener_html_contenido pide el outerHTML del elemento sin leer page_source
+def test_obtener_html_contenido_ok(mock_driver, mock_wait):
+    elemento = MagicMock()
+    elemento.get_attribute.return_value = "<section>Contenido</section>"
+    mock_wait.until.return_value = elemento
 
-@patch("time.sleep", return_value=None)
-def test_click_siguiente_pagina_lanza_excepcion_final(mock_sleep, mock_driver, mock_wait):
-    paginador = MagicMock()
-    paginador.text = "Resultados 1 a 10 de 100"
-    boton = MagicMock()
+    assert utils.obtener_html_contenido(mock_driver, mock_wait, "section") == "<section>Contenido</section>"
+    elemento.get_attribute.assert_called_once_with("outerHTML")
 
-    mock_driver.find_element.side_effect = [
-        paginador,  # rango antes
-        boton  # botón siguiente
-    ]
-    mock_driver.execute_script.return_value = None
-    mock_wait.until.side_effect = Exception("fallo inesperado")
 
-    result = utils.click_siguiente_pagina(
-        mock_driver, mock_wait,
-        xpath_siguiente="//xpath",
-        by_tabla=By.CSS_SELECTOR,
-        selector_tabla="tabla",
-        id_paginador="id_del_paginador"
-    )
-    assert result is False
+# Test para comprobar que obtener_html_contenido devuelve None si la espera falla
+def test_obtener_html_contenido_timeout(mock_driver, mock_wait):
+    mock_wait.until.side_effect = Exception("timeout")
+    assert utils.obtener_html_contenido(mock_driver, mock_wait, "section") is None
 
 
-@patch("scraping.utils.selenium_utils.BeautifulSoup")
-@patch("builtins.open", new_callable=mock_open)
-def test_guardar_html_contenido_excepcion_en_open(mock_open_fn, mock_bs, mock_driver, mock_wait):
-    mock_driver.page_source = "<html></html>"
-    mock_wait.until.return_value = True
+# Test para comprobar que no se espera al banner si el navegador ya aceptó las cookies
+def test_aceptar_cookies_navegador_reutilizado(mock_driver, mock_wait):
+    mock_driver.cookies_aceptadas = True
+    utils.aceptar_cookies(mock_driver, mock_wait)
+    mock_wait.until.assert_not_called()
 
-    contenido = "<div>contenido</div>"
-    mock_bs.return_value.select_one.return_value = contenido
 
-    mock_open_fn.side_effect = Exception("no se pudo abrir archivo")
+# Test para comprobar que al aceptar las cookies se marca el navegador
+def test_aceptar_cookies_marca_navegador(mock_driver, mock_wait):
+    utils.aceptar_cookies(mock_driver, mock_wait)
+    assert mock_driver.cookies_aceptadas is True
 
-    result = utils.guardar_html_contenido(mock_driver, mock_wait, "selector", "archivo.html")
-    assert result is False
 
+# Test para comprobar que el pool reutiliza un navegador devuelto en lugar de iniciar otro
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_pool_drivers_reutiliza(mock_iniciar):
+    driver, wait = MagicMock(), MagicMock()
+    driver.window_handles = ["principal", "pestana"]
+    mock_iniciar.return_value = (driver, wait)
 
-@patch("time.sleep", return_value=None)
-def test_click_siguiente_pagina_ejecuta_break(mock_sleep, mock_driver, mock_wait):
-    """
-    Fuerza la ejecución del 'break' en click_siguiente_pagina simulando un cambio real de rango.
-    """
+    with utils.PoolDrivers("fake/chromedriver") as pool:
+        assert pool.obtener() == (driver, wait)
+        pool.devolver(driver, wait)
+        assert pool.obtener() == (driver, wait)
+        pool.devolver(driver, wait)
 
-    # Antes: grupo(1) == "1"
-    paginador_antes = MagicMock()
-    paginador_antes.text = "Resultados 1 a 10 de 100"
+    mock_iniciar.assert_called_once_with("fake/chromedriver", headless=True, rapido=True)
+    # Al devolverlo se cierran las pestañas adicionales y se vuelve a la principal
+    driver.switch_to.window.assert_called_with("principal")
+    assert driver.close.called
+    # Al salir del contexto se cierran los navegadores libres
+    driver.quit.assert_called_once()
 
-    # Botón de siguiente
-    boton = MagicMock()
 
-    # Después: grupo(1) == "2" → debe disparar el break
-    paginador_despues = MagicMock()
-    paginador_despues.text = "Resultados 2 a 20 de 100"
+# Test para comprobar que un navegador caído no se reutiliza
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_pool_drivers_descarta_navegador_caido(mock_iniciar):
+    caido, nuevo = MagicMock(), MagicMock()
+    type(caido).window_handles = property(lambda self: (_ for _ in ()).throw(Exception("sesión cerrada")))
+    pool = utils.PoolDrivers("fake/chromedriver")
+    pool._libres.append((caido, MagicMock()))
+    mock_iniciar.return_value = (nuevo, MagicMock())
 
-    mock_driver.find_element.side_effect = [
-        paginador_antes,  # para obtener rango anterior
-        boton,            # clic siguiente
-        paginador_despues  # nuevo texto tras clic
-    ]
+    driver, _ = pool.obtener()
 
-    # Simula que la tabla se carga correctamente
-    mock_wait.until.return_value = True
+    assert driver is nuevo
+    caido.quit.assert_called_once()
 
-    result = utils.click_siguiente_pagina(
-        driver=mock_driver,
-        wait=mock_wait,
-        xpath_siguiente="//xpath",
-        by_tabla=By.CSS_SELECTOR,
-        selector_tabla="tabla",
-        id_paginador="id_del_paginador"
-    )
 
-    assert result is True
+# Test para comprobar que el pool no conserva más navegadores libres que su máximo
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_pool_drivers_max_drivers(mock_iniciar):
+    drivers = [MagicMock(window_handles=["principal"]) for _ in range(2)]
+    mock_iniciar.side_effect = [(d, MagicMock()) for d in drivers]
+    pool = utils.PoolDrivers("fake/chromedriver", max_drivers=1)
+
+    prestados = [pool.obtener(), pool.obtener()]
+    for driver, wait in prestados:
+        pool.devolver(driver, wait)
+
+    drivers[0].quit.assert_not_called()
+    drivers[1].quit.assert_called_once()
+
+
+# Test para comprobar que el contexto descarta el navegador si el bloque falla
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_pool_drivers_contexto_con_error(mock_iniciar):
+    driver = MagicMock()
+    mock_iniciar.return_value = (driver, MagicMock())
+    pool = utils.PoolDrivers("fake/chromedriver")
+
+    with pytest.raises(RuntimeError):
+        with pool.driver():
+            raise RuntimeError("fallo en el scraper")
+
+    driver.quit.assert_called_once()
+    assert pool._libres == []
+
+
+# Test para comprobar que sin pool se inicia y se cierra un navegador propio
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_obtener_y_liberar_driver_propio(mock_iniciar):
+    driver, wait = MagicMock(), MagicMock()
+    driver.quit.side_effect = Exception("ya cerrado")
+    mock_iniciar.return_value = (driver, wait)
+
+    assert utils.obtener_driver("fake/chromedriver") == (driver, wait)
+    # Un error al cerrar no se propaga: se usa en bloques finally
+    utils.liberar_driver(driver, wait)
+
+    mock_iniciar.assert_called_once_with("fake/chromedriver", headless=True, rapido=True)
+    driver.quit.assert_called_once()
+
+
+# Test para comprobar que con pool el navegador se toma y se devuelve al pool sin cerrarlo
+@patch("scraping.utils.selenium_utils.iniciar_driver")
+def test_obtener_y_liberar_driver_con_pool(mock_iniciar):
+    pool = MagicMock()
+    driver, wait = MagicMock(), MagicMock()
+    pool.obtener.return_value = (driver, wait)
+
+    assert utils.obtener_driver("fake/chromedriver", pool) == (driver, wait)
+    utils.liberar_driver(driver, wait, pool)
+
+    mock_iniciar.assert_not_called()
+    pool.devolver.assert_called_once_with(driver, wait)
+    driver.quit.assert_not_called()
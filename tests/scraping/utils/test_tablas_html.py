@@ -0,0 +1,73 @@
+# tests/scraping/utils/test_tablas_html.py
+
+import os
+from scraping.utils.tablas_html import parsear_filas, enlaces_con_contexto, html_interior
+from lxml import html as lxml_html
+
+TABLAS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "fixtures", "tablas")
+URL_BASE = "https://www.congreso.es/es/busqueda-de-diputados"
+
+
+def _leer(nombre):
+    with open(os.path.join(TABLAS_DIR, nombre), encoding="utf-8") as f:
+        return f.read()
+
+
+# Test para comprobar el parseo de una tabla guardada: cabeceras, celdas, textos normalizados y href absolutos
+def test_parsear_filas_tabla_guardada():
+    filas = parsear_filas(_leer("diputados.html"), URL_BASE)
+
+    assert len(filas) == 3
+    assert [c["texto"] for c in filas[0]["cabeceras"]] == ["Diputado", "Grupo", "Circunscripción"]
+    assert filas[0]["celdas"] == []
+    assert [c["texto"] for c in filas[2]["celdas"]] == ["Bravo Gil, Luis", "GP", "Sevilla"]
+    assert filas[1]["enlaces"] == [{
+        "texto": "Abad Pérez, Ana",
+        "href": "https://www.congreso.es/es/busqueda-de-diputados?p_p_id=diputadomodule&codParlamentario=1"
+    }]
+    assert filas[1]["celdas"][0]["enlaces"] == filas[1]["enlaces"]
+
+
+# Test para comprobar que las filas sueltas (outerHTML de cada <tr>) se parsean igual que la tabla completa
+def test_parsear_filas_sueltas():
+    filas = parsear_filas('<tr><th>Nombre</th><td>01/01/2024</td></tr><tr><td>x</td></tr>')
+
+    assert [[c["texto"] for c in f["cabeceras"]] for f in filas] == [["Nombre"], []]
+    assert [[c["texto"] for c in f["celdas"]] for f in filas] == [["01/01/2024"], ["x"]]
+
+
+# Test para comprobar que no se devuelven las filas de tablas anidadas en una celda
+def test_parsear_filas_tabla_anidada():
+    filas = parsear_filas('<tr><td><table><tr><td>interior</td></tr></table></td></tr>')
+
+    assert len(filas) == 1
+    assert filas[0]["celdas"][0]["texto"] == "interior"
+
+
+# Test para comprobar que una tabla anidada en la primera celda no se confunde con la tabla de resultados
+def test_parsear_filas_tabla_anidada_en_primera_celda():
+    filas = parsear_filas('<tr><td><table><tr><td>x</td></tr></table></td><td>b</td></tr><tr><td>c</td></tr>')
+
+    assert len(filas) == 2
+    assert [c["texto"] for c in filas[0]["celdas"]] == ["x", "b"]
+    assert [c["texto"] for c in filas[1]["celdas"]] == ["c"]
+
+
+# Test para comprobar que un HTML vacío no produce filas
+def test_parsear_filas_vacio():
+    assert parsear_filas("") == []
+    assert parsear_filas("   ") == []
+
+
+# Test para comprobar que el innerHTML conserva el marcado interior de la celda
+def test_html_interior():
+    celda = lxml_html.fragment_fromstring('<td>a <br>b <a href="/x">L</a> c</td>')
+    assert html_interior(celda) == 'a <br>b <a href="/x">L</a> c'
+
+
+# Test para comprobar que cada enlace se devuelve con el texto que lo precede, aunque esté en otro elemento
+def test_enlaces_con_contexto():
+    celda = parsear_filas(_leer("sustituciones.html"), URL_BASE)[0]["celdas"][0]["html"]
+
+    assert enlaces_con_contexto(celda) == [("", "Esteban Sanz, Rosa"), ("Sustituye a:", "Castro Ruiz, Eva")]
+    assert enlaces_con_contexto("") == []